@@ -0,0 +1,25 @@
+import os
+
+from django.db import connections
+
+
+def connection_stats(alias='default'):
+    """How this worker process talks to the database `alias`, for the ops endpoint.
+
+    Pools and persistent connections are per process, so each worker reports its own.
+    """
+    connection = connections[alias]
+    settings_dict = connection.settings_dict
+    stats = {
+        'alias': alias,
+        'vendor': connection.vendor,
+        'pid': os.getpid(),
+        'conn_max_age': settings_dict['CONN_MAX_AGE'],
+        'health_checks': settings_dict['CONN_HEALTH_CHECKS'],
+        'connected': connection.connection is not None,
+        'pool': None,
+    }
+    if connection.vendor == 'postgresql' and 'pool' in settings_dict['OPTIONS']:
+        # psycopg_pool counters: pool_size, pool_available, requests_waiting, connections_errors, ...
+        stats['pool'] = connection.pool.get_stats()
+    return stats
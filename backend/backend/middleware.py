@@ -0,0 +1,58 @@
+import inspect
+
+from asgiref.sync import async_to_sync, iscoroutinefunction, sync_to_async
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.utils.deprecation import MiddlewareMixin
+
+
+def _next_link(middleware):
+    if hasattr(middleware, 'get_response'):
+        return middleware.get_response
+    # Function middleware such as allauth's AccountMiddleware close over it instead
+    return inspect.getclosurevars(middleware).nonlocals.get('get_response')
+
+
+def _end_of_browser_stack(get_response):
+    """Follow the chain Django built after BrowserStackMiddleware to its end marker.
+
+    Django wraps each middleware with functools.wraps, so every link exposes the
+    middleware as __wrapped__; the middleware holds the next link.
+    """
+    handler = get_response
+    while (middleware := getattr(handler, '__wrapped__', None)) is not None:
+        if isinstance(middleware, BrowserStackEndMiddleware):
+            return middleware.get_response
+        handler = _next_link(middleware)
+    raise ImproperlyConfigured('BrowserStackMiddleware must come before BrowserStackEndMiddleware in MIDDLEWARE')
+
+
+class BrowserStackMiddleware(MiddlewareMixin):
+    """Skips the middleware between itself and BrowserStackEndMiddleware on LEAN_MIDDLEWARE_PATHS.
+
+    /api/ authenticates with JWTs in DRF, so loading and saving sessions, CSRF
+    cookies, messages and allauth's request state are pure overhead there; those
+    middleware sit between the two markers in MIDDLEWARE and run only for the
+    admin and OAuth flows. They stay listed in MIDDLEWARE because the admin and
+    allauth refuse to start otherwise. Their process_view/process_exception hooks
+    still run; CSRF's returns at once for DRF's csrf-exempt views.
+    """
+
+    def __init__(self, get_response):
+        super().__init__(get_response)
+        skip_to = _end_of_browser_stack(get_response)
+        if iscoroutinefunction(skip_to) != self.async_mode:
+            # Only when something between the markers is sync-only or async-only
+            skip_to = sync_to_async(skip_to) if self.async_mode else async_to_sync(skip_to)
+        self.skip_to = skip_to
+        self.lean_paths = tuple(getattr(settings, 'LEAN_MIDDLEWARE_PATHS', ('/api/',)))
+
+    def __call__(self, request):
+        # In async mode both return the coroutine for Django to await
+        if request.path_info.startswith(self.lean_paths):
+            return self.skip_to(request)
+        return self.get_response(request)
+
+
+class BrowserStackEndMiddleware(MiddlewareMixin):
+    """Marks where the middleware skipped by BrowserStackMiddleware end; passes requests through."""
@@ -0,0 +1,235 @@
+import base64
+import contextvars
+import json
+import random
+import threading
+import time
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DatabaseError, connections
+from django.utils.deprecation import MiddlewareMixin
+
+PRIMARY = 'default'
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+
+_request_state = contextvars.ContextVar('replica_request_state', default=None)
+
+
+def replica_aliases():
+    return getattr(settings, 'DATABASE_REPLICAS', ())
+
+
+def _pin_key(identity):
+    return f'db:pin:{identity}'
+
+
+def pin_seconds():
+    """REPLICA_PIN_SECONDS, but never less than the most a replica in use can be behind.
+
+    A replica is only rechecked every REPLICA_CHECK_SECONDS, so that is up to
+    REPLICA_MAX_LAG_SECONDS plus the time since its last check.
+    """
+    longest_lag = getattr(settings, 'REPLICA_MAX_LAG_SECONDS', 10) + getattr(settings, 'REPLICA_CHECK_SECONDS', 5)
+    return max(getattr(settings, 'REPLICA_PIN_SECONDS', 15), longest_lag)
+
+
+def pin_to_primary(*identities):
+    """Send reads by these clients ('user:<id>' / 'session:<key>') to the primary for a while."""
+    if identities:
+        cache.set_many({_pin_key(identity): 1 for identity in identities}, timeout=pin_seconds())
+
+
+async def apin_to_primary(*identities):
+    if identities:
+        await cache.aset_many({_pin_key(identity): 1 for identity in identities}, timeout=pin_seconds())
+
+
+def replication_lag(alias):
+    """Seconds `alias` is behind the primary; 0 for databases that aren't streaming replicas."""
+    connection = connections[alias]
+    with connection.cursor() as cursor:
+        if connection.vendor != 'postgresql':
+            cursor.execute('SELECT 1')
+            return 0.0
+        # An idle primary leaves the replay timestamp old, so only count lag while WAL is pending
+        cursor.execute(
+            "SELECT CASE WHEN NOT pg_is_in_recovery() OR pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() "
+            "THEN 0 ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0) END"
+        )
+        return float(cursor.fetchone()[0])
+
+
+class ReplicaHealth:
+    """Per-process record of which replicas may serve reads.
+
+    A replica is checked at most every REPLICA_CHECK_SECONDS from the request that
+    needs it; one that can't be reached, or is more than REPLICA_MAX_LAG_SECONDS
+    behind, is skipped until a later check finds it fit again.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._checked = {}
+
+    def is_healthy(self, alias):
+        now = time.monotonic()
+        entry = self._checked.get(alias)
+        if entry is not None and now < entry[1]:
+            return entry[0]
+        healthy = self._check(alias)
+        with self._lock:
+            self._checked[alias] = (healthy, now + getattr(settings, 'REPLICA_CHECK_SECONDS', 5))
+        return healthy
+
+    def _check(self, alias):
+        try:
+            return replication_lag(alias) <= getattr(settings, 'REPLICA_MAX_LAG_SECONDS', 10)
+        except DatabaseError:
+            # Django drops the broken connection at the end of the request
+            return False
+
+    def clear(self):
+        with self._lock:
+            self._checked.clear()
+
+
+replica_health = ReplicaHealth()
+
+
+class _RequestState:
+    __slots__ = ('use_replicas', 'written')
+
+    def __init__(self, use_replicas):
+        self.use_replicas = use_replicas
+        self.written = []
+
+
+@contextmanager
+def primary_reads():
+    """Read from the primary inside this block, e.g. while filling a shared cache."""
+    state = _request_state.get()
+    if state is None:
+        yield
+        return
+    previous, state.use_replicas = state.use_replicas, False
+    try:
+        yield
+    finally:
+        state.use_replicas = previous
+
+
+class ReplicaRouter:
+    """Sends reads made while serving safe requests to a healthy replica, everything else to the primary.
+
+    Writes, reads in unsafe requests, and anything outside a request (commands, background
+    workers) use the primary. With no DATABASE_REPLICAS the router has no opinion at all.
+    """
+
+    def db_for_read(self, model, **hints):
+        if not replica_aliases():
+            return None
+        state = _request_state.get()
+        if state is None or not state.use_replicas:
+            return PRIMARY
+        healthy = [alias for alias in replica_aliases() if replica_health.is_healthy(alias)]
+        return random.choice(healthy) if healthy else PRIMARY
+
+    def db_for_write(self, model, **hints):
+        if not replica_aliases():
+            return None
+        state = _request_state.get()
+        if state is not None:
+            state.written.append(hints.get('instance'))
+        return PRIMARY
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Replicas hold the same rows as the primary
+        return True
+
+    def allow_migrate(self, db, app_label, **hints):
+        # Replicas get their schema through replication
+        return db not in replica_aliases()
+
+
+def _token_user_id(token):
+    # Not verified: this only picks a database, DRF still authenticates the token
+    try:
+        payload = token.split('.')[1]
+        claims = json.loads(base64.urlsafe_b64decode(payload + '=' * (-len(payload) % 4)))
+        return int(claims[settings.SIMPLE_JWT.get('USER_ID_CLAIM', 'user_id')])
+    except (IndexError, KeyError, TypeError, ValueError):
+        return None
+
+
+def request_identity(request):
+    header = request.META.get('HTTP_AUTHORIZATION', '')
+    if header.startswith('Bearer '):
+        user_id = _token_user_id(header[7:])
+        if user_id is not None:
+            return f'user:{user_id}'
+    session_key = request.COOKIES.get(settings.SESSION_COOKIE_NAME)
+    return f'session:{session_key}' if session_key else None
+
+
+def _written_identities(instances):
+    from django.contrib.auth import get_user_model
+
+    user_model = get_user_model()
+    for instance in instances:
+        user_id = instance.pk if isinstance(instance, user_model) else getattr(instance, 'user_id', None)
+        if user_id is not None:
+            yield f'user:{user_id}'
+
+
+class ReplicaRoutingMiddleware(MiddlewareMixin):
+    """Lets ReplicaRouter use replicas for safe requests, with read-your-writes.
+
+    A request that writes pins its client to the primary for REPLICA_PIN_SECONDS, by
+    JWT user id or session key (including a session it just created), and also pins
+    users whose rows it saved - so a new signup's first reads see their account.
+    """
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self._acall(request)
+        if not replica_aliases():
+            return self.get_response(request)
+
+        identity = request_identity(request)
+        use_replicas = request.method in SAFE_METHODS and not (identity and cache.get(_pin_key(identity)))
+        state = _RequestState(use_replicas)
+        token = _request_state.set(state)
+        try:
+            response = self.get_response(request)
+        finally:
+            _request_state.reset(token)
+        pin_to_primary(*self._pins(identity, state, response))
+        return response
+
+    async def _acall(self, request):
+        if not replica_aliases():
+            return await self.get_response(request)
+
+        identity = request_identity(request)
+        use_replicas = request.method in SAFE_METHODS and not (identity and await cache.aget(_pin_key(identity)))
+        state = _RequestState(use_replicas)
+        token = _request_state.set(state)
+        try:
+            response = await self.get_response(request)
+        finally:
+            _request_state.reset(token)
+        await apin_to_primary(*self._pins(identity, state, response))
+        return response
+
+    def _pins(self, identity, state, response):
+        if not state.written:
+            return set()
+        pinned = set(_written_identities(state.written))
+        if identity:
+            pinned.add(identity)
+        session_cookie = response.cookies.get(settings.SESSION_COOKIE_NAME)
+        if session_cookie is not None and session_cookie.value:
+            pinned.add(f'session:{session_cookie.value}')
+        return pinned
@@ -0,0 +1,25 @@
+from django.test.runner import DiscoverRunner
+from django.test.utils import override_settings
+
+TEST_CACHES = {
+    alias: {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': f'vello-test-{alias}',
+        'OPTIONS': {'MAX_ENTRIES': 100000},
+    }
+    for alias in ('default', 'throttle', 'activity')
+}
+
+
+class LocmemCacheTestRunner(DiscoverRunner):
+    """Swaps every cache for locmem, so the suite's cache.clear() calls never wipe a shared
+    cache (a developer's Redis or cache directory) and tests can't see each other's runs."""
+
+    def setup_test_environment(self, **kwargs):
+        super().setup_test_environment(**kwargs)
+        self._caches = override_settings(CACHES=TEST_CACHES)
+        self._caches.enable()
+
+    def teardown_test_environment(self, **kwargs):
+        self._caches.disable()
+        super().teardown_test_environment(**kwargs)
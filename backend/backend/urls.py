@@ -21,6 +21,8 @@ from django.conf.urls.static import static
 from rest_framework.decorators import api_view
 from rest_framework.response import Response
 
+from .views import DatabaseStatsView
+
 # from allauth.socialaccount.providers.google.views import GoogleOAuth2Adapter
 # from allauth.socialaccount.providers.oauth2.client import OAuth2Client
 # from dj_rest_auth.registration.views import SocialLoginView
@@ -45,6 +47,10 @@ urlpatterns = [
 
     path('api/', include('userauth.urls')),
     path('api/', include('userprofile.urls')),
+    path('api/', include('products.urls')),
+    path('api/', include('cart.urls')),
+    path('api/', include('orders.urls')),
+    path('api/ops/db/', DatabaseStatsView.as_view(), name='database-stats'),
 ]
 
 
@@ -0,0 +1,15 @@
+from django.conf import settings
+from rest_framework.permissions import IsAdminUser
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from .database import connection_stats
+
+
+class DatabaseStatsView(APIView):
+    """Connection reuse and pool counters of the worker process that serves the request."""
+
+    permission_classes = [IsAdminUser]
+
+    def get(self, request):
+        return Response({alias: connection_stats(alias) for alias in settings.DATABASES})
@@ -0,0 +1,9 @@
+from django.contrib import admin
+from .models import CartItem
+
+
+@admin.register(CartItem)
+class CartItemAdmin(admin.ModelAdmin):
+    list_display = ('user', 'product', 'product_quantity', 'reserved_until', 'updated_at')
+    list_select_related = ('user', 'product')
+    raw_id_fields = ('user', 'product')
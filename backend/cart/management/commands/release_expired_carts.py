@@ -0,0 +1,26 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from cart.reservations import release_expired_reservations
+
+
+class Command(BaseCommand):
+    help = "Return stock held by cart lines whose reservation has expired (lines stay in the cart, unreserved)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=500)
+        parser.add_argument("--loop", action="store_true", help="Keep sweeping instead of exiting")
+        parser.add_argument("--interval", type=float, default=30.0, help="Seconds between sweeps with --loop")
+
+    def handle(self, *args, **options):
+        total = 0
+        while True:
+            released = release_expired_reservations(batch_size=options["batch_size"])
+            total += released
+            if released:
+                self.stdout.write(f"Released {released} cart line(s)")
+            if not options["loop"]:
+                break
+            time.sleep(options["interval"])
+        self.stdout.write(self.style.SUCCESS(f"Released {total} cart line(s)"))
@@ -0,0 +1,36 @@
+from django.conf import settings
+from django.db import models
+
+from products.models import Product
+
+
+class CartItem(models.Model):
+    """One cart line. While `reserved_until` is set, `product_quantity` units are held
+    out of the product's available_stock; the sweeper hands them back once it passes."""
+
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='cart_items')
+    product = models.ForeignKey(Product, on_delete=models.CASCADE, related_name='+')
+    product_quantity = models.PositiveIntegerField()
+    reserved_until = models.DateTimeField(null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'product'], name='cart_item_user_product_uniq'),
+        ]
+        indexes = [
+            # The sweeper only ever scans lines that still hold stock
+            models.Index(
+                fields=['reserved_until'],
+                condition=models.Q(reserved_until__isnull=False),
+                name='cart_item_reserved_idx',
+            ),
+        ]
+
+    @property
+    def is_reserved(self):
+        return self.reserved_until is not None
+
+    def __str__(self):
+        return f'{self.user_id}: {self.product_quantity} x {self.product_id}'
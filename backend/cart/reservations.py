@@ -0,0 +1,180 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models import Case, F, PositiveIntegerField, Q, Value, When
+from django.utils import timezone
+
+from products.models import Product
+from .models import CartItem
+
+
+class InsufficientStock(Exception):
+    """Raised with {product_id: units still available} for lines that can't be reserved."""
+
+    def __init__(self, unavailable):
+        super().__init__(unavailable)
+        self.unavailable = unavailable
+
+
+class _PartialReservation(Exception):
+    pass
+
+
+def _by_product(amounts):
+    return Case(
+        *[When(pk=product_id, then=Value(amount)) for product_id, amount in amounts.items()],
+        output_field=PositiveIntegerField(),
+    )
+
+
+def _lock_products(product_ids):
+    # A multi-row UPDATE locks rows in whatever order it scans them; taking the locks in pk
+    # order first, as checkout does, keeps concurrent carts and checkouts from deadlocking
+    list(Product.objects.select_for_update().filter(pk__in=product_ids).order_by('pk').values_list('pk', flat=True))
+
+
+def reserve_stock(amounts):
+    """Take `amounts` ({product_id: units}) out of available_stock, all or nothing.
+
+    Each product is a conditional `available_stock = available_stock - n WHERE
+    available_stock >= n`, so concurrent buyers can never oversell. The common case is
+    one UPDATE for every product; only if some row fails the condition is it redone
+    per product to find which ones.
+    """
+    if not amounts:
+        return
+    try:
+        with transaction.atomic():
+            _lock_products(amounts)
+            condition = Q()
+            for product_id, amount in amounts.items():
+                condition |= Q(pk=product_id, available_stock__gte=amount)
+            updated = Product.objects.filter(condition).update(
+                available_stock=F('available_stock') - _by_product(amounts)
+            )
+            if updated != len(amounts):
+                raise _PartialReservation()
+        return
+    except _PartialReservation:
+        pass
+
+    unavailable = {}
+    with transaction.atomic():
+        _lock_products(amounts)
+        for product_id, amount in amounts.items():
+            reserved = Product.objects.filter(pk=product_id, available_stock__gte=amount).update(
+                available_stock=F('available_stock') - amount
+            )
+            if not reserved:
+                unavailable[product_id] = None
+        if unavailable:
+            current = dict(Product.objects.filter(pk__in=unavailable).values_list('id', 'available_stock'))
+            raise InsufficientStock({product_id: current.get(product_id, 0) for product_id in unavailable})
+
+
+def take_stock(amounts):
+    """Decrement available_stock in a single UPDATE, for rows the caller has locked and checked."""
+    if amounts:
+        Product.objects.filter(pk__in=amounts).update(available_stock=F('available_stock') - _by_product(amounts))
+
+
+def release_stock(amounts):
+    """Give units back to available_stock in a single UPDATE. Call inside a transaction."""
+    if amounts:
+        _lock_products(amounts)
+        Product.objects.filter(pk__in=amounts).update(available_stock=F('available_stock') + _by_product(amounts))
+
+
+def reservation_deadline(now=None):
+    return (now or timezone.now()) + timedelta(minutes=getattr(settings, 'CART_RESERVATION_MINUTES', 15))
+
+
+def set_cart_quantities(user_id, quantities):
+    """Set several cart lines at once ({product_id: quantity}, 0 removes the line).
+
+    Lines are locked, stock is reserved or released for the difference, and the lines
+    are upserted - a constant number of statements however many lines change. Raises
+    InsufficientStock, leaving the cart untouched, if any line can't be reserved.
+    """
+    now = timezone.now()
+    with transaction.atomic():
+        # Lines that don't exist yet can't be locked, so two first-time adds of a product
+        # (a double-clicked "add") would both reserve it; one user's updates go one at a time
+        list(get_user_model()._base_manager.select_for_update().filter(pk=user_id).values_list('pk', flat=True))
+        lines = {
+            line.product_id: line
+            for line in CartItem.objects.select_for_update().filter(user_id=user_id, product_id__in=quantities)
+        }
+        take, give = {}, {}
+        for product_id, quantity in quantities.items():
+            line = lines.get(product_id)
+            # Expired lines keep their units until the sweeper returns them
+            held = line.product_quantity if line is not None and line.is_reserved else 0
+            if quantity > held:
+                take[product_id] = quantity - held
+            elif quantity < held:
+                give[product_id] = held - quantity
+
+        reserve_stock(take)
+        release_stock(give)
+
+        deadline = reservation_deadline(now)
+        keep = [
+            CartItem(user_id=user_id, product_id=product_id, product_quantity=quantity,
+                     reserved_until=deadline, created_at=now, updated_at=now)
+            for product_id, quantity in quantities.items() if quantity > 0
+        ]
+        if keep:
+            CartItem.objects.bulk_create(
+                keep,
+                update_conflicts=True,
+                unique_fields=['user', 'product'],
+                update_fields=['product_quantity', 'reserved_until', 'updated_at'],
+            )
+        removed = [product_id for product_id, quantity in quantities.items() if quantity == 0]
+        if removed:
+            CartItem.objects.filter(user_id=user_id, product_id__in=removed).delete()
+
+
+def clear_cart(user_id):
+    clear_carts([user_id])
+
+
+def clear_carts(user_ids):
+    with transaction.atomic():
+        lines = list(CartItem.objects.select_for_update().filter(user_id__in=user_ids))
+        release_stock(_held(lines))
+        CartItem.objects.filter(pk__in=[line.pk for line in lines]).delete()
+
+
+def _held(lines):
+    held = {}
+    for line in lines:
+        if line.is_reserved:
+            held[line.product_id] = held.get(line.product_id, 0) + line.product_quantity
+    return held
+
+
+def release_expired_reservations(batch_size=500, now=None):
+    """Return stock held by lines past their reservation. Returns how many lines were released.
+
+    Lines stay in the cart, unreserved; the next cart update or checkout reserves them
+    again. skip_locked keeps the sweeper off lines a shopper is changing right now.
+    """
+    now = now or timezone.now()
+    total = 0
+    while True:
+        with transaction.atomic():
+            lines = list(
+                CartItem.objects.select_for_update(skip_locked=True)
+                .filter(reserved_until__lt=now)
+                .order_by('reserved_until')
+                .only('id', 'product_id', 'product_quantity', 'reserved_until')[:batch_size]
+            )
+            if not lines:
+                return total
+            release_stock(_held(lines))
+            CartItem.objects.filter(pk__in=[line.pk for line in lines]).update(reserved_until=None)
+        total += len(lines)
@@ -0,0 +1,26 @@
+from rest_framework import serializers
+
+from products.serializers import ProductListSerializer
+from .models import CartItem
+
+
+class CartLineInputSerializer(serializers.Serializer):
+    product_id = serializers.IntegerField(min_value=1)
+    quantity = serializers.IntegerField(min_value=0, max_value=100)
+
+
+class CartUpdateSerializer(serializers.Serializer):
+    items = CartLineInputSerializer(many=True, allow_empty=False, max_length=100)
+
+    def validate_items(self, items):
+        # Last entry wins if a product is listed twice
+        return {item['product_id']: item['quantity'] for item in items}
+
+
+class CartItemSerializer(serializers.ModelSerializer):
+    product = ProductListSerializer(read_only=True)
+    reserved = serializers.BooleanField(source='is_reserved', read_only=True)
+
+    class Meta:
+        model = CartItem
+        fields = ['product', 'product_quantity', 'reserved', 'reserved_until']
@@ -0,0 +1,10 @@
+from django.dispatch import receiver
+
+from userauth.purge import pre_purge
+from .reservations import clear_carts
+
+
+@receiver(pre_purge)
+def release_purged_carts(sender, user_ids, **kwargs):
+    # The purge raw-deletes cart lines, which would lose the stock they hold
+    clear_carts(user_ids)
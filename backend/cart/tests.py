@@ -0,0 +1,179 @@
+import random
+import threading
+import time
+from datetime import timedelta
+from decimal import Decimal
+
+from django.core.cache import cache
+from django.db import OperationalError, connection
+from django.test import TestCase, TransactionTestCase
+from django.utils import timezone
+
+from products.models import Product
+from userauth.authentication import validated_users
+from userauth.last_login import last_login_recorder
+from userauth.models import CustomUser
+from userauth.purge import purge_deleted_users
+from userauth.throttles import throttle_cache
+from userprofile.activity import activity_tracker
+from .models import CartItem
+from .reservations import InsufficientStock, release_expired_reservations, set_cart_quantities
+
+
+def make_product(slug, stock):
+    return Product.objects.create(
+        product_type="tablet", name=slug, company="Cipla", disease_category="Fever & Pain",
+        mrp=Decimal("10.00"), available_stock=stock, slug=slug,
+    )
+
+
+def stock(product):
+    return Product.objects.values_list("available_stock", flat=True).get(pk=product.pk)
+
+
+class CartAPITests(TestCase):
+    email = "cart@example.com"
+    password = "S3cure-pass!"
+
+    def setUp(self):
+        cache.clear()
+        throttle_cache.clear()
+        validated_users.clear()
+        self.addCleanup(last_login_recorder.flush)
+        self.addCleanup(activity_tracker.flush)
+        self.user = CustomUser.objects.create_user(email=self.email, password=self.password)
+        response = self.client.post(
+            "/api/login/", {"email": self.email, "password": self.password}, content_type="application/json"
+        )
+        self.auth = {"HTTP_AUTHORIZATION": "Bearer " + response.json()["access"]}
+        self.a = make_product("a", 10)
+        self.b = make_product("b", 3)
+
+    def post(self, *items):
+        return self.client.post(
+            "/api/cart/",
+            {"items": [{"product_id": p.pk, "quantity": q} for p, q in items]},
+            content_type="application/json",
+            **self.auth,
+        )
+
+    def test_batched_update_reserves_stock(self):
+        self.client.get("/api/cart/", **self.auth)  # warm the JWT user check
+        # User and line locks, product locks, one stock UPDATE, one upsert (+ savepoints), then three reads
+        with self.assertNumQueries(12):
+            response = self.post((self.a, 4), (self.b, 2))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            {line["product"]["product_id"]: line["product_quantity"] for line in response.json()["items"]},
+            {self.a.pk: 4, self.b.pk: 2},
+        )
+        self.assertEqual((stock(self.a), stock(self.b)), (6, 1))
+
+        self.post((self.a, 1), (self.b, 0))
+        self.assertEqual((stock(self.a), stock(self.b)), (9, 3))
+        self.assertEqual(list(CartItem.objects.values_list("product_id", flat=True)), [self.a.pk])
+
+    def test_insufficient_stock_changes_nothing(self):
+        response = self.post((self.a, 2), (self.b, 4))
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(response.json()["unavailable"], [{"product_id": self.b.pk, "available_stock": 3}])
+        self.assertEqual((stock(self.a), stock(self.b)), (10, 3))
+        self.assertFalse(CartItem.objects.exists())
+
+    def test_clear_returns_stock(self):
+        self.post((self.a, 4))
+        self.assertEqual(self.client.delete("/api/cart/", **self.auth).status_code, 204)
+        self.assertEqual(stock(self.a), 10)
+
+    def test_purge_returns_held_stock(self):
+        self.post((self.a, 4), (self.b, 2))
+        # An expired line already gave its units back and must not return them twice
+        CartItem.objects.filter(product=self.b).update(reserved_until=timezone.now() - timedelta(minutes=1))
+        self.assertEqual(release_expired_reservations(), 1)
+        CustomUser.objects.soft_delete(self.user.pk)
+        self.assertEqual(purge_deleted_users(), 1)
+        self.assertFalse(CartItem.objects.exists())
+        self.assertEqual((stock(self.a), stock(self.b)), (10, 3))
+
+    def test_sweeper_releases_expired_lines(self):
+        self.post((self.a, 4), (self.b, 1))
+        later = timezone.now() + timedelta(hours=1)
+        self.assertEqual(release_expired_reservations(now=later), 2)
+        self.assertEqual((stock(self.a), stock(self.b)), (10, 3))
+        self.assertEqual(release_expired_reservations(now=later), 0)
+
+        # Lines stay; the next update reserves the full quantity again
+        self.post((self.a, 5))
+        self.assertEqual(stock(self.a), 5)
+        items = self.client.get("/api/cart/", **self.auth).json()["items"]
+        self.assertEqual(
+            {(item["product"]["product_id"], item["reserved"]) for item in items},
+            {(self.a.pk, True), (self.b.pk, False)},
+        )
+
+
+class ConcurrentReservationTests(TransactionTestCase):
+    threads = 20
+
+    def test_trending_product_is_never_oversold(self):
+        product = make_product("trending", 7)
+        users = [
+            CustomUser.objects.create_user_with_hash(email=f"buyer{i}@example.com", password_hash="!")
+            for i in range(self.threads)
+        ]
+        results = []
+        start = threading.Barrier(self.threads)
+
+        def buy(user):
+            start.wait()
+            try:
+                while True:
+                    try:
+                        set_cart_quantities(user.pk, {product.pk: 1})
+                        results.append(True)
+                        return
+                    except InsufficientStock:
+                        results.append(False)
+                        return
+                    except OperationalError:
+                        # SQLite allows one writer at a time; PostgreSQL just waits on the row lock
+                        time.sleep(random.uniform(0, 0.02))  # back off, or the threads can livelock
+            finally:
+                connection.close()
+
+        workers = [threading.Thread(target=buy, args=(user,)) for user in users]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+
+        self.assertEqual(results.count(True), 7)
+        self.assertEqual(results.count(False), self.threads - 7)
+        self.assertEqual(stock(product), 0)
+        self.assertEqual(CartItem.objects.count(), 7)
+
+    def test_concurrent_first_adds_reserve_once(self):
+        product = make_product("double-click", 10)
+        user = CustomUser.objects.create_user_with_hash(email="double@example.com", password_hash="!")
+        start = threading.Barrier(5)
+
+        def add():
+            start.wait()
+            try:
+                while True:
+                    try:
+                        set_cart_quantities(user.pk, {product.pk: 2})
+                        return
+                    except OperationalError:
+                        time.sleep(random.uniform(0, 0.02))
+            finally:
+                connection.close()
+
+        workers = [threading.Thread(target=add) for _ in range(5)]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+
+        self.assertEqual(list(CartItem.objects.values_list("product_quantity", flat=True)), [2])
+        self.assertEqual(stock(product), 8)
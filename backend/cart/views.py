@@ -0,0 +1,48 @@
+from django.db.models import Prefetch
+from rest_framework import status
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from products.models import Product
+from .models import CartItem
+from .reservations import InsufficientStock, clear_cart, set_cart_quantities
+from .serializers import CartItemSerializer, CartUpdateSerializer
+
+
+def cart_lines(user_id):
+    # Lines, their products' list columns and thumbnails: three queries for any cart size
+    return (
+        CartItem.objects.filter(user_id=user_id)
+        .prefetch_related(Prefetch('product', queryset=Product.objects.for_listing()))
+        .order_by('created_at', 'id')
+    )
+
+
+class CartView(APIView):
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request):
+        return Response({"items": CartItemSerializer(cart_lines(request.user.pk), many=True).data})
+
+    def post(self, request):
+        """Set the quantity of one or more lines in one go: {"items": [{"product_id", "quantity"}]}."""
+        serializer = CartUpdateSerializer(data=request.data)
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+        try:
+            set_cart_quantities(request.user.pk, serializer.validated_data['items'])
+        except InsufficientStock as e:
+            return Response({
+                "error": "Not enough stock for some items.",
+                "unavailable": [
+                    {"product_id": product_id, "available_stock": available}
+                    for product_id, available in e.unavailable.items()
+                ],
+            }, status=status.HTTP_409_CONFLICT)
+        return Response({"items": CartItemSerializer(cart_lines(request.user.pk), many=True).data})
+
+    def delete(self, request):
+        clear_cart(request.user.pk)
+        return Response(status=status.HTTP_204_NO_CONTENT)
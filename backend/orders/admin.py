@@ -0,0 +1,30 @@
+from django.contrib import admin
+from .models import Delivery, Order, OrderItem, Payment
+
+
+class OrderItemInline(admin.TabularInline):
+    model = OrderItem
+    extra = 0
+    raw_id_fields = ('product',)
+
+
+class DeliveryInline(admin.TabularInline):
+    model = Delivery
+    extra = 0
+
+
+@admin.register(Order)
+class OrderAdmin(admin.ModelAdmin):
+    list_display = ('id', 'user', 'total_amount', 'item_count', 'order_status', 'order_date')
+    list_filter = ('order_status',)
+    list_select_related = ('user',)
+    raw_id_fields = ('user', 'payment')
+    inlines = [OrderItemInline, DeliveryInline]
+
+
+@admin.register(Payment)
+class PaymentAdmin(admin.ModelAdmin):
+    list_display = ('id', 'user', 'amount', 'payment_mode', 'payment_status', 'payment_date')
+    list_filter = ('payment_mode', 'payment_status')
+    list_select_related = ('user',)
+    raw_id_fields = ('user',)
@@ -0,0 +1,94 @@
+import hashlib
+from decimal import Decimal
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import IntegrityError, transaction
+
+from cart.models import CartItem
+from cart.reservations import InsufficientStock, take_stock
+from products.models import Product
+from .models import Order, OrderItem, Payment
+
+
+class EmptyCart(Exception):
+    pass
+
+
+def unit_price(product):
+    return (product.mrp * (100 - product.discount) / 100).quantize(Decimal('0.01'))
+
+
+def idempotency_cache_key(user_id, key):
+    # Keys are client-chosen; hash them so any header value makes a safe cache key
+    return f'orders:idempotency:v1:{user_id}:{hashlib.sha256(key.encode()).hexdigest()}'
+
+
+def get_cached_result(user_id, key):
+    return cache.get(idempotency_cache_key(user_id, key))
+
+
+def cache_result(user_id, key, payload):
+    cache.set(idempotency_cache_key(user_id, key), payload, getattr(settings, 'ORDER_IDEMPOTENCY_SECONDS', 86400))
+
+
+def find_order(user_id, key):
+    return Order.objects.with_details().filter(user_id=user_id, idempotency_key=key).first()
+
+
+def place_order(user_id, key, payment_mode):
+    """Turn the user's cart into an order. Returns (order, created).
+
+    One short transaction: the cart lines and then their products are locked, both in
+    product id order - every checkout takes its locks in the same order, so two sharing
+    products queue instead of deadlocking. Lines whose reservation was swept take their
+    stock now; the payment, order and items (one INSERT) are written and the cart is
+    emptied. A repeated key returns the order it already created; the unique constraint
+    on (user, key) settles two copies racing on different workers.
+    """
+    try:
+        with transaction.atomic():
+            lines = list(CartItem.objects.select_for_update().filter(user_id=user_id).order_by('product_id'))
+            # A duplicate of an in-flight checkout waits on the line locks, then finds its order here
+            existing = find_order(user_id, key)
+            if existing is not None:
+                return existing, False
+            if not lines:
+                raise EmptyCart()
+
+            products = {
+                product.pk: product
+                for product in Product.objects.select_for_update()
+                .filter(pk__in=[line.product_id for line in lines])
+                .order_by('pk')
+                .only('id', 'mrp', 'discount', 'available_stock')
+            }
+            take = {line.product_id: line.product_quantity for line in lines if not line.is_reserved}
+            unavailable = {
+                product_id: products[product_id].available_stock
+                for product_id, quantity in take.items()
+                if products[product_id].available_stock < quantity
+            }
+            if unavailable:
+                raise InsufficientStock(unavailable)
+            take_stock(take)
+
+            prices = {line.product_id: unit_price(products[line.product_id]) for line in lines}
+            total = sum(prices[line.product_id] * line.product_quantity for line in lines)
+            payment = Payment.objects.create(user_id=user_id, amount=total, payment_mode=payment_mode)
+            order = Order.objects.create(
+                user_id=user_id, total_amount=total, payment=payment, idempotency_key=key,
+                item_count=sum(line.product_quantity for line in lines),
+            )
+            OrderItem.objects.bulk_create([
+                OrderItem(order=order, product_id=line.product_id, product_quantity=line.product_quantity,
+                          price_at_order_time=prices[line.product_id])
+                for line in lines
+            ])
+            CartItem.objects.filter(pk__in=[line.pk for line in lines]).delete()
+        return order, True
+    except IntegrityError:
+        existing = find_order(user_id, key)
+        if existing is None:
+            raise
+        return existing, False
@@ -0,0 +1,149 @@
+import queue
+import random
+import threading
+import time
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand
+from django.db import OperationalError, connection
+from django.db.models import Sum
+
+from cart.models import CartItem
+from cart.reservations import InsufficientStock
+from orders.checkout import place_order
+from orders.models import Order, OrderItem, Payment
+from products.models import Product
+from userauth.models import CustomUser
+
+PREFIX = "bench-checkout"
+
+
+class Command(BaseCommand):
+    help = (
+        "Load-test checkout: many buyers in parallel threads ordering a few scarce products, "
+        "each order retried once with the same idempotency key. Reports orders/sec and checks "
+        "that no product was oversold and no retry created a second order. The synthetic "
+        "users, products and orders are deleted afterwards."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--buyers", type=int, default=200)
+        parser.add_argument("--orders-per-buyer", type=int, default=5)
+        parser.add_argument("--threads", type=int, default=16)
+        parser.add_argument("--products", type=int, default=10)
+        parser.add_argument("--stock", type=int, default=300, help="Starting stock of each product")
+        parser.add_argument("--seed", type=int, default=7)
+
+    def _seed(self, options):
+        products = Product.objects.bulk_create([
+            Product(product_type="tablet", name=f"Bench {i}", company="Bench", disease_category="Bench",
+                    mrp=Decimal("100.00"), discount=10, available_stock=options["stock"], slug=f"{PREFIX}-{i}")
+            for i in range(options["products"])
+        ])
+        users = CustomUser.objects.bulk_create(
+            CustomUser.objects.assign_user_uuids([
+                CustomUser(email=f"{PREFIX}-{i}@example.invalid", password="!")
+                for i in range(options["buyers"])
+            ])
+        )
+        return [product.pk for product in products], [user.pk for user in users]
+
+    def _cleanup(self, product_ids, user_ids):
+        payment_ids = list(Order.objects.filter(user_id__in=user_ids).values_list("payment_id", flat=True))
+        OrderItem.objects.filter(order__user_id__in=user_ids).delete()
+        Order.objects.filter(user_id__in=user_ids).delete()
+        Payment.objects.filter(pk__in=payment_ids).delete()
+        CartItem.objects.filter(user_id__in=user_ids).delete()
+        CustomUser.objects.filter(pk__in=user_ids).delete()
+        Product.objects.filter(pk__in=product_ids).delete()
+
+    def _checkout(self, user_id, key, product_ids, rng):
+        # Lines as they'd be once the reservation lapsed, so checkout itself takes the stock
+        lines = [
+            CartItem(user_id=user_id, product_id=product_id, product_quantity=rng.randint(1, 3))
+            for product_id in rng.sample(product_ids, rng.randint(1, min(3, len(product_ids))))
+        ]
+        CartItem.objects.filter(user_id=user_id).delete()
+        CartItem.objects.bulk_create(lines)
+        try:
+            order, _ = place_order(user_id, key, "upi")
+        except InsufficientStock:
+            return "out of stock"
+        replayed, created = place_order(user_id, key, "upi")
+        return "duplicate" if created or replayed.pk != order.pk else "placed"
+
+    def _buy(self, buyers, options, product_ids, stats, lock, seed):
+        rng = random.Random(seed)
+        try:
+            while True:
+                try:
+                    user_id = buyers.get_nowait()
+                except queue.Empty:
+                    return
+                for n in range(options["orders_per_buyer"]):
+                    outcome = None
+                    while outcome is None:
+                        try:
+                            outcome = self._checkout(user_id, f"{PREFIX}-{n}", product_ids, rng)
+                        except OperationalError:
+                            # SQLite allows one writer at a time; PostgreSQL waits on the row locks instead
+                            with lock:
+                                stats["retries"] += 1
+                            time.sleep(rng.uniform(0, 0.02))
+                    with lock:
+                        stats[outcome] += 1
+        finally:
+            connection.close()
+
+    def handle(self, *args, **options):
+        product_ids, user_ids = self._seed(options)
+        try:
+            # Each buyer checks out one order after another, buyers run in parallel
+            buyers = queue.Queue()
+            for user_id in user_ids:
+                buyers.put(user_id)
+            total = len(user_ids) * options["orders_per_buyer"]
+            stats = {"placed": 0, "out of stock": 0, "duplicate": 0, "retries": 0}
+            lock = threading.Lock()
+
+            workers = [
+                threading.Thread(
+                    target=self._buy, args=(buyers, options, product_ids, stats, lock, options["seed"] + i)
+                )
+                for i in range(options["threads"])
+            ]
+            started = time.perf_counter()
+            for worker in workers:
+                worker.start()
+            for worker in workers:
+                worker.join()
+            elapsed = time.perf_counter() - started
+
+            sold = dict(
+                OrderItem.objects.filter(product_id__in=product_ids)
+                .values_list("product_id").annotate(total=Sum("product_quantity"))
+            )
+            remaining = dict(Product.objects.filter(pk__in=product_ids).values_list("id", "available_stock"))
+            oversold = [
+                product_id for product_id in product_ids
+                if sold.get(product_id, 0) + remaining[product_id] != options["stock"]
+            ]
+            orders = Order.objects.filter(user_id__in=user_ids).count()
+        finally:
+            self._cleanup(product_ids, user_ids)
+
+        self.stdout.write(
+            f"{total} checkouts in {elapsed:.2f}s with {options['threads']} threads: "
+            f"{stats['placed'] / elapsed:.0f} orders/sec"
+        )
+        self.stdout.write(
+            f"placed {stats['placed']}, out of stock {stats['out of stock']}, "
+            f"lock retries {stats['retries']}, units sold {sum(sold.values())}, "
+            f"units left {sum(remaining.values())}"
+        )
+        ok = not oversold and not stats["duplicate"] and orders == stats["placed"]
+        style = self.style.SUCCESS if ok else self.style.ERROR
+        self.stdout.write(style(
+            f"oversold products: {len(oversold)}, duplicate orders from retries: {stats['duplicate']}, "
+            f"orders in database: {orders}"
+        ))
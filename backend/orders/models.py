@@ -0,0 +1,105 @@
+from django.conf import settings
+from django.db import models
+
+from products.models import Product
+
+# Columns the history list needs: the order row and its payment, never order_item
+SUMMARY_FIELDS = (
+    'id', 'order_status', 'order_date', 'total_amount', 'item_count',
+    'payment__id', 'payment__payment_mode', 'payment__payment_status',
+)
+
+
+def detail_prefetches():
+    # Items with their products in one query, deliveries in another, for any number of orders
+    return [
+        models.Prefetch(
+            'items',
+            queryset=OrderItem.objects.select_related('product')
+            .only('id', 'order_id', 'product_quantity', 'price_at_order_time',
+                  'product__id', 'product__name', 'product__slug')
+            .order_by('id'),
+        ),
+        models.Prefetch('deliveries', queryset=Delivery.objects.order_by('id')),
+    ]
+
+
+class OrderManager(models.Manager):
+    def for_history(self, user_id):
+        return self.filter(user_id=user_id).select_related('payment').only(*SUMMARY_FIELDS)
+
+    def with_details(self):
+        return self.select_related('payment').prefetch_related(*detail_prefetches())
+
+
+class Payment(models.Model):
+    MODE_CHOICES = [('upi', 'UPI'), ('card', 'Card'), ('cod', 'Cash on delivery')]
+    STATUS_CHOICES = [('pending', 'Pending'), ('success', 'Success'), ('failed', 'Failed')]
+
+    # Orders and payments outlive a purged account, detached from it
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.SET_NULL, null=True, related_name='payments')
+    amount = models.DecimalField(max_digits=12, decimal_places=2)
+    payment_mode = models.CharField(max_length=10, choices=MODE_CHOICES)
+    payment_status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='pending')
+    payment_date = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f'{self.payment_mode} {self.amount} ({self.payment_status})'
+
+
+class Order(models.Model):
+    STATUS_CHOICES = [
+        ('pending', 'Pending'),
+        ('confirmed', 'Confirmed'),
+        ('shipped', 'Shipped'),
+        ('delivered', 'Delivered'),
+        ('cancelled', 'Cancelled'),
+    ]
+
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.SET_NULL, null=True, related_name='orders')
+    total_amount = models.DecimalField(max_digits=12, decimal_places=2)
+    payment = models.OneToOneField(Payment, on_delete=models.PROTECT, related_name='order')
+    order_date = models.DateTimeField(auto_now_add=True)
+    order_status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='confirmed')
+    # Client-chosen key from the Idempotency-Key header; a retried checkout finds its order by it
+    idempotency_key = models.CharField(max_length=64)
+    # Units across all items, written with the order so the history list never reads order_item
+    item_count = models.PositiveIntegerField(default=0)
+
+    objects = OrderManager()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'idempotency_key'], name='order_user_idempotency_uniq'),
+        ]
+        indexes = [
+            # Order history pages are range scans on this, newest first
+            models.Index(fields=['user', '-order_date', '-id'], name='order_user_history_idx'),
+        ]
+
+    def __str__(self):
+        return f'Order {self.pk}'
+
+
+class OrderItem(models.Model):
+    order = models.ForeignKey(Order, on_delete=models.CASCADE, related_name='items')
+    product = models.ForeignKey(Product, on_delete=models.PROTECT, related_name='+')
+    product_quantity = models.PositiveIntegerField()
+    price_at_order_time = models.DecimalField(max_digits=10, decimal_places=2)  # unit price after discount
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['order', 'product'], name='order_item_order_product_uniq'),
+        ]
+
+    def __str__(self):
+        return f'{self.product_quantity} x {self.product_id}'
+
+
+class Delivery(models.Model):
+    order = models.ForeignKey(Order, on_delete=models.CASCADE, related_name='deliveries')
+    delivery_vendor = models.CharField(max_length=100)
+    delivery_date = models.DateTimeField(null=True, blank=True)
+
+    def __str__(self):
+        return f'{self.delivery_vendor} for order {self.order_id}'
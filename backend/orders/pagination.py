@@ -0,0 +1,80 @@
+import base64
+
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+
+class OrderHistoryPagination(BasePagination):
+    """Keyset pagination on (order_date, id), newest first.
+
+    The cursor is the last row's (order_date, id), and the next page is the rows
+    before it, read straight off order_user_history_idx: page 500 costs the same as
+    page 1, and there's no COUNT(*). Only forward ("load more") cursors are issued.
+    """
+
+    page_size = 20
+    max_page_size = 100
+    page_size_query_param = 'page_size'
+    cursor_query_param = 'cursor'
+
+    def get_page_size(self, request):
+        try:
+            size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        return min(max(size, 1), self.max_page_size)
+
+    def decode_cursor(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None
+        try:
+            order_date, pk = base64.urlsafe_b64decode(encoded.encode()).decode().rsplit('|', 1)
+            order_date, pk = parse_datetime(order_date), int(pk)
+        except (TypeError, ValueError):
+            raise NotFound('Invalid cursor')
+        if order_date is None:
+            raise NotFound('Invalid cursor')
+        return order_date, pk
+
+    def encode_cursor(self, order):
+        return base64.urlsafe_b64encode(f'{order.order_date.isoformat()}|{order.pk}'.encode()).decode()
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        limit = self.get_page_size(request)
+        queryset = queryset.order_by('-order_date', '-id')
+        cursor = self.decode_cursor(request)
+        if cursor is not None:
+            order_date, pk = cursor
+            # The `lte` bound is the index range; the OR only breaks ties on order_date
+            queryset = queryset.filter(
+                Q(order_date__lte=order_date) & (Q(order_date__lt=order_date) | Q(pk__lt=pk))
+            )
+        rows = list(queryset[:limit + 1])
+        page = rows[:limit]
+        self.next_order = page[-1] if len(rows) > limit else None
+        return page
+
+    def get_next_link(self):
+        if self.next_order is None:
+            return None
+        url = self.request.build_absolute_uri()
+        return replace_query_param(url, self.cursor_query_param, self.encode_cursor(self.next_order))
+
+    def get_paginated_response(self, data):
+        return Response({'next': self.get_next_link(), 'results': data})
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'required': ['results'],
+            'properties': {
+                'next': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'results': schema,
+            },
+        }
@@ -0,0 +1,66 @@
+from rest_framework import serializers
+from .models import Delivery, Order, OrderItem, Payment
+
+
+class CheckoutSerializer(serializers.Serializer):
+    payment_mode = serializers.CharField()
+
+    def validate_payment_mode(self, value):
+        # The checkout page sends "UPI" / "COD"
+        value = value.lower()
+        if value not in dict(Payment.MODE_CHOICES):
+            raise serializers.ValidationError("Unknown payment mode.")
+        return value
+
+
+class PaymentSerializer(serializers.ModelSerializer):
+    payment_id = serializers.IntegerField(source='id', read_only=True)
+
+    class Meta:
+        model = Payment
+        fields = ['payment_id', 'amount', 'payment_mode', 'payment_status', 'payment_date']
+
+
+class OrderItemSerializer(serializers.ModelSerializer):
+    product_id = serializers.IntegerField(read_only=True)
+    product_slug = serializers.CharField(source='product.slug', read_only=True)
+    name = serializers.CharField(source='product.name', read_only=True)
+
+    class Meta:
+        model = OrderItem
+        fields = ['product_id', 'product_slug', 'name', 'product_quantity', 'price_at_order_time']
+
+
+class DeliverySerializer(serializers.ModelSerializer):
+    delivery_id = serializers.IntegerField(source='id', read_only=True)
+
+    class Meta:
+        model = Delivery
+        fields = ['delivery_id', 'delivery_vendor', 'delivery_date']
+
+
+class OrderSummarySerializer(serializers.ModelSerializer):
+    """A history row, from the order and its payment alone (see Order.objects.for_history)."""
+
+    order_id = serializers.IntegerField(source='id', read_only=True)
+    payment_mode = serializers.CharField(source='payment.payment_mode', read_only=True)
+    payment_status = serializers.CharField(source='payment.payment_status', read_only=True)
+
+    class Meta:
+        model = Order
+        fields = ['order_id', 'order_status', 'order_date', 'total_amount', 'item_count',
+                  'payment_mode', 'payment_status']
+
+
+class OrderSerializer(serializers.ModelSerializer):
+    """The full order; expects the prefetches from Order.objects.with_details()."""
+
+    order_id = serializers.IntegerField(source='id', read_only=True)
+    payment = PaymentSerializer(read_only=True)
+    items = OrderItemSerializer(many=True, read_only=True)
+    deliveries = DeliverySerializer(many=True, read_only=True)
+
+    class Meta:
+        model = Order
+        fields = ['order_id', 'order_status', 'order_date', 'total_amount', 'item_count', 'payment',
+                  'items', 'deliveries']
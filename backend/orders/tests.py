@@ -0,0 +1,284 @@
+import random
+import threading
+import time
+from decimal import Decimal
+
+from django.core.cache import cache
+from django.db import OperationalError, connection
+from django.test import TestCase, TransactionTestCase
+from django.utils import timezone
+
+from cart.models import CartItem
+from cart.reservations import InsufficientStock
+from products.models import Product
+from userauth.authentication import validated_users
+from userauth.last_login import last_login_recorder
+from userauth.models import CustomUser
+from userauth.throttles import throttle_cache
+from userprofile.activity import activity_tracker
+from .checkout import place_order
+from .models import Delivery, Order, OrderItem, Payment
+
+
+def make_product(slug, stock, mrp="100.00", discount=0):
+    return Product.objects.create(
+        product_type="tablet", name=slug, company="Cipla", disease_category="Fever & Pain",
+        mrp=Decimal(mrp), discount=discount, available_stock=stock, slug=slug,
+    )
+
+
+def stock(product):
+    return Product.objects.values_list("available_stock", flat=True).get(pk=product.pk)
+
+
+class CheckoutTests(TestCase):
+    email = "buyer@example.com"
+    password = "S3cure-pass!"
+
+    def setUp(self):
+        cache.clear()
+        throttle_cache.clear()
+        validated_users.clear()
+        self.addCleanup(last_login_recorder.flush)
+        self.addCleanup(activity_tracker.flush)
+        self.user = CustomUser.objects.create_user(email=self.email, password=self.password)
+        response = self.client.post(
+            "/api/login/", {"email": self.email, "password": self.password}, content_type="application/json"
+        )
+        self.auth = {"HTTP_AUTHORIZATION": "Bearer " + response.json()["access"]}
+        self.a = make_product("a", 10, mrp="120.00", discount=25)
+        self.b = make_product("b", 5, mrp="40.50")
+
+    def fill_cart(self):
+        # `a` is reserved through the cart API, `b` is a line whose reservation was swept
+        self.client.post(
+            "/api/cart/", {"items": [{"product_id": self.a.pk, "quantity": 2}]},
+            content_type="application/json", **self.auth,
+        )
+        CartItem.objects.create(user=self.user, product=self.b, product_quantity=3)
+
+    def checkout(self, key="order-1", payment_mode="UPI"):
+        headers = dict(self.auth, HTTP_IDEMPOTENCY_KEY=key) if key else self.auth
+        return self.client.post(
+            "/api/orders/checkout/", {"payment_mode": payment_mode}, content_type="application/json", **headers
+        )
+
+    def test_places_order_from_cart(self):
+        self.fill_cart()
+        response = self.checkout()
+        self.assertEqual(response.status_code, 201)
+        data = response.json()
+        self.assertEqual(data["total_amount"], "301.50")  # 2 x 90.00 + 3 x 40.50
+        self.assertEqual(data["item_count"], 5)
+        self.assertEqual(data["order_status"], "confirmed")
+        self.assertEqual(data["payment"]["payment_mode"], "upi")
+        self.assertEqual(data["payment"]["amount"], "301.50")
+        self.assertEqual(
+            {(item["name"], item["product_quantity"], item["price_at_order_time"]) for item in data["items"]},
+            {("a", 2, "90.00"), ("b", 3, "40.50")},
+        )
+        # The reserved line's stock was already taken; only the swept one is taken now
+        self.assertEqual((stock(self.a), stock(self.b)), (8, 2))
+        self.assertFalse(CartItem.objects.exists())
+
+    def test_retry_returns_the_same_order(self):
+        self.fill_cart()
+        first = self.checkout().json()
+        retry = self.checkout()
+        self.assertEqual(retry.status_code, 201)
+        self.assertEqual(retry["Idempotent-Replayed"], "true")
+        self.assertEqual(retry.json(), first)
+
+        # Past the cache, the order is still found by its key
+        cache.clear()
+        throttle_cache.clear()
+        self.assertEqual(self.checkout().json()["order_id"], first["order_id"])
+        self.assertEqual((Order.objects.count(), Payment.objects.count()), (1, 1))
+        self.assertEqual((stock(self.a), stock(self.b)), (8, 2))
+
+        # A new key is a new checkout, and the cart is empty now
+        self.assertEqual(self.checkout(key="order-2").status_code, 400)
+
+    def test_checkout_queries(self):
+        self.fill_cart()
+        self.client.get("/api/cart/", **self.auth)  # warm the JWT user check
+        # Lock lines, key lookup, lock products, stock UPDATE, payment, order, items, cart DELETE,
+        # items and deliveries for the response, plus the transaction's savepoint
+        with self.assertNumQueries(12):
+            self.assertEqual(self.checkout().status_code, 201)
+        with self.assertNumQueries(0):
+            self.checkout()
+
+    def test_insufficient_stock_changes_nothing(self):
+        self.fill_cart()
+        Product.objects.filter(pk=self.b.pk).update(available_stock=1)
+        response = self.checkout()
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(response.json()["unavailable"], [{"product_id": self.b.pk, "available_stock": 1}])
+        self.assertEqual((stock(self.a), stock(self.b)), (8, 1))
+        self.assertEqual(CartItem.objects.count(), 2)
+        self.assertFalse(Order.objects.exists())
+
+        # The failure wasn't remembered: the same key works once the cart is fixed
+        Product.objects.filter(pk=self.b.pk).update(available_stock=3)
+        self.assertEqual(self.checkout().status_code, 201)
+
+    def test_rejects_bad_requests(self):
+        self.fill_cart()
+        self.assertEqual(self.checkout(key=None).status_code, 400)
+        self.assertEqual(self.checkout(key="k" * 65).status_code, 400)
+        self.assertEqual(self.checkout(payment_mode="cheque").status_code, 400)
+        self.assertEqual(self.checkout(payment_mode="COD").status_code, 201)
+        self.assertEqual(CartItem.objects.count(), 0)
+
+
+class OrderHistoryTests(TestCase):
+    email = "history@example.com"
+    password = "S3cure-pass!"
+
+    def setUp(self):
+        cache.clear()
+        throttle_cache.clear()
+        validated_users.clear()
+        self.addCleanup(last_login_recorder.flush)
+        self.addCleanup(activity_tracker.flush)
+        self.user = CustomUser.objects.create_user(email=self.email, password=self.password)
+        response = self.client.post(
+            "/api/login/", {"email": self.email, "password": self.password}, content_type="application/json"
+        )
+        self.auth = {"HTTP_AUTHORIZATION": "Bearer " + response.json()["access"]}
+        self.products = [make_product(f"p{i}", 100) for i in range(3)]
+        # Another user's orders must never show up
+        other = CustomUser.objects.create_user_with_hash(email="other@example.com", password_hash="!")
+        self.make_orders(3, user=other)
+
+    def make_orders(self, count, user=None, order_date=None):
+        user = user or self.user
+        payments = Payment.objects.bulk_create(
+            Payment(user=user, amount=Decimal("30.00"), payment_mode="upi") for _ in range(count)
+        )
+        orders = Order.objects.bulk_create(
+            Order(user=user, payment=payment, total_amount=Decimal("30.00"), item_count=3,
+                  idempotency_key=f"k{payment.pk}")
+            for payment in payments
+        )
+        if order_date is not None:
+            Order.objects.filter(pk__in=[order.pk for order in orders]).update(order_date=order_date)
+        OrderItem.objects.bulk_create(
+            OrderItem(order=order, product=product, product_quantity=1, price_at_order_time=Decimal("10.00"))
+            for order in orders for product in self.products
+        )
+        Delivery.objects.bulk_create(Delivery(order=order, delivery_vendor="Shiprocket") for order in orders)
+        return orders
+
+    def get(self, url="/api/orders/"):
+        return self.client.get(url, **self.auth)
+
+    def assert_history_queries(self, page_size):
+        self.get()  # warm the JWT user check
+        with self.assertNumQueries(1):
+            response = self.get(f"/api/orders/?page_size={page_size}")
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    def test_one_query_per_page_at_1_or_1000_orders(self):
+        self.make_orders(1)
+        data = self.assert_history_queries(100)
+        self.assertEqual(len(data["results"]), 1)
+        self.assertIsNone(data["next"])
+        self.assertEqual(data["results"][0]["item_count"], 3)
+        self.assertEqual(data["results"][0]["payment_mode"], "upi")
+
+        self.make_orders(999)
+        data = self.assert_history_queries(100)
+        self.assertEqual(len(data["results"]), 100)
+        self.assertIsNotNone(data["next"])
+        with self.assertNumQueries(1):
+            self.client.get(data["next"], **self.auth)
+
+    def test_pages_walk_every_order_once_newest_first(self):
+        older = self.make_orders(5, order_date=timezone.now() - timezone.timedelta(days=2))
+        # Orders sharing an order_date are ordered, and split across pages, by id
+        tied = self.make_orders(7, order_date=timezone.now() - timezone.timedelta(days=1))
+        newest = self.make_orders(2)
+
+        seen, url = [], "/api/orders/?page_size=3"
+        while url:
+            data = self.get(url).json()
+            seen += [order["order_id"] for order in data["results"]]
+            url = data["next"]
+        expected = [o.pk for o in reversed(newest)] + [o.pk for o in reversed(tied)] + [o.pk for o in reversed(older)]
+        self.assertEqual(seen, expected)
+
+    def test_invalid_cursor(self):
+        self.assertEqual(self.get("/api/orders/?cursor=bm9wZQ==").status_code, 404)
+
+    def test_detail_queries_are_fixed(self):
+        order = self.make_orders(1)[0]
+        self.get()
+        # Order + payment, items + products, deliveries
+        with self.assertNumQueries(3):
+            response = self.get(f"/api/orders/{order.pk}/")
+        data = response.json()
+        self.assertEqual([item["product_slug"] for item in data["items"]], ["p0", "p1", "p2"])
+        self.assertEqual(data["deliveries"][0]["delivery_vendor"], "Shiprocket")
+
+        other_order = Order.objects.exclude(user=self.user).first()
+        self.assertEqual(self.get(f"/api/orders/{other_order.pk}/").status_code, 404)
+
+
+class ConcurrentCheckoutTests(TransactionTestCase):
+    def run_threads(self, jobs):
+        results = []
+        start = threading.Barrier(len(jobs))
+
+        def run(job):
+            start.wait()
+            try:
+                while True:
+                    try:
+                        results.append(job())
+                        return
+                    except InsufficientStock:
+                        results.append(None)
+                        return
+                    except OperationalError:
+                        # SQLite allows one writer at a time; PostgreSQL just waits on the row locks
+                        time.sleep(random.uniform(0, 0.02))  # back off, or the threads can livelock
+            finally:
+                connection.close()
+
+        workers = [threading.Thread(target=run, args=(job,)) for job in jobs]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+        return results
+
+    def buyer(self, i):
+        return CustomUser.objects.create_user_with_hash(email=f"buyer{i}@example.com", password_hash="!")
+
+    def test_duplicate_submits_create_one_order(self):
+        user = self.buyer(0)
+        product = make_product("p", 10)
+        CartItem.objects.create(user=user, product=product, product_quantity=2)
+
+        results = self.run_threads([lambda: place_order(user.pk, "same-key", "cod")] * 8)
+        self.assertEqual(len({order.pk for order, _ in results}), 1)
+        self.assertEqual(sum(created for _, created in results), 1)
+        self.assertEqual(Order.objects.count(), 1)
+        self.assertEqual(stock(product), 8)
+
+    def test_scarce_stock_is_never_oversold(self):
+        a, b = make_product("a", 5), make_product("b", 5)
+        users = [self.buyer(i) for i in range(12)]
+        for user in users:
+            # Every cart holds both products, in either order, so lock order matters
+            CartItem.objects.create(user=user, product=a if user.pk % 2 else b, product_quantity=1)
+            CartItem.objects.create(user=user, product=b if user.pk % 2 else a, product_quantity=1)
+
+        results = self.run_threads([lambda user=user: place_order(user.pk, "k", "upi") for user in users])
+        placed = [result for result in results if result is not None]
+        self.assertEqual(len(placed), 5)
+        self.assertEqual((stock(a), stock(b)), (0, 0))
+        self.assertEqual(OrderItem.objects.filter(product=a).count(), 5)
@@ -0,0 +1,8 @@
+from django.urls import path
+from .views import *
+
+urlpatterns = [
+    path('orders/', OrderHistoryView.as_view(), name='order-history'),
+    path('orders/<int:order_id>/', OrderDetailView.as_view(), name='order-detail'),
+    path('orders/checkout/', CheckoutView.as_view(), name='checkout'),
+]
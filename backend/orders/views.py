@@ -0,0 +1,77 @@
+from django.db.models import prefetch_related_objects
+from django.shortcuts import get_object_or_404
+from rest_framework import status
+from rest_framework.generics import ListAPIView
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from cart.reservations import InsufficientStock
+from .checkout import EmptyCart, cache_result, get_cached_result, place_order
+from .models import Order, detail_prefetches
+from .pagination import OrderHistoryPagination
+from .serializers import CheckoutSerializer, OrderSerializer, OrderSummarySerializer
+
+
+class OrderHistoryView(ListAPIView):
+    """The user's orders, newest first: one query per page however many orders they have."""
+
+    permission_classes = [IsAuthenticated]
+    serializer_class = OrderSummarySerializer
+    pagination_class = OrderHistoryPagination
+    filter_backends = []
+
+    def get_queryset(self):
+        return Order.objects.for_history(self.request.user.pk)
+
+
+class OrderDetailView(APIView):
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request, order_id):
+        order = get_object_or_404(Order.objects.with_details(), pk=order_id, user_id=request.user.pk)
+        return Response(OrderSerializer(order).data)
+
+
+class CheckoutView(APIView):
+    """Place an order from the server-side cart.
+
+    Requires an Idempotency-Key header. A retry with the same key (a double click, a
+    timed-out request) gets the original order back instead of a second one. Failures
+    aren't remembered, so the same key can be retried after fixing the cart.
+    """
+    permission_classes = [IsAuthenticated]
+
+    def post(self, request):
+        key = request.headers.get('Idempotency-Key', '').strip()
+        if not key or len(key) > 64:
+            return Response({"error": "An Idempotency-Key header (up to 64 characters) is required."},
+                            status=status.HTTP_400_BAD_REQUEST)
+
+        payload = get_cached_result(request.user.pk, key)
+        if payload is None:
+            serializer = CheckoutSerializer(data=request.data)
+            if not serializer.is_valid():
+                return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+            try:
+                order, created = place_order(request.user.pk, key, serializer.validated_data['payment_mode'])
+            except EmptyCart:
+                return Response({"error": "Your cart is empty."}, status=status.HTTP_400_BAD_REQUEST)
+            except InsufficientStock as e:
+                return Response({
+                    "error": "Not enough stock for some items.",
+                    "unavailable": [
+                        {"product_id": product_id, "available_stock": available}
+                        for product_id, available in e.unavailable.items()
+                    ],
+                }, status=status.HTTP_409_CONFLICT)
+            if created:
+                prefetch_related_objects([order], *detail_prefetches())
+            payload = OrderSerializer(order).data
+            cache_result(request.user.pk, key, payload)
+            if created:
+                return Response(payload, status=status.HTTP_201_CREATED)
+
+        response = Response(payload, status=status.HTTP_201_CREATED)
+        response['Idempotent-Replayed'] = 'true'
+        return response
@@ -0,0 +1,16 @@
+from django.contrib import admin
+from .models import Product, ProductImage
+
+
+class ProductImageInline(admin.TabularInline):
+    model = ProductImage
+    extra = 1
+
+
+@admin.register(Product)
+class ProductAdmin(admin.ModelAdmin):
+    list_display = ('name', 'company', 'disease_category', 'product_type', 'mrp', 'available_stock', 'trending')
+    list_filter = ('trending', 'product_type', 'disease_category')
+    search_fields = ('name', 'company', 'slug')
+    prepopulated_fields = {'slug': ('name',)}
+    inlines = [ProductImageInline]
@@ -0,0 +1,75 @@
+from django.conf import settings
+from django.core.cache import cache
+
+from backend.routers import primary_reads
+from .models import Product
+from .related import fallback_related_ids
+from .serializers import ProductDetailSerializer, ProductListSerializer
+
+GENERATION_KEY = 'products:detail:generation'
+
+
+def _generation():
+    return cache.get_or_set(GENERATION_KEY, 1, timeout=None)
+
+
+def detail_cache_key(slug, generation=None):
+    return f'product:detail:v1:{generation or _generation()}:{slug}'
+
+
+def build_product_detail(product):
+    related_ids = product.related_ids or fallback_related_ids(product)
+    related = Product.objects.for_listing().in_bulk(related_ids)
+    return {
+        'product': ProductDetailSerializer(product).data,
+        'related': ProductListSerializer([related[pk] for pk in related_ids if pk in related], many=True).data,
+    }
+
+
+def _overlay_stock(payload, slug):
+    """Copy current stock into a cached payload; False if the product is gone or renamed."""
+    product = payload['product']
+    ids = [product['product_id']] + [item['product_id'] for item in payload['related']]
+    current = {
+        pk: (row_slug, stock)
+        for pk, row_slug, stock in Product.objects.filter(pk__in=ids).values_list('id', 'slug', 'available_stock')
+    }
+    if current.get(product['product_id'], (None,))[0] != slug:
+        return False
+    product['available_stock'] = current[product['product_id']][1]
+    payload['related'] = [item for item in payload['related'] if item['product_id'] in current]
+    for item in payload['related']:
+        item['available_stock'] = current[item['product_id']][1]
+    return True
+
+
+def get_product_detail(slug):
+    """Detail payload for a slug: rendered once and cached, with stock always read fresh.
+
+    A cache hit is a single query (stock for the product and its related items);
+    stock never invalidates the entry, only catalog edits do.
+    """
+    key = detail_cache_key(slug)
+    payload = cache.get(key)
+    if payload is not None:
+        if _overlay_stock(payload, slug):
+            return payload
+        cache.delete(key)
+
+    # Shared for an hour, so build it from the primary rather than a possibly lagging replica
+    with primary_reads():
+        product = Product.objects.prefetch_related('images').filter(slug=slug).first()
+        if product is None:
+            return None
+        payload = build_product_detail(product)
+    cache.set(key, payload, timeout=getattr(settings, 'PRODUCT_DETAIL_CACHE_SECONDS', 3600))
+    return payload
+
+
+def invalidate_product_details():
+    # Payloads embed related products, so a catalog edit retires every cached detail at once
+    cache.add(GENERATION_KEY, 1, timeout=None)
+    try:
+        cache.incr(GENERATION_KEY)
+    except ValueError:
+        cache.set(GENERATION_KEY, 2, timeout=None)
@@ -0,0 +1,117 @@
+import random
+import statistics
+import time
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from products.models import Product
+from products.search import search_backend, search_index, search_product_ids
+
+STEMS = ["para", "ceti", "amoxi", "ome", "azi", "metfor", "ator", "losar", "ibu", "diclo", "panto",
+         "levo", "monte", "doxy", "cipro", "glime", "telmi", "rosu", "ondan", "ranit"]
+ENDINGS = ["cetamol", "rizine", "cillin", "prazole", "thromycin", "min", "vastatin", "tan", "profen",
+           "fenac", "floxacin", "lukast", "cycline", "piride", "sartan", "setron", "tidine"]
+FORMS = ["Tablets", "Capsules", "Syrup", "Gel", "Drops", "Injection"]
+COMPANIES = ["Cipla", "Sun Pharma", "Dr Reddys", "Lupin", "Zydus Cadila", "Mankind", "Torrent",
+             "Alkem", "Glenmark", "Abbott", "GSK", "Pfizer"]
+CATEGORIES = ["Fever & Pain", "Allergy & Cold", "Antibiotics", "Digestive Health", "Diabetes",
+              "Heart Care", "Skin Care", "Respiratory", "Vitamins", "Bone & Joint"]
+
+
+class _Rollback(Exception):
+    pass
+
+
+def _percentile(samples, pct):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))]
+
+
+def _typo(word, rng):
+    i = rng.randrange(1, len(word) - 1)
+    return word[:i] + word[i + 1:]
+
+
+class Command(BaseCommand):
+    help = (
+        "Seed a synthetic catalog (rolled back afterwards) and measure end-to-end search "
+        "latency - ranking plus loading the result rows - for exact, prefix and misspelled queries."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--products", type=int, default=100_000)
+        parser.add_argument("--queries", type=int, default=300)
+        parser.add_argument("--limit", type=int, default=20)
+        parser.add_argument("--seed", type=int, default=7)
+
+    def _seed(self, count, rng):
+        batch = []
+        for i in range(count):
+            name = f"{rng.choice(STEMS)}{rng.choice(ENDINGS)}".capitalize()
+            batch.append(Product(
+                product_type=rng.choice(FORMS).lower(),
+                trending=rng.random() < 0.1,
+                name=f"{name} {rng.choice([5, 10, 20, 250, 500, 650])}mg {rng.choice(FORMS)}",
+                company=rng.choice(COMPANIES),
+                disease_category=rng.choice(CATEGORIES),
+                mrp=Decimal(rng.randrange(1000, 100000)) / 100,
+                discount=rng.randrange(0, 40),
+                available_stock=rng.randrange(0, 500),
+                slug=f"bench-search-{i}",
+            ))
+            if len(batch) == 5000:
+                Product.objects.bulk_create(batch)
+                batch = []
+        Product.objects.bulk_create(batch)
+
+    def _queries(self, count, rng):
+        queries = []
+        for _ in range(count):
+            word = f"{rng.choice(STEMS)}{rng.choice(ENDINGS)}"
+            kind = rng.choice(["exact", "prefix", "typo", "with company"])
+            if kind == "prefix":
+                word = word[:max(3, len(word) // 2)]
+            elif kind == "typo":
+                word = _typo(word, rng)
+            elif kind == "with company":
+                word = f"{word} {rng.choice(COMPANIES)}"
+            queries.append(word)
+        return queries
+
+    def handle(self, *args, **options):
+        rng = random.Random(options["seed"])
+        queries = self._queries(options["queries"], rng)
+        timings, hits = [], 0
+        try:
+            with transaction.atomic():
+                started = time.perf_counter()
+                self._seed(options["products"], rng)
+                self.stdout.write(f"Seeded {options['products']} products in {time.perf_counter() - started:.1f}s")
+                if search_backend() == "memory":
+                    started = time.perf_counter()
+                    search_index.rebuild()
+                    self.stdout.write(f"Built in-process index in {time.perf_counter() - started:.2f}s")
+
+                for query in queries:
+                    started = time.perf_counter()
+                    ids = search_product_ids(query, options["limit"])
+                    list(Product.objects.for_listing().filter(pk__in=ids))
+                    timings.append((time.perf_counter() - started) * 1000)
+                    hits += bool(ids)
+                raise _Rollback()
+        except _Rollback:
+            pass
+        if search_backend() == "memory":
+            # The index was built from rows that were just rolled back
+            search_index.rebuild()
+
+        p99 = _percentile(timings, 99)
+        self.stdout.write(f"backend: {search_backend()}, {len(queries)} queries, {hits} with results")
+        self.stdout.write(
+            f"p50 {statistics.median(timings):.1f} ms  p95 {_percentile(timings, 95):.1f} ms  "
+            f"p99 {p99:.1f} ms  max {max(timings):.1f} ms"
+        )
+        style = self.style.SUCCESS if p99 < 50 else self.style.ERROR
+        self.stdout.write(style(f"p99 {'under' if p99 < 50 else 'over'} the 50 ms budget"))
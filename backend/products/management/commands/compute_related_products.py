@@ -0,0 +1,26 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from products.cache import invalidate_product_details
+from products.related import refresh_related_products
+
+
+class Command(BaseCommand):
+    help = (
+        "Precompute the ordered related-products list of every product (same disease "
+        "category, then company/type affinity). Run after catalog imports or nightly."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=1000, help="Rows per bulk UPDATE")
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        changed = refresh_related_products(batch_size=options["batch_size"])
+        if changed:
+            # bulk_update sends no signals; cached detail payloads embed the old lists
+            invalidate_product_details()
+        self.stdout.write(self.style.SUCCESS(
+            f"Updated related products for {changed} product(s) in {time.perf_counter() - started:.1f}s"
+        ))
@@ -0,0 +1,48 @@
+# Generated by Django 5.2.5 on 2026-10-18 17:40
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Product',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('product_type', models.CharField(max_length=50)),
+                ('trending', models.BooleanField(default=False)),
+                ('name', models.CharField(max_length=200)),
+                ('company', models.CharField(max_length=100)),
+                ('disease_category', models.CharField(max_length=100)),
+                ('mrp', models.DecimalField(decimal_places=2, max_digits=10)),
+                ('discount', models.PositiveSmallIntegerField(default=0)),
+                ('available_stock', models.PositiveIntegerField(default=0)),
+                ('slug', models.SlugField(max_length=200, unique=True)),
+                ('description', models.TextField(blank=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['disease_category', '-id'], name='product_category_idx'), models.Index(fields=['company', '-id'], name='product_company_idx'), models.Index(fields=['product_type', '-id'], name='product_type_idx'), models.Index(fields=['disease_category', 'product_type', '-id'], name='product_category_type_idx'), models.Index(condition=models.Q(('trending', True)), fields=['-id'], name='product_trending_idx')],
+            },
+        ),
+        migrations.CreateModel(
+            name='ProductImage',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('url', models.CharField(max_length=500)),
+                ('position', models.PositiveSmallIntegerField(default=0)),
+                ('product', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='images', to='products.product')),
+            ],
+            options={
+                'ordering': ['position'],
+                'constraints': [models.UniqueConstraint(fields=('product', 'position'), name='product_image_position_uniq')],
+            },
+        ),
+    ]
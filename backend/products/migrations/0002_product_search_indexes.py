@@ -0,0 +1,40 @@
+from django.contrib.postgres.indexes import GinIndex
+from django.db import migrations
+
+import products.search
+
+TRIGRAM_INDEXES = {
+    'name': 'product_name_trgm_idx',
+    'company': 'product_company_trgm_idx',
+    'disease_category': 'product_category_trgm_idx',
+}
+
+
+def create_search_indexes(apps, schema_editor):
+    # PostgreSQL only; other databases use the in-process index in products.search
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    Product = apps.get_model('products', 'Product')
+    schema_editor.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+    schema_editor.add_index(Product, GinIndex(products.search.search_vector(), name='product_search_vector_idx'))
+    for field, name in TRIGRAM_INDEXES.items():
+        schema_editor.add_index(Product, GinIndex(fields=[field], opclasses=['gin_trgm_ops'], name=name))
+
+
+def drop_search_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute('DROP INDEX IF EXISTS product_search_vector_idx')
+    for name in TRIGRAM_INDEXES.values():
+        schema_editor.execute(f'DROP INDEX IF EXISTS {name}')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_indexes, drop_search_indexes),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.5 on 2026-10-18 17:45
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0002_product_search_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='product',
+            name='related_ids',
+            field=models.JSONField(blank=True, default=list, editable=False),
+        ),
+    ]
@@ -0,0 +1,66 @@
+from django.db import models
+
+# Columns the list/search/related payloads need; description and the rest stay deferred
+LIST_FIELDS = ('id', 'slug', 'trending', 'product_type', 'name', 'mrp', 'discount', 'available_stock')
+
+
+class ProductManager(models.Manager):
+    def for_listing(self):
+        # List columns plus the position-0 thumbnail, fetched with one extra query
+        return self.only(*LIST_FIELDS).prefetch_related(
+            models.Prefetch(
+                'images',
+                queryset=ProductImage.objects.filter(position=0).only('id', 'product_id', 'url'),
+                to_attr='thumbnails',
+            )
+        )
+
+
+class Product(models.Model):
+    product_type = models.CharField(max_length=50)
+    trending = models.BooleanField(default=False)
+    name = models.CharField(max_length=200)
+    company = models.CharField(max_length=100)
+    disease_category = models.CharField(max_length=100)
+    mrp = models.DecimalField(max_digits=10, decimal_places=2)
+    discount = models.PositiveSmallIntegerField(default=0)  # percent off mrp
+    available_stock = models.PositiveIntegerField(default=0)
+    slug = models.SlugField(max_length=200, unique=True)
+    description = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    # Ordered ids of related products, written by `manage.py compute_related_products`
+    related_ids = models.JSONField(default=list, blank=True, editable=False)
+
+    objects = ProductManager()
+
+    class Meta:
+        # Every filter index ends in id so a filtered page is an index range scan in
+        # cursor order (the listing pages by -id); combined filters start from the most
+        # selective one and check the rest on those rows
+        indexes = [
+            models.Index(fields=['disease_category', '-id'], name='product_category_idx'),
+            models.Index(fields=['company', '-id'], name='product_company_idx'),
+            models.Index(fields=['product_type', '-id'], name='product_type_idx'),
+            models.Index(fields=['disease_category', 'product_type', '-id'], name='product_category_type_idx'),
+            models.Index(
+                fields=['-id'], condition=models.Q(trending=True), name='product_trending_idx',
+            ),
+        ]
+
+    def __str__(self):
+        return self.name
+
+
+class ProductImage(models.Model):
+    product = models.ForeignKey(Product, on_delete=models.CASCADE, related_name='images')
+    url = models.CharField(max_length=500)
+    position = models.PositiveSmallIntegerField(default=0)  # 0 is the listing thumbnail
+
+    class Meta:
+        ordering = ['position']
+        constraints = [
+            models.UniqueConstraint(fields=['product', 'position'], name='product_image_position_uniq'),
+        ]
+
+    def __str__(self):
+        return self.url
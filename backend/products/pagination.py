@@ -0,0 +1,10 @@
+from rest_framework.pagination import CursorPagination
+
+
+class ProductCursorPagination(CursorPagination):
+    """Keyset pagination on -id: each page is `WHERE id < cursor LIMIT n`, with no COUNT(*)."""
+
+    page_size = 20
+    max_page_size = 100
+    page_size_query_param = 'page_size'
+    ordering = '-id'
@@ -0,0 +1,80 @@
+from collections import defaultdict
+
+from django.conf import settings
+
+from .models import Product
+
+RELATED_FIELDS = ('id', 'disease_category', 'company', 'product_type', 'trending')
+
+
+def related_limit():
+    return getattr(settings, 'RELATED_PRODUCTS_LIMIT', 8)
+
+
+def compute_related_ids(rows, limit=None):
+    """Map product id -> ordered related ids, for rows of RELATED_FIELDS.
+
+    Related products share the disease category; within it, ones from the same company
+    and of the same type come first, then same company or same type, then the rest,
+    trending and newer first at each level. Candidates are pre-sorted per group, so
+    each product only looks at the heads of a few lists instead of its whole category.
+    """
+    limit = limit or related_limit()
+    by_match, by_company, by_type, by_category = (defaultdict(list) for _ in range(4))
+    for row in rows:
+        _, category, company, product_type, _ = row
+        by_match[category, company, product_type].append(row)
+        by_company[category, company].append(row)
+        by_type[category, product_type].append(row)
+        by_category[category].append(row)
+
+    def order(row):
+        return (not row[4], -row[0])
+
+    for groups in (by_match, by_company, by_type, by_category):
+        for members in groups.values():
+            members.sort(key=order)
+
+    # Heads long enough to still hold `limit` candidates after skipping self and earlier picks
+    head = limit * 2 + 1
+    related = {}
+    for (category, company, product_type), members in by_match.items():
+        either = sorted(by_company[category, company][:head] + by_type[category, product_type][:head], key=order)
+        for product_id, *_ in members:
+            picked, seen = [], {product_id}
+            for candidates in (members, either, by_category[category]):
+                for candidate_id, *_ in candidates:
+                    if len(picked) >= limit:
+                        break
+                    if candidate_id not in seen:
+                        seen.add(candidate_id)
+                        picked.append(candidate_id)
+            related[product_id] = picked
+    return related
+
+
+def refresh_related_products(batch_size=1000):
+    """Recompute and store related_ids for the whole catalog. Returns the number of products updated."""
+    rows = list(Product.objects.values_list(*RELATED_FIELDS).iterator(chunk_size=10000))
+    related = compute_related_ids(rows)
+
+    changed = []
+    current = Product.objects.only('id', 'related_ids').iterator(chunk_size=batch_size)
+    for product in current:
+        ids = related.get(product.pk, [])
+        if product.related_ids != ids:
+            product.related_ids = ids
+            changed.append(product)
+    for start in range(0, len(changed), batch_size):
+        Product.objects.bulk_update(changed[start:start + batch_size], ['related_ids'])
+    return len(changed)
+
+
+def fallback_related_ids(product):
+    # Only for products the batch job hasn't seen yet; one indexed query on the category
+    return list(
+        Product.objects.filter(disease_category=product.disease_category)
+        .exclude(pk=product.pk)
+        .order_by('-trending', '-id')
+        .values_list('id', flat=True)[:related_limit()]
+    )
@@ -0,0 +1,198 @@
+import heapq
+import re
+import threading
+from bisect import bisect_left
+from collections import defaultdict
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connections, router
+
+from backend.routers import primary_reads
+
+# Field weights, used by both backends: a hit in the name beats one in the company or ailment
+WEIGHTS = {'name': 1.0, 'company': 0.6, 'disease_category': 0.5}
+VERSION_KEY = 'products:search:version'
+MIN_SIMILARITY = 0.4
+
+_token_re = re.compile(r'[a-z0-9]+')
+
+
+def tokenize(text):
+    return _token_re.findall(text.lower())
+
+
+def trigrams(token):
+    # Same padding as pg_trgm, so short words still produce a few trigrams
+    padded = f'  {token} '
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def search_vector():
+    """The tsvector expression; the GIN index in migration 0002 is built from this exact expression."""
+    from django.contrib.postgres.search import SearchVector
+
+    return (
+        SearchVector('name', weight='A', config='simple')
+        + SearchVector('company', weight='B', config='simple')
+        + SearchVector('disease_category', weight='C', config='simple')
+    )
+
+
+class ProductSearchIndex:
+    """In-process inverted index over name/company/disease_category.
+
+    Used when the database isn't PostgreSQL (dev, tests). Terms match exactly, by
+    prefix, or - for typos - by trigram similarity against the vocabulary. Every
+    product save/delete bumps a version in the shared cache; a process rebuilds
+    its copy on the next search after the version changes.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._postings = None
+        self._vocabulary = []
+        self._trigrams = {}
+        self._version = None
+
+    def rebuild(self, version=None):
+        from .models import Product
+
+        if version is None:
+            version = cache.get(VERSION_KEY, 0)
+        postings = defaultdict(dict)
+        # The index is kept until the next version bump, so read what that bump announced
+        with primary_reads():
+            rows = Product.objects.values_list('id', *WEIGHTS).iterator(chunk_size=5000)
+            for product_id, *values in rows:
+                for weight, value in zip(WEIGHTS.values(), values):
+                    for token in tokenize(value):
+                        if postings[token].get(product_id, 0) < weight:
+                            postings[token][product_id] = weight
+
+        grams = defaultdict(set)
+        for token in postings:
+            for gram in trigrams(token):
+                grams[gram].add(token)
+
+        with self._lock:
+            self._postings = dict(postings)
+            self._vocabulary = sorted(postings)
+            self._trigrams = dict(grams)
+            self._version = version
+
+    def _ensure_current(self):
+        version = cache.get(VERSION_KEY, 0)
+        if self._postings is None or version != self._version:
+            self.rebuild(version)
+
+    def _prefix_tokens(self, term, limit=50):
+        start = bisect_left(self._vocabulary, term)
+        tokens = []
+        for token in self._vocabulary[start:start + limit]:
+            if not token.startswith(term):
+                break
+            tokens.append(token)
+        return tokens
+
+    def _similar_tokens(self, term):
+        term_grams = trigrams(term)
+        shared = defaultdict(int)
+        for gram in term_grams:
+            for token in self._trigrams.get(gram, ()):
+                shared[token] += 1
+        for token, count in shared.items():
+            similarity = count / (len(term_grams) + len(trigrams(token)) - count)
+            if similarity >= MIN_SIMILARITY:
+                yield token, similarity
+
+    def _term_scores(self, term):
+        scores = {}
+
+        def add(token, factor):
+            for product_id, weight in self._postings.get(token, {}).items():
+                if weight * factor > scores.get(product_id, 0):
+                    scores[product_id] = weight * factor
+
+        for token in self._prefix_tokens(term):
+            add(token, 1.0 if token == term else 0.8)
+        if len(term) >= 3:
+            for token, similarity in self._similar_tokens(term):
+                add(token, 0.7 * similarity)
+        return scores
+
+    def search(self, query, limit=20):
+        self._ensure_current()
+        terms = tokenize(query)
+        if not terms:
+            return []
+
+        # Every term has to match (exactly, by prefix or fuzzily); scores add up
+        totals = None
+        for term in terms:
+            scores = self._term_scores(term)
+            if totals is None:
+                totals = scores
+            else:
+                totals = {pid: totals[pid] + score for pid, score in scores.items() if pid in totals}
+            if not totals:
+                return []
+        best = heapq.nlargest(limit, totals.items(), key=lambda item: (item[1], item[0]))
+        return [product_id for product_id, _ in best]
+
+
+search_index = ProductSearchIndex()
+
+
+def invalidate_search_index():
+    # Shared cache, so every worker's index notices the change
+    cache.add(VERSION_KEY, 0, timeout=None)
+    try:
+        cache.incr(VERSION_KEY)
+    except ValueError:
+        cache.set(VERSION_KEY, 1, timeout=None)
+
+
+def _postgres_search(query, limit):
+    from django.contrib.postgres.search import SearchQuery, SearchRank, TrigramWordSimilarity
+    from django.db.models import Q
+    from django.db.models.functions import Greatest
+
+    from .models import Product
+
+    terms = tokenize(query)
+    if not terms:
+        return []
+    tsquery = SearchQuery(' & '.join(f'{term}:*' for term in terms), search_type='raw', config='simple')
+    vector = search_vector()
+    similarity = Greatest(*[
+        TrigramWordSimilarity(query, field) * weight for field, weight in WEIGHTS.items()
+    ])
+    # The tsvector match and each trigram match are served by their own GIN index
+    matches = Q(document=tsquery)
+    for field in WEIGHTS:
+        matches |= Q(**{f'{field}__trigram_word_similar': query})
+    return list(
+        Product.objects.alias(document=vector)
+        .filter(matches)
+        .annotate(score=SearchRank(vector, tsquery) + similarity)
+        .order_by('-score', '-id')
+        .values_list('id', flat=True)[:limit]
+    )
+
+
+def search_backend():
+    from .models import Product
+
+    backend = getattr(settings, 'PRODUCT_SEARCH_BACKEND', 'auto')
+    if backend == 'auto':
+        vendor = connections[router.db_for_read(Product)].vendor
+        backend = 'postgres' if vendor == 'postgresql' else 'memory'
+    return backend
+
+
+def search_product_ids(query, limit=20):
+    """Ids of the best matches for `query`, best first."""
+    if search_backend() == 'postgres':
+        return _postgres_search(query, limit)
+    return search_index.search(query, limit)
@@ -0,0 +1,37 @@
+from rest_framework import serializers
+from .models import Product, ProductImage
+
+
+class ProductListSerializer(serializers.ModelSerializer):
+    product_id = serializers.IntegerField(source='id', read_only=True)
+    product_slug = serializers.CharField(source='slug', read_only=True)
+    image = serializers.SerializerMethodField()
+
+    class Meta:
+        model = Product
+        fields = ['product_id', 'product_slug', 'trending', 'product_type', 'name', 'mrp', 'discount',
+                  'image', 'available_stock']
+
+    def get_image(self, obj):
+        # `thumbnails` is filled by the single prefetch in Product.objects.for_listing()
+        thumbnails = getattr(obj, 'thumbnails', None)
+        return thumbnails[0].url if thumbnails else None
+
+
+class ProductImageSerializer(serializers.ModelSerializer):
+    image_id = serializers.IntegerField(source='id', read_only=True)
+
+    class Meta:
+        model = ProductImage
+        fields = ['image_id', 'url']
+
+
+class ProductDetailSerializer(serializers.ModelSerializer):
+    product_id = serializers.IntegerField(source='id', read_only=True)
+    product_slug = serializers.CharField(source='slug', read_only=True)
+    images = ProductImageSerializer(many=True, read_only=True)
+
+    class Meta:
+        model = Product
+        fields = ['product_id', 'product_slug', 'trending', 'product_type', 'name', 'company',
+                  'disease_category', 'mrp', 'discount', 'available_stock', 'images', 'description']
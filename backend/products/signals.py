@@ -0,0 +1,22 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .cache import invalidate_product_details
+from .models import Product, ProductImage
+from .search import invalidate_search_index
+
+
+@receiver(post_save, sender=Product)
+@receiver(post_delete, sender=Product)
+def product_changed(sender, instance, update_fields=None, **kwargs):
+    if update_fields is not None and set(update_fields) <= {'available_stock'}:
+        # Stock is overlaid on every read, so it never needs the caches rebuilt
+        return
+    invalidate_search_index()
+    invalidate_product_details()
+
+
+@receiver(post_save, sender=ProductImage)
+@receiver(post_delete, sender=ProductImage)
+def product_image_changed(sender, instance, **kwargs):
+    invalidate_product_details()
@@ -0,0 +1,149 @@
+import io
+from decimal import Decimal
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import TestCase
+
+from .models import Product, ProductImage
+from .search import search_product_ids
+
+
+def make_product(index, **fields):
+    fields.setdefault("product_type", "tablet")
+    fields.setdefault("disease_category", "Fever & Pain")
+    fields.setdefault("company", "Cipla")
+    fields.setdefault("name", f"Product {index}")
+    return Product.objects.create(
+        slug=f"product-{index}",
+        mrp=Decimal("30.00"),
+        discount=10,
+        available_stock=5,
+        description="x" * 1000,
+        **fields,
+    )
+
+
+class ProductListTests(TestCase):
+    def setUp(self):
+        self.products = []
+        for i in range(5):
+            product = make_product(i, trending=i % 2 == 0, company="Cipla" if i < 3 else "Sun Pharma")
+            ProductImage.objects.create(product=product, url=f"/images/{i}-0.jpg", position=0)
+            ProductImage.objects.create(product=product, url=f"/images/{i}-1.jpg", position=1)
+            self.products.append(product)
+
+    def test_list_is_two_queries_without_count(self):
+        with self.assertNumQueries(2) as ctx:
+            response = self.client.get("/api/products/")
+        self.assertFalse(any("COUNT(" in q["sql"] for q in ctx.captured_queries))
+        self.assertNotIn("description", ctx.captured_queries[0]["sql"])
+
+        first = response.json()["results"][0]
+        self.assertEqual(first["product_id"], self.products[-1].pk)
+        self.assertEqual(first["image"], "/images/4-0.jpg")
+        self.assertNotIn("description", first)
+
+    def test_cursor_pages_follow_id_order(self):
+        page = self.client.get("/api/products/", {"page_size": 2}).json()
+        seen = [p["product_id"] for p in page["results"]]
+        while page["next"]:
+            page = self.client.get(page["next"]).json()
+            seen += [p["product_id"] for p in page["results"]]
+        self.assertEqual(seen, sorted((p.pk for p in self.products), reverse=True))
+
+    def test_filters(self):
+        response = self.client.get("/api/products/", {"company": "Cipla", "trending": "true"})
+        self.assertEqual(
+            [p["product_slug"] for p in response.json()["results"]], ["product-2", "product-0"]
+        )
+
+
+class ProductSearchTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.paracetamol = make_product(1, name="Paracetamol 500mg Tablets", company="Cipla")
+        self.cetirizine = make_product(2, name="Cetirizine 10mg", company="Dr Reddys", disease_category="Allergy & Cold")
+        self.crocin = make_product(3, name="Crocin Advance", company="GSK", disease_category="Fever & Pain")
+        ProductImage.objects.create(product=self.paracetamol, url="/images/p.jpg", position=0)
+
+    def search(self, q):
+        return [p["product_slug"] for p in self.client.get("/api/products/search/", {"q": q}).json()["results"]]
+
+    def test_name_matches_rank_above_category_matches(self):
+        self.assertEqual(search_product_ids("fever paracetamol"), [self.paracetamol.pk])
+        # Both fever products match on category; the one named for the ailment isn't boosted
+        self.assertCountEqual(search_product_ids("fever"), [self.paracetamol.pk, self.crocin.pk])
+        self.assertEqual(search_product_ids("cipla")[0], self.paracetamol.pk)
+
+    def test_prefix_and_typos(self):
+        self.assertEqual(search_product_ids("parac"), [self.paracetamol.pk])
+        self.assertEqual(search_product_ids("paracetmol"), [self.paracetamol.pk])
+        self.assertEqual(search_product_ids("cetrizine"), [self.cetirizine.pk])
+        self.assertEqual(search_product_ids("zzzz"), [])
+
+    def test_index_follows_catalog_changes(self):
+        search_product_ids("crocin")
+        self.crocin.name = "Dolo 650"
+        self.crocin.save()
+        self.assertEqual(search_product_ids("crocin"), [])
+        self.assertEqual(search_product_ids("dolo"), [self.crocin.pk])
+
+    def test_endpoint_serializes_matches_in_rank_order(self):
+        search_product_ids("warm")
+        with self.assertNumQueries(2):
+            response = self.client.get("/api/products/search/", {"q": "paracetamol"})
+        result = response.json()["results"][0]
+        self.assertEqual(result["product_slug"], "product-1")
+        self.assertEqual(result["image"], "/images/p.jpg")
+        self.assertEqual(self.search(""), [])
+
+
+class ProductDetailTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.product = make_product(1, company="Cipla", product_type="tablet")
+        ProductImage.objects.create(product=self.product, url="/images/1-0.jpg", position=0)
+        ProductImage.objects.create(product=self.product, url="/images/1-1.jpg", position=1)
+        self.same_company_and_type = make_product(2, company="Cipla", product_type="tablet")
+        self.same_company = make_product(3, company="Cipla", product_type="syrup")
+        self.same_type = make_product(4, company="Lupin", product_type="tablet", trending=True)
+        self.same_category = make_product(5, company="Lupin", product_type="syrup", trending=True)
+        self.other_category = make_product(6, disease_category="Diabetes")
+        call_command("compute_related_products", stdout=io.StringIO())
+
+    def test_related_are_precomputed_in_affinity_order(self):
+        self.product.refresh_from_db()
+        self.assertEqual(self.product.related_ids, [
+            self.same_company_and_type.pk, self.same_type.pk, self.same_company.pk, self.same_category.pk,
+        ])
+
+    def test_cached_payload_costs_one_query(self):
+        payload = self.client.get("/api/products/product-1/").json()
+        self.assertEqual([i["image_id"] for i in payload["product"]["images"]], list(
+            self.product.images.values_list("id", flat=True)
+        ))
+        self.assertEqual(len(payload["related"]), 4)
+        with self.assertNumQueries(1):
+            self.client.get("/api/products/product-1/")
+
+    def test_stock_is_always_fresh(self):
+        self.client.get("/api/products/product-1/")
+        Product.objects.filter(pk__in=[self.product.pk, self.same_type.pk]).update(available_stock=0)
+        payload = self.client.get("/api/products/product-1/").json()
+        self.assertEqual(payload["product"]["available_stock"], 0)
+        stock = {item["product_id"]: item["available_stock"] for item in payload["related"]}
+        self.assertEqual(stock[self.same_type.pk], 0)
+        self.assertEqual(stock[self.same_company.pk], 5)
+
+    def test_catalog_edits_invalidate(self):
+        self.client.get("/api/products/product-1/")
+        self.same_type.name = "Renamed"
+        self.same_type.save()
+        payload = self.client.get("/api/products/product-1/").json()
+        self.assertIn("Renamed", [item["name"] for item in payload["related"]])
+
+        self.product.slug = "moved"
+        self.product.save()
+        self.assertEqual(self.client.get("/api/products/product-1/").status_code, 404)
+        self.assertEqual(self.client.get("/api/products/moved/").status_code, 200)
@@ -0,0 +1,8 @@
+from django.urls import path
+from .views import *
+
+urlpatterns = [
+    path('products/', ProductListView.as_view(), name='product_list'),
+    path('products/search/', ProductSearchView.as_view(), name='product_search'),
+    path('products/<slug:slug>/', ProductDetailView.as_view(), name='product_detail'),
+]
@@ -0,0 +1,53 @@
+from rest_framework import status
+from rest_framework.generics import ListAPIView
+from rest_framework.permissions import AllowAny
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from .cache import get_product_detail
+from .models import Product
+from .pagination import ProductCursorPagination
+from .search import search_product_ids
+from .serializers import ProductListSerializer
+
+
+class ProductListView(ListAPIView):
+    permission_classes = [AllowAny]
+    authentication_classes = []
+    serializer_class = ProductListSerializer
+    pagination_class = ProductCursorPagination
+    filterset_fields = ['disease_category', 'company', 'product_type', 'trending']
+
+    def get_queryset(self):
+        return Product.objects.for_listing()
+
+
+class ProductSearchView(APIView):
+    permission_classes = [AllowAny]
+    authentication_classes = []
+    max_limit = 50
+
+    def get(self, request):
+        query = request.query_params.get('q', '').strip()
+        try:
+            limit = min(int(request.query_params.get('limit', 20)), self.max_limit)
+        except ValueError:
+            limit = 20
+        if not query or limit < 1:
+            return Response({"results": []})
+
+        ids = search_product_ids(query, limit)
+        products = Product.objects.for_listing().in_bulk(ids)
+        results = [products[pk] for pk in ids if pk in products]
+        return Response({"results": ProductListSerializer(results, many=True).data})
+
+
+class ProductDetailView(APIView):
+    permission_classes = [AllowAny]
+    authentication_classes = []
+
+    def get(self, request, slug):
+        payload = get_product_detail(slug)
+        if payload is None:
+            return Response({"error": "Product not found."}, status=status.HTTP_404_NOT_FOUND)
+        return Response(payload)
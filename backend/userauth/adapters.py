@@ -1,3 +1,10 @@
+from django.apps import apps
+from django.core.exceptions import ImproperlyConfigured
+
+# allauth's models can't be imported unless its apps are installed
+if not apps.is_installed('allauth.socialaccount'):
+    raise ImproperlyConfigured('userauth.adapters needs SOCIAL_AUTH_ENABLED')
+
 from allauth.socialaccount.adapter import DefaultSocialAccountAdapter
 
 class CustomSocialAccountAdapter(DefaultSocialAccountAdapter):
@@ -5,4 +12,3 @@ class CustomSocialAccountAdapter(DefaultSocialAccountAdapter):
         user = super().save_user(request, sociallogin, form)
         sociallogin.state['next'] = '/api/google/token/'
         return user
-
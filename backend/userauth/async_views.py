@@ -0,0 +1,122 @@
+import json
+
+from asgiref.sync import sync_to_async
+from django.http import JsonResponse
+from django.utils.decorators import method_decorator
+from django.views import View
+from django.views.decorators.csrf import csrf_exempt
+from rest_framework import status
+
+from .hashing import HashingPoolFull, hashing_pool
+from .last_login import last_login_recorder
+from .models import CustomUser
+from .serializers import UserSignupSerializer
+from .throttles import LoginIPThrottle
+from .tokens import RefreshToken
+
+# Async twins of CustomLoginView / RegisterView for deployments served through backend.asgi.
+# Password hashing runs on the bounded hashing_pool so the event loop stays free for
+# profile reads, and a full queue answers 503 instead of piling up more work.
+
+
+def _json_body(request):
+    try:
+        data = json.loads(request.body or b"{}")
+    except ValueError:
+        return None
+    return data if isinstance(data, dict) else None
+
+
+def _busy_response():
+    response = JsonResponse(
+        {"error": "Server is busy, please retry shortly."},
+        status=status.HTTP_503_SERVICE_UNAVAILABLE,
+    )
+    response["Retry-After"] = "1"
+    return response
+
+
+def _token_pair(user):
+    refresh = RefreshToken.for_user(user)
+    return str(refresh.access_token), str(refresh)
+
+
+@method_decorator(csrf_exempt, name="dispatch")
+class AsyncCustomLoginView(View):
+    http_method_names = ["post"]
+
+    async def post(self, request):
+        throttle = LoginIPThrottle()
+        if not await sync_to_async(throttle.allow_request)(request, self):
+            response = JsonResponse({"error": "Too many login attempts."}, status=status.HTTP_429_TOO_MANY_REQUESTS)
+            response["Retry-After"] = str(int(throttle.wait()) + 1)
+            return response
+
+        data = _json_body(request)
+        if data is None:
+            return JsonResponse({"error": "Invalid JSON body."}, status=status.HTTP_400_BAD_REQUEST)
+
+        email = data.get("email")
+        password = data.get("password")
+
+        if not email or not password:
+            return JsonResponse({"error": "Email and password are required."}, status=status.HTTP_400_BAD_REQUEST)
+
+        user = await CustomUser.objects.aget_for_login(email)
+        if user is None:
+            return JsonResponse({"error": "User does not exist. Please create an account."}, status=status.HTTP_404_NOT_FOUND)
+
+        try:
+            valid, upgraded_hash = await hashing_pool.verify_and_upgrade(password, user.password)
+        except HashingPoolFull:
+            return _busy_response()
+
+        if not valid:
+            return JsonResponse({"error": "Incorrect password."}, status=status.HTTP_401_UNAUTHORIZED)
+
+        if not user.is_active:
+            return JsonResponse({"error": "This account is inactive."}, status=status.HTTP_403_FORBIDDEN)
+
+        if upgraded_hash:
+            # Stored hash predates the current hasher/cost, migrate it now
+            user.password = upgraded_hash
+            await user.asave(update_fields=["password"])
+
+        access, refresh = await sync_to_async(_token_pair)(user)
+        last_login_recorder.record(user.pk)
+        return JsonResponse({
+            "message": "Login successful",
+            "access": access,
+            "refresh": refresh,
+        }, status=status.HTTP_200_OK)
+
+
+@method_decorator(csrf_exempt, name="dispatch")
+class AsyncRegisterView(View):
+    http_method_names = ["post"]
+
+    async def post(self, request):
+        data = _json_body(request)
+        if data is None:
+            return JsonResponse({"error": "Invalid JSON body."}, status=status.HTTP_400_BAD_REQUEST)
+
+        user_serializer = UserSignupSerializer(data=data)
+        if not await sync_to_async(user_serializer.is_valid)():
+            return JsonResponse(user_serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+        try:
+            password_hash = await hashing_pool.make_password(user_serializer.validated_data["password"])
+        except HashingPoolFull:
+            return _busy_response()
+
+        user = await sync_to_async(CustomUser.objects.create_user_with_hash)(
+            email=user_serializer.validated_data["email"],
+            password_hash=password_hash,
+        )
+
+        access, refresh = await sync_to_async(_token_pair)(user)
+        return JsonResponse({
+            "message": "User created successfully",
+            "access": access,
+            "refresh": refresh,
+        }, status=status.HTTP_201_CREATED)
@@ -0,0 +1,138 @@
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+
+from .models import CustomUser
+
+
+class ValidatedUserCache:
+    """Small per-process LRU of user_id -> (is_active, token_version).
+
+    Entries are dropped on save/delete of the user (see userauth.signals) and expire
+    after a short TTL, which bounds how long another worker can miss a revocation.
+    """
+
+    def __init__(self, maxsize=None, ttl=None):
+        self.maxsize = maxsize or getattr(settings, "JWT_USER_CACHE_SIZE", 10000)
+        self.ttl = ttl if ttl is not None else getattr(settings, "JWT_USER_CACHE_TTL_SECONDS", 60)
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, user_id):
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is None:
+                return None
+            if entry[2] <= time.monotonic():
+                del self._entries[user_id]
+                return None
+            self._entries.move_to_end(user_id)
+            return entry[0], entry[1]
+
+    def set(self, user_id, is_active, token_version):
+        with self._lock:
+            self._entries[user_id] = (is_active, token_version, time.monotonic() + self.ttl)
+            self._entries.move_to_end(user_id)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, user_id):
+        with self._lock:
+            self._entries.pop(user_id, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+validated_users = ValidatedUserCache()
+
+
+class LazyUser:
+    """User built from token claims. Anything the token doesn't carry loads the real
+    CustomUser on first access; `userprofile` is fetched directly by user_id."""
+
+    is_authenticated = True
+    is_anonymous = False
+    is_active = True
+
+    def __init__(self, token):
+        self._wrapped = None
+        self._profile = None
+        self.id = self.pk = int(token[api_settings.USER_ID_CLAIM])
+        for claim in ("user_uuid", "is_staff"):
+            if claim in token:
+                setattr(self, claim, token[claim])
+
+    def _load(self):
+        if self._wrapped is None:
+            self._wrapped = CustomUser.objects.get(pk=self.pk)
+        return self._wrapped
+
+    def __getattr__(self, name):
+        # Only called for attributes not set from the token
+        if name.startswith("__"):
+            raise AttributeError(name)
+        return getattr(self._load(), name)
+
+    @property
+    def userprofile(self):
+        if self._profile is None:
+            from userprofile.models import UserProfile
+
+            profile = UserProfile.objects.get(user_id=self.pk)
+            # Serializers reach back through profile.user; keep that on the lazy user
+            UserProfile.user.field.set_cached_value(profile, self)
+            self._profile = profile
+        return self._profile
+
+    def __eq__(self, other):
+        if isinstance(other, (LazyUser, CustomUser)):
+            return self.pk == other.pk
+        return NotImplemented
+
+    def __hash__(self):
+        return hash(self.pk)
+
+    def __str__(self):
+        return str(self._load())
+
+
+class StatelessJWTAuthentication(JWTAuthentication):
+    """JWTAuthentication without the per-request user SELECT.
+
+    The token's `ver` claim is checked against the user's token_version (from the
+    LRU, or one slim query on a miss), so deactivation and password resets still
+    revoke outstanding tokens.
+    """
+
+    def get_user(self, validated_token):
+        try:
+            user_id = int(validated_token[api_settings.USER_ID_CLAIM])
+        except (KeyError, TypeError, ValueError) as e:
+            raise InvalidToken(_("Token contained no recognizable user identification")) from e
+
+        state = validated_users.get(user_id)
+        if state is None:
+            state = (
+                CustomUser.objects.filter(pk=user_id)
+                .values_list("is_active", "token_version")
+                .first()
+            )
+            if state is None:
+                raise AuthenticationFailed(_("User not found"), code="user_not_found")
+            validated_users.set(user_id, *state)
+
+        is_active, token_version = state
+        if not is_active:
+            raise AuthenticationFailed(_("User is inactive"), code="user_inactive")
+        if validated_token.get("ver", 0) != token_version:
+            raise AuthenticationFailed(_("Token has been revoked"), code="token_revoked")
+
+        return LazyUser(validated_token)
@@ -0,0 +1,104 @@
+import hashlib
+import math
+import threading
+import time
+
+from django.conf import settings
+from django.utils import timezone
+
+
+class BloomFilter:
+    def __init__(self, capacity, error_rate):
+        self.capacity = max(1, capacity)
+        self.num_bits = max(8, int(-self.capacity * math.log(error_rate) / (math.log(2) ** 2)))
+        self.num_hashes = max(1, round(self.num_bits / self.capacity * math.log(2)))
+        self.bits = bytearray((self.num_bits + 7) // 8)
+        self.count = 0
+
+    def _positions(self, item):
+        # Double hashing: k positions from two 64-bit halves of one digest
+        digest = hashlib.blake2b(item.encode("utf-8"), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "big")
+        h2 = int.from_bytes(digest[8:], "big") | 1
+        return ((h1 + i * h2) % self.num_bits for i in range(self.num_hashes))
+
+    def add(self, item):
+        for position in self._positions(item):
+            self.bits[position >> 3] |= 1 << (position & 7)
+        self.count += 1
+
+    def __contains__(self, item):
+        return all(self.bits[position >> 3] & (1 << (position & 7)) for position in self._positions(item))
+
+
+class BlacklistFilter:
+    """Per-process probabilistic front for the refresh-token blacklist.
+
+    A miss means the JTI is definitely not blacklisted and the DB is skipped; a hit
+    is confirmed against BlacklistedToken. Rows blacklisted by other processes are
+    pulled in incrementally (by id) at most every TOKEN_BLACKLIST_FILTER_SYNC_SECONDS,
+    which is the longest another worker can take to see a revocation. 0 syncs on every check.
+    """
+
+    def __init__(self, capacity=None, error_rate=None, sync_seconds=None):
+        self.capacity = capacity or getattr(settings, "TOKEN_BLACKLIST_FILTER_CAPACITY", 1_000_000)
+        self.error_rate = error_rate or getattr(settings, "TOKEN_BLACKLIST_FILTER_ERROR_RATE", 0.001)
+        self.sync_seconds = sync_seconds if sync_seconds is not None else getattr(
+            settings, "TOKEN_BLACKLIST_FILTER_SYNC_SECONDS", 2
+        )
+        self._lock = threading.Lock()
+        self._bloom = None
+        self._last_id = 0
+        self._synced_at = 0
+
+    def _load(self, since_id):
+        from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken
+
+        # Expired tokens fail verification anyway, so they never need to be in the filter
+        return BlacklistedToken.objects.filter(
+            id__gt=since_id, token__expires_at__gt=timezone.now()
+        ).order_by("id").values_list("id", "token__jti")
+
+    def rebuild(self):
+        with self._lock:
+            rows = self._load(0)
+            # Keep the requested error rate even if the blacklist outgrew the configured capacity
+            self.capacity = max(self.capacity, rows.count() * 2)
+            bloom = BloomFilter(self.capacity, self.error_rate)
+            last_id = 0
+            for row_id, jti in rows.iterator(chunk_size=10000):
+                bloom.add(jti)
+                last_id = row_id
+            self._bloom, self._last_id, self._synced_at = bloom, last_id, time.monotonic()
+
+    def _sync(self):
+        if self._bloom is None:
+            self.rebuild()
+            return
+        if time.monotonic() - self._synced_at < self.sync_seconds:
+            return
+        with self._lock:
+            for row_id, jti in self._load(self._last_id):
+                self._bloom.add(jti)
+                self._last_id = row_id
+            self._synced_at = time.monotonic()
+        if self._bloom.count > self.capacity:
+            self.rebuild()
+
+    def might_contain(self, jti):
+        self._sync()
+        return jti in self._bloom
+
+    def add(self, jti):
+        if self._bloom is not None:
+            with self._lock:
+                self._bloom.add(jti)
+
+    def reset(self):
+        with self._lock:
+            self._bloom = None
+            self._last_id = 0
+            self._synced_at = 0
+
+
+blacklist_filter = BlacklistFilter()
@@ -1,9 +1,175 @@
-from django.core.mail import EmailMessage
-from django.template.loader import render_to_string
+import functools
+import logging
+import smtplib
+import threading
+from datetime import timedelta
 
-def send_otp_email(email, code):
+from django.conf import settings
+from django.core.mail import EmailMessage, get_connection
+from django.db import connections, transaction
+from django.db.models import Q
+from django.template.loader import get_template
+from django.utils import timezone
+
+from .models import OutboundEmail
+
+logger = logging.getLogger(__name__)
+
+
+@functools.lru_cache(maxsize=None)
+def _template(name):
+    # Compile once per process; with DEBUG=True Django would re-read it on every render
+    return get_template(name)
+
+
+def queue_email(to, subject, html_message):
+    message = OutboundEmail.objects.create(to=to, subject=subject, body=html_message)
+    if getattr(settings, "EMAIL_QUEUE_WORKER", "thread") == "thread":
+        transaction.on_commit(_kick_worker)
+    return message
+
+
+def queue_otp_email(email, code):
     subject = "Your Password Reset OTP"
-    html_message = render_to_string("otp_email.html", {"email": email, "code": code})
-    email_msg = EmailMessage(subject, html_message, to=[email])
-    email_msg.content_subtype = "html"
-    email_msg.send()
+    html_message = _template("otp_email.html").render({
+        "email": email,
+        "code": code,
+        "minutes": settings.OTP_EXPIRATION_TIME_MINUTES,
+    })
+    return queue_email(email, subject, html_message)
+
+
+def _claim_batch(batch_size, lease):
+    now = timezone.now()
+    due = Q(status__in=[OutboundEmail.PENDING, OutboundEmail.SENDING], next_attempt_at__lte=now)
+    with transaction.atomic():
+        # skip_locked lets several workers drain the queue without waiting on each other
+        messages = list(
+            OutboundEmail.objects.select_for_update(skip_locked=True)
+            .filter(due)
+            .order_by("next_attempt_at")[:batch_size]
+        )
+        OutboundEmail.objects.filter(pk__in=[m.pk for m in messages]).update(
+            status=OutboundEmail.SENDING, next_attempt_at=now + lease
+        )
+    return messages
+
+
+def _retry_delay(attempts):
+    base = getattr(settings, "EMAIL_QUEUE_RETRY_BASE_SECONDS", 30)
+    return timedelta(seconds=base * 2 ** (attempts - 1))
+
+
+def _mark_failed(message, error, max_attempts):
+    logger.warning("Sending %s failed (attempt %s): %s", message.pk, message.attempts, error)
+    message.last_error = str(error)
+    if message.attempts >= max_attempts:
+        message.status = OutboundEmail.FAILED
+        message.body = ""  # never delivered, so an OTP code in it is of no use to keep
+    else:
+        message.status = OutboundEmail.PENDING
+        message.next_attempt_at = timezone.now() + _retry_delay(message.attempts)
+
+
+def _save_result(message):
+    message.save(update_fields=["status", "attempts", "next_attempt_at", "last_error", "sent_at", "body"])
+
+
+def _fail_all(messages, error, max_attempts):
+    for message in messages:
+        message.attempts += 1
+        _mark_failed(message, error, max_attempts)
+        _save_result(message)
+
+
+def deliver_queued_emails(batch_size=None, connection=None):
+    """Send one batch of due messages over a single SMTP connection. Returns how many were sent."""
+    batch_size = batch_size or getattr(settings, "EMAIL_QUEUE_BATCH_SIZE", 50)
+    max_attempts = getattr(settings, "EMAIL_QUEUE_MAX_ATTEMPTS", 5)
+    messages = _claim_batch(batch_size, lease=timedelta(minutes=5))
+    if not messages:
+        return 0
+
+    connection = connection or get_connection()
+    try:
+        connection.open()
+    except (smtplib.SMTPException, OSError) as e:
+        _fail_all(messages, e, max_attempts)
+        return 0
+
+    sent = 0
+    try:
+        for index, message in enumerate(messages):
+            email = EmailMessage(message.subject, message.body, to=[message.to], connection=connection)
+            email.content_subtype = message.content_subtype
+            message.attempts += 1
+            disconnected = False
+            try:
+                email.send()
+            except (smtplib.SMTPException, OSError) as e:
+                _mark_failed(message, e, max_attempts)
+                disconnected = isinstance(e, smtplib.SMTPServerDisconnected)
+            else:
+                message.status = OutboundEmail.SENT
+                message.sent_at = timezone.now()
+                message.body = ""  # don't keep OTP codes around once delivered
+                sent += 1
+            _save_result(message)
+
+            if disconnected:
+                # Reconnect so the rest of the batch isn't lost with this one
+                connection.close()
+                try:
+                    connection.open()
+                except (smtplib.SMTPException, OSError) as e:
+                    # Back off the rest now rather than leave them to the lease
+                    _fail_all(messages[index + 1:], e, max_attempts)
+                    break
+    finally:
+        connection.close()
+    return sent
+
+
+_worker_lock = threading.Lock()
+_worker_running = False
+_wakeup = threading.Event()
+
+
+def _drain_queue():
+    global _worker_running
+    try:
+        while True:
+            _wakeup.clear()
+            while deliver_queued_emails():
+                pass
+            next_due = (
+                OutboundEmail.objects.filter(status__in=[OutboundEmail.PENDING, OutboundEmail.SENDING])
+                .order_by("next_attempt_at")
+                .values_list("next_attempt_at", flat=True)
+                .first()
+            )
+            with _worker_lock:
+                # Mail queued while we were finishing gets picked up before we exit
+                if next_due is None and not _wakeup.is_set():
+                    _worker_running = False
+                    return
+            if next_due is not None:
+                # Sleep until the next retry is due, or until new mail is queued
+                _wakeup.wait(timeout=max(0, (next_due - timezone.now()).total_seconds()))
+    except Exception:
+        logger.exception("Email queue worker crashed; messages stay queued for the next run")
+        with _worker_lock:
+            _worker_running = False
+    finally:
+        connections.close_all()
+
+
+def _kick_worker():
+    # In-process worker so mail goes out even without `manage.py send_queued_emails`
+    global _worker_running
+    with _worker_lock:
+        _wakeup.set()
+        if _worker_running:
+            return
+        _worker_running = True
+    threading.Thread(target=_drain_queue, name="email-queue", daemon=True).start()
@@ -0,0 +1,157 @@
+import hashlib
+import json
+import re
+import threading
+import time
+
+from django.conf import settings
+
+# google-auth and requests (urllib3, cryptography) are imported on first use, so workers
+# that never see a Google login don't pay for them at boot
+
+GOOGLE_CERTS_URL = "https://www.googleapis.com/oauth2/v1/certs"
+GOOGLE_ISSUERS = ("accounts.google.com", "https://accounts.google.com")
+
+_MAX_AGE_RE = re.compile(r"max-age=(\d+)")
+
+
+def _build_session():
+    import requests
+
+    # One pooled session for every verification instead of a new one per login
+    session = requests.Session()
+    adapter = requests.adapters.HTTPAdapter(pool_connections=1, pool_maxsize=10)
+    session.mount("https://", adapter)
+    return session
+
+
+class GoogleCertCache:
+    """Process-wide copy of Google's signing certs, refreshed per Cache-Control max-age."""
+
+    def __init__(self, certs_url=GOOGLE_CERTS_URL, fetch=None):
+        self.certs_url = certs_url
+        self._fetch = fetch or self._fetch_from_google
+        self._request = None
+        self._certs = None
+        self._expires_at = 0
+        self._lock = threading.Lock()
+
+    def _fetch_from_google(self):
+        if self._request is None:
+            from google.auth.transport.requests import Request
+
+            self._request = Request(session=_build_session())
+        response = self._request(self.certs_url, method="GET")
+        if response.status != 200:
+            raise ValueError("Could not fetch Google certificates")
+
+        match = _MAX_AGE_RE.search(response.headers.get("cache-control", ""))
+        max_age = int(match.group(1)) if match else 0
+        return json.loads(response.data.decode("utf-8")), max_age
+
+    def get(self, force=False):
+        if not force and self._certs is not None and time.monotonic() < self._expires_at:
+            return self._certs
+
+        with self._lock:
+            # Another thread may have refreshed while we waited on the lock
+            if not force and self._certs is not None and time.monotonic() < self._expires_at:
+                return self._certs
+            certs, max_age = self._fetch()
+            self._certs = certs
+            self._expires_at = time.monotonic() + max_age
+            return certs
+
+    def clear(self):
+        with self._lock:
+            self._certs = None
+            self._expires_at = 0
+
+
+class VerifiedTokenCache:
+    """Short-lived map of token fingerprint -> claims so retries skip the signature check."""
+
+    def __init__(self, ttl, max_entries=10000):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def fingerprint(token):
+        return hashlib.sha256(token.encode("utf-8")).hexdigest()
+
+    def get(self, token):
+        key = self.fingerprint(token)
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        claims, expires_at = entry
+        if time.time() >= expires_at:
+            with self._lock:
+                self._entries.pop(key, None)
+            return None
+        return claims
+
+    def set(self, token, claims):
+        if self.ttl <= 0:
+            return
+        # Never keep claims around longer than the token itself is valid
+        expires_at = min(time.time() + self.ttl, claims.get("exp", 0))
+        with self._lock:
+            if len(self._entries) >= self.max_entries:
+                now = time.time()
+                self._entries = {k: v for k, v in self._entries.items() if v[1] > now}
+                if len(self._entries) >= self.max_entries:
+                    self._entries.clear()
+            self._entries[self.fingerprint(token)] = (claims, expires_at)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+class GoogleTokenVerifier:
+    def __init__(self, cert_cache=None, token_cache=None, clock_skew_in_seconds=0):
+        self.cert_cache = cert_cache or GoogleCertCache()
+        self.token_cache = token_cache or VerifiedTokenCache(
+            getattr(settings, "GOOGLE_VERIFIED_TOKEN_TTL_SECONDS", 60)
+        )
+        self.clock_skew_in_seconds = clock_skew_in_seconds
+
+    def _decode(self, token, audience, certs):
+        from google.auth import jwt
+
+        return jwt.decode(
+            token,
+            certs=certs,
+            audience=audience,
+            clock_skew_in_seconds=self.clock_skew_in_seconds,
+        )
+
+    def verify(self, token, audience):
+        cached = self.token_cache.get(token)
+        if cached is not None and cached.get("aud") == audience:
+            return cached
+
+        from google.auth import jwt
+
+        certs = self.cert_cache.get()
+        key_id = jwt.decode_header(token).get("kid")
+        if key_id and key_id not in certs:
+            # Google rotated its keys before our cached copy expired
+            certs = self.cert_cache.get(force=True)
+
+        idinfo = self._decode(token, audience, certs)
+        if idinfo.get("iss") not in GOOGLE_ISSUERS:
+            raise ValueError("Wrong issuer. 'iss' should be one of {}".format(GOOGLE_ISSUERS))
+
+        self.token_cache.set(token, idinfo)
+        return idinfo
+
+
+verifier = GoogleTokenVerifier()
+
+
+def verify_google_id_token(token, audience):
+    return verifier.verify(token, audience)
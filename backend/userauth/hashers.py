@@ -0,0 +1,57 @@
+from django.conf import settings
+from django.contrib.auth.hashers import (
+    Argon2PasswordHasher,
+    PBKDF2PasswordHasher,
+    ScryptPasswordHasher,
+)
+
+# Cost parameters come from the per-host calibration written by
+# `manage.py calibrate_password_hasher` (see PASSWORD_HASHER_CALIBRATION in settings).
+# Algorithm names match Django's own hashers, so existing hashes keep verifying and
+# are rehashed on the next login whenever the calibrated cost changes.
+
+
+def _stock_params(hasher_class, *names):
+    return {name: getattr(hasher_class, name) for name in names}
+
+
+# Minimum cost per algorithm: Django's own defaults, so calibration can only raise the cost
+SECURITY_FLOORS = {
+    "argon2": _stock_params(Argon2PasswordHasher, "time_cost", "memory_cost", "parallelism"),
+    "scrypt": _stock_params(ScryptPasswordHasher, "work_factor", "block_size", "parallelism"),
+    "pbkdf2_sha256": _stock_params(PBKDF2PasswordHasher, "iterations"),
+}
+
+
+def calibrated_params(algorithm):
+    calibration = getattr(settings, "PASSWORD_HASHER_CALIBRATION", None) or {}
+    if calibration.get("algorithm") != algorithm:
+        return {}
+    return calibration.get("params", {})
+
+
+class CalibratedHasherMixin:
+    def __init__(self, **params):
+        floors = SECURITY_FLOORS.get(self.algorithm, {})
+        for name, value in (params or calibrated_params(self.algorithm)).items():
+            # A calibration file from a slow host must not weaken new hashes
+            setattr(self, name, max(value, floors.get(name, value)))
+
+
+class CalibratedArgon2PasswordHasher(CalibratedHasherMixin, Argon2PasswordHasher):
+    pass
+
+
+class CalibratedScryptPasswordHasher(CalibratedHasherMixin, ScryptPasswordHasher):
+    pass
+
+
+class CalibratedPBKDF2PasswordHasher(CalibratedHasherMixin, PBKDF2PasswordHasher):
+    pass
+
+
+CALIBRATED_HASHERS = {
+    "argon2": CalibratedArgon2PasswordHasher,
+    "scrypt": CalibratedScryptPasswordHasher,
+    "pbkdf2_sha256": CalibratedPBKDF2PasswordHasher,
+}
@@ -0,0 +1,87 @@
+import asyncio
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+from django.conf import settings
+from django.contrib.auth import hashers
+
+
+def verify_and_upgrade(password, encoded):
+    """Check a password and, if its hash is outdated, return a fresh hash to store."""
+    upgraded = []
+    valid = hashers.check_password(
+        password, encoded, setter=lambda raw: upgraded.append(hashers.make_password(raw))
+    )
+    return valid, (upgraded[0] if upgraded else None)
+
+
+class HashingPoolFull(Exception):
+    """Raised when too many hashes are already waiting; callers answer with a 503."""
+
+
+class HashingPool:
+    """Bounded executor for PBKDF2 work so it never runs on the request thread/event loop."""
+
+    def __init__(self, workers=None, max_queue=None, kind=None):
+        self.workers = workers or getattr(settings, "PASSWORD_HASHING_WORKERS", None) or os.cpu_count() or 1
+        self.max_queue = max_queue or getattr(settings, "PASSWORD_HASHING_MAX_QUEUE", self.workers * 4)
+        self.kind = kind or getattr(settings, "PASSWORD_HASHING_EXECUTOR", "thread")
+        self._executor = None
+        self._pending = 0
+        self._lock = threading.Lock()
+
+    @property
+    def pending(self):
+        return self._pending
+
+    def _get_executor(self):
+        if self._executor is None:
+            with self._lock:
+                if self._executor is None:
+                    if self.kind == "process":
+                        self._executor = ProcessPoolExecutor(max_workers=self.workers)
+                    else:
+                        # hashlib.pbkdf2_hmac releases the GIL, so threads scale across cores
+                        self._executor = ThreadPoolExecutor(
+                            max_workers=self.workers, thread_name_prefix="password-hashing"
+                        )
+        return self._executor
+
+    def _release(self, _future):
+        with self._lock:
+            self._pending -= 1
+
+    def submit(self, fn, *args):
+        with self._lock:
+            if self._pending >= self.max_queue:
+                raise HashingPoolFull()
+            self._pending += 1
+        try:
+            future = self._get_executor().submit(fn, *args)
+        except Exception:
+            self._release(None)
+            raise
+        future.add_done_callback(self._release)
+        return future
+
+    async def run(self, fn, *args):
+        return await asyncio.wrap_future(self.submit(fn, *args))
+
+    async def check_password(self, password, encoded):
+        return await self.run(hashers.check_password, password, encoded)
+
+    async def verify_and_upgrade(self, password, encoded):
+        return await self.run(verify_and_upgrade, password, encoded)
+
+    async def make_password(self, password):
+        return await self.run(hashers.make_password, password)
+
+    def shutdown(self):
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=False)
+                self._executor = None
+
+
+hashing_pool = HashingPool()
@@ -0,0 +1,84 @@
+import atexit
+import logging
+import threading
+
+from django.conf import settings
+from django.db import DatabaseError, connections
+from django.db.models import Case, DateTimeField, Value, When
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+
+class LastLoginRecorder:
+    """Coalesces last_login writes and flushes them in batched UPDATEs in the background.
+
+    Logins only touch an in-memory dict; repeated logins by the same user between
+    flushes collapse into a single row update.
+    """
+
+    batch_size = 500
+
+    def __init__(self, interval=None):
+        self._interval = interval
+        self._pending = {}
+        self._lock = threading.Lock()
+        self._timer = None
+
+    @property
+    def interval(self):
+        if self._interval is not None:
+            return self._interval
+        return getattr(settings, "LAST_LOGIN_FLUSH_SECONDS", 30)
+
+    def record(self, user_id, when=None):
+        with self._lock:
+            self._pending[user_id] = when or timezone.now()
+            if self._timer is None:
+                self._timer = threading.Timer(self.interval, self._flush_in_background)
+                self._timer.daemon = True
+                self._timer.start()
+
+    def pending(self, user_id):
+        return self._pending.get(user_id)
+
+    def _flush_in_background(self):
+        try:
+            self.flush()
+        finally:
+            # This thread owns its own DB connection, don't leak it
+            connections.close_all()
+
+    def flush(self):
+        with self._lock:
+            pending, self._pending = self._pending, {}
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+        if not pending:
+            return 0
+
+        from .models import CustomUser
+
+        items = list(pending.items())
+        for start in range(0, len(items), self.batch_size):
+            batch = items[start:start + self.batch_size]
+            CustomUser.objects.filter(pk__in=[user_id for user_id, _ in batch]).update(
+                last_login=Case(
+                    *[When(pk=user_id, then=Value(when)) for user_id, when in batch],
+                    output_field=DateTimeField(),
+                )
+            )
+        return len(items)
+
+
+last_login_recorder = LastLoginRecorder()
+
+
+@atexit.register
+def _flush_at_exit():
+    # Best effort: the database may already be gone when the process shuts down
+    try:
+        last_login_recorder.flush()
+    except DatabaseError:
+        logger.warning("Dropped pending last_login updates at shutdown", exc_info=True)
@@ -0,0 +1,115 @@
+import json
+import statistics
+import threading
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.management.base import BaseCommand, CommandError
+
+
+def _percentile(samples, pct):
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+class Command(BaseCommand):
+    help = (
+        "Load-test login against a running server while /api/me/ is read concurrently. "
+        "Run once per login path (e.g. /api/login/ vs /api/async/login/ under backend.asgi) "
+        "to compare login p99 and profile-read latency before and after."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--base-url", default="http://127.0.0.1:8000")
+        parser.add_argument("--login-path", action="append", dest="login_paths",
+                            help="Login endpoint(s) to compare (default: /api/login/ and /api/async/login/)")
+        parser.add_argument("--email", default="bench-login@example.com")
+        parser.add_argument("--password", default="bench-Passw0rd!")
+        parser.add_argument("--requests", type=int, default=200, help="Logins per run")
+        parser.add_argument("--concurrency", type=int, default=32)
+        parser.add_argument("--readers", type=int, default=4, help="Threads polling /api/me/ during the run")
+
+    def _call(self, method, path, body=None, token=None):
+        data = json.dumps(body).encode() if body is not None else None
+        request = urllib.request.Request(self.base_url + path, data=data, method=method)
+        request.add_header("Content-Type", "application/json")
+        if token:
+            request.add_header("Authorization", f"Bearer {token}")
+        started = time.perf_counter()
+        try:
+            with urllib.request.urlopen(request, timeout=60) as response:
+                payload, code = response.read(), response.status
+        except urllib.error.HTTPError as e:
+            payload, code = e.read(), e.code
+        return code, (time.perf_counter() - started) * 1000, payload
+
+    def _access_token(self, credentials):
+        code, _, payload = self._call("POST", "/api/login/", credentials)
+        if code == 404:
+            self._call("POST", "/api/signup/", credentials)
+            code, _, payload = self._call("POST", "/api/login/", credentials)
+        if code != 200:
+            raise CommandError(f"Could not log in benchmark user (HTTP {code}): {payload[:200]!r}")
+        return json.loads(payload)["access"]
+
+    def _run(self, login_path, credentials, token, total, concurrency, readers):
+        login_ms, me_ms, codes = [], [], {}
+        lock = threading.Lock()
+        done = threading.Event()
+
+        def login(_):
+            code, elapsed, _ = self._call("POST", login_path, credentials)
+            with lock:
+                codes[code] = codes.get(code, 0) + 1
+                if code == 200:
+                    login_ms.append(elapsed)
+
+        def read_profile():
+            while not done.is_set():
+                code, elapsed, _ = self._call("GET", "/api/me/", token=token)
+                if code == 200:
+                    with lock:
+                        me_ms.append(elapsed)
+
+        reader_threads = [threading.Thread(target=read_profile, daemon=True) for _ in range(readers)]
+        for thread in reader_threads:
+            thread.start()
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            list(pool.map(login, range(total)))
+        wall = time.perf_counter() - started
+        done.set()
+        for thread in reader_threads:
+            thread.join()
+        return login_ms, me_ms, codes, wall
+
+    def handle(self, *args, **options):
+        self.base_url = options["base_url"].rstrip("/")
+        credentials = {"email": options["email"], "password": options["password"]}
+        token = self._access_token(credentials)
+
+        rows = []
+        for login_path in options["login_paths"] or ["/api/login/", "/api/async/login/"]:
+            login_ms, me_ms, codes, wall = self._run(
+                login_path, credentials, token,
+                options["requests"], options["concurrency"], options["readers"],
+            )
+            rows.append((login_path, login_ms, me_ms, codes, wall))
+
+        self.stdout.write(
+            f"{'endpoint':<22}{'logins/s':>10}{'login p50':>11}{'login p99':>11}"
+            f"{'me/ p50':>10}{'me/ p99':>10}  status codes"
+        )
+        for login_path, login_ms, me_ms, codes, wall in rows:
+            self.stdout.write(
+                f"{login_path:<22}{len(login_ms) / wall:>10.1f}"
+                f"{statistics.median(login_ms) if login_ms else 0:>9.1f}ms"
+                f"{_percentile(login_ms, 99):>9.1f}ms"
+                f"{statistics.median(me_ms) if me_ms else 0:>8.1f}ms"
+                f"{_percentile(me_ms, 99):>8.1f}ms  {dict(sorted(codes.items()))}"
+            )
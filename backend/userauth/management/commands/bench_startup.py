@@ -0,0 +1,100 @@
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+# Runs in a fresh interpreter: boot the WSGI application the way a server would, then serve one request
+PROBE = """
+import io, json, sys, time
+started = time.perf_counter()
+from django.core.servers.basehttp import get_internal_wsgi_application
+application = get_internal_wsgi_application()
+booted = time.perf_counter()
+environ = {
+    "REQUEST_METHOD": "GET", "PATH_INFO": sys.argv[1], "QUERY_STRING": "", "SERVER_NAME": "localhost",
+    "SERVER_PORT": "80", "HTTP_HOST": "localhost", "wsgi.input": io.BytesIO(), "wsgi.errors": sys.stderr,
+    "wsgi.url_scheme": "http", "wsgi.version": (1, 0), "wsgi.multithread": False,
+    "wsgi.multiprocess": False, "wsgi.run_once": False,
+}
+statuses = []
+response = application(environ, lambda status, headers, exc_info=None: statuses.append(status))
+b"".join(response)
+response.close()
+served = time.perf_counter()
+print(json.dumps({
+    "boot": (booted - started) * 1000, "first_request": (served - booted) * 1000,
+    "status": statuses[0], "modules": len(sys.modules),
+}))
+"""
+
+
+def _parse_importtime(stderr):
+    """[(module, self_us, cumulative_us)] from `python -X importtime` output."""
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, module = line[len("import time:"):].split("|")
+        rows.append((module.strip(), int(self_us), int(cumulative_us)))
+    return rows
+
+
+class Command(BaseCommand):
+    help = (
+        "Measure cold start - interpreter to WSGI app ready to first response - in fresh "
+        "processes with SOCIAL_AUTH_ENABLED off and on, and break down import time per "
+        "package with `python -X importtime`."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--path", default="/api/me/", help="Path served as the first request")
+        parser.add_argument("--runs", type=int, default=5, help="Fresh processes per variant, median reported")
+        parser.add_argument("--top", type=int, default=15, help="Packages listed in the import breakdown")
+
+    def _probe(self, social_auth, path, importtime=False):
+        env = dict(os.environ, SOCIAL_AUTH_ENABLED="1" if social_auth else "0")
+        command = [sys.executable] + (["-X", "importtime"] if importtime else []) + ["-c", PROBE, path]
+        result = subprocess.run(
+            command, cwd=settings.BASE_DIR, env=env, capture_output=True, text=True, timeout=300,
+        )
+        if result.returncode != 0:
+            raise CommandError(f"Startup probe failed:\n{result.stderr[-2000:]}")
+        return json.loads(result.stdout.strip().splitlines()[-1]), result.stderr
+
+    def handle(self, *args, **options):
+        path, runs = options["path"], options["runs"]
+
+        self.stdout.write(
+            f"{'social auth':<14}{'boot':>10}{'1st request':>13}{'total':>10}{'modules':>9}  status"
+        )
+        totals = {}
+        for social_auth in (True, False):
+            samples = [self._probe(social_auth, path)[0] for _ in range(runs)]
+            boot = statistics.median(sample["boot"] for sample in samples)
+            first = statistics.median(sample["first_request"] for sample in samples)
+            totals[social_auth] = statistics.median(sample["boot"] + sample["first_request"] for sample in samples)
+            self.stdout.write(
+                f"{'on' if social_auth else 'off':<14}{boot:>8.0f}ms{first:>11.0f}ms{totals[social_auth]:>8.0f}ms"
+                f"{samples[-1]['modules']:>9}  {samples[-1]['status']}"
+            )
+
+        _, stderr = self._probe(settings.SOCIAL_AUTH_ENABLED, path, importtime=True)
+        by_package = {}
+        for module, self_us, _ in _parse_importtime(stderr):
+            package = module.split(".")[0]
+            by_package[package] = by_package.get(package, 0) + self_us
+        self.stdout.write(
+            f"\nImport time by package with current settings "
+            f"(SOCIAL_AUTH_ENABLED={settings.SOCIAL_AUTH_ENABLED}), self time summed:"
+        )
+        for package, self_us in sorted(by_package.items(), key=lambda item: -item[1])[:options["top"]]:
+            self.stdout.write(f"  {package:<32}{self_us / 1000:>8.1f} ms")
+
+        saved = totals[True] - totals[False]
+        self.stdout.write(self.style.SUCCESS(
+            f"Time to first request: {totals[False]:.0f} ms without social auth, {saved:.0f} ms faster than with it"
+        ))
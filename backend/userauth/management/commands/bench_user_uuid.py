@@ -0,0 +1,68 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import IntegrityError, transaction
+from shortuuid import ShortUUID
+
+from userauth import uuids
+from userauth.models import CustomUser
+
+
+class _Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = (
+        "Insert throughput of the old random 8-character user_uuid (retry on IntegrityError) "
+        "versus the sequential allocator, one INSERT per user as on signup. Each strategy runs "
+        "in a rolled-back transaction; on PostgreSQL the sequential run still consumes "
+        "sequence values, so point it at a scratch database."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--users", type=int, default=1_000_000)
+        parser.add_argument("--report-every", type=int, default=100_000)
+
+    def _random(self):
+        generator = ShortUUID(alphabet=uuids.ALPHABET)
+        return lambda: generator.random(length=uuids.LENGTH)
+
+    def _sequential(self):
+        allocator = uuids.UserUUIDAllocator()
+        return lambda: allocator.take()[0]
+
+    def _run(self, name, next_value, users, report_every):
+        retries = 0
+        started = time.perf_counter()
+        try:
+            with transaction.atomic():
+                for i in range(users):
+                    while True:
+                        user = CustomUser(email=f"bench-uuid-{i}@example.com", password="!", user_uuid=next_value())
+                        try:
+                            with transaction.atomic():
+                                # bulk_create: a plain INSERT without the profile signal
+                                CustomUser.objects.bulk_create([user])
+                            break
+                        except IntegrityError:
+                            retries += 1
+                    if (i + 1) % report_every == 0:
+                        elapsed = time.perf_counter() - started
+                        self.stdout.write(f"  {name}: {i + 1} users, {retries} retries, {(i + 1) / elapsed:.0f} users/s")
+                elapsed = time.perf_counter() - started
+                raise _Rollback()
+        except _Rollback:
+            pass
+        return elapsed, retries
+
+    def handle(self, *args, **options):
+        users = options["users"]
+        results = [
+            (name, self._run(name, factory(), users, options["report_every"]))
+            for name, factory in (("random", self._random), ("sequential", self._sequential))
+        ]
+
+        self.stdout.write(f"{'strategy':<14}{'users':>10}{'seconds':>10}{'users/s':>10}{'retries':>10}")
+        for name, (elapsed, retries) in results:
+            self.stdout.write(f"{name:<14}{users:>10}{elapsed:>10.1f}{users / elapsed:>10.0f}{retries:>10}")
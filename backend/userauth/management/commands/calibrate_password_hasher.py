@@ -0,0 +1,106 @@
+import json
+import platform
+import statistics
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from userauth.hashers import CALIBRATED_HASHERS, SECURITY_FLOORS
+
+# The parameter scaled for each algorithm (cost grows roughly linearly with it).
+# Memory parameters stay at their floor so peak RAM per login is predictable.
+TUNABLE_PARAM = {
+    "argon2": "time_cost",
+    "scrypt": "parallelism",
+    "pbkdf2_sha256": "iterations",
+}
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark the candidate password hashers on this host and write the algorithm/cost "
+        "that best fits the login latency budget to PASSWORD_HASHER_CALIBRATION_FILE."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--budget-ms", type=float, default=100.0,
+                            help="Target time for a single password verification")
+        parser.add_argument("--samples", type=int, default=3)
+        parser.add_argument("--output", default=settings.PASSWORD_HASHER_CALIBRATION_FILE)
+        parser.add_argument("--dry-run", action="store_true", help="Print the result without writing it")
+
+    def _measure(self, hasher_class, params, samples):
+        hasher = hasher_class(**params)
+        salt = hasher.salt()
+        timings = []
+        for _ in range(samples):
+            started = time.perf_counter()
+            hasher.encode("calibration-password", salt)
+            timings.append((time.perf_counter() - started) * 1000)
+        return statistics.median(timings)
+
+    def _calibrate(self, algorithm, budget_ms, samples):
+        hasher_class = CALIBRATED_HASHERS[algorithm]
+        params = dict(SECURITY_FLOORS[algorithm])
+        param = TUNABLE_PARAM[algorithm]
+        try:
+            floor_ms = self._measure(hasher_class, params, samples)
+        except (ValueError, ImportError) as e:
+            # e.g. argon2-cffi not installed on this host
+            self.stdout.write(f"  {algorithm:<14} unavailable ({e})")
+            return None
+
+        if floor_ms > budget_ms:
+            self.stdout.write(f"  {algorithm:<14} {floor_ms:8.1f}ms at security floor, over budget")
+            return None
+
+        # Scale the tunable cost into the budget, then confirm with a real measurement
+        scale = budget_ms / floor_ms
+        params[param] = max(SECURITY_FLOORS[algorithm][param], int(params[param] * scale))
+        if algorithm == "pbkdf2_sha256":
+            params[param] -= params[param] % 10_000
+        measured_ms = self._measure(hasher_class, params, samples)
+        while measured_ms > budget_ms and params[param] > SECURITY_FLOORS[algorithm][param]:
+            params[param] = max(SECURITY_FLOORS[algorithm][param], int(params[param] * 0.9))
+            measured_ms = self._measure(hasher_class, params, samples)
+
+        margin = params[param] / SECURITY_FLOORS[algorithm][param]
+        self.stdout.write(
+            f"  {algorithm:<14} {floor_ms:8.1f}ms at floor -> {param}={params[param]} "
+            f"({measured_ms:.1f}ms, {margin:.2f}x floor)"
+        )
+        return {"algorithm": algorithm, "params": params, "measured_ms": round(measured_ms, 1), "margin": margin}
+
+    def handle(self, *args, **options):
+        budget_ms = options["budget_ms"]
+        self.stdout.write(f"Calibrating password hashers for a {budget_ms:.0f}ms budget on {platform.node()}")
+
+        results = [
+            result for result in (
+                self._calibrate(algorithm, budget_ms, options["samples"]) for algorithm in CALIBRATED_HASHERS
+            ) if result
+        ]
+        if not results:
+            raise CommandError("No hasher meets its security floor within the budget; raise --budget-ms.")
+
+        # Most security headroom above the floor for the same latency wins
+        best = max(results, key=lambda result: result["margin"])
+        calibration = {
+            "algorithm": best["algorithm"],
+            "params": best["params"],
+            "budget_ms": budget_ms,
+            "measured_ms": best["measured_ms"],
+            "host": platform.node(),
+            "calibrated_at": timezone.now().isoformat(),
+        }
+
+        self.stdout.write(json.dumps(calibration, indent=2))
+        if options["dry_run"]:
+            return
+        with open(options["output"], "w") as f:
+            json.dump(calibration, f, indent=2)
+        self.stdout.write(self.style.SUCCESS(
+            f"Wrote {options['output']}; restart workers to pick it up. Users are rehashed on next login."
+        ))
@@ -0,0 +1,151 @@
+import csv
+import itertools
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import django
+from django.contrib.auth.hashers import make_password
+from django.core.exceptions import ValidationError
+from django.core.management.base import BaseCommand, CommandError
+from django.core.validators import validate_email
+from django.db import transaction
+from django.db.models.functions import Lower
+
+from userauth.models import CustomUser
+from userprofile.models import UserProfile
+
+
+def _hash_passwords(passwords):
+    # Runs in a worker process
+    return [make_password(password) for password in passwords]
+
+
+def _read_rows(path, fmt):
+    with open(path, newline="", encoding="utf-8") as f:
+        if fmt == "csv":
+            yield from csv.DictReader(f)
+        else:
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+
+
+def _chunks(iterable, size):
+    iterator = iter(iterable)
+    while chunk := list(itertools.islice(iterator, size)):
+        yield chunk
+
+
+class Command(BaseCommand):
+    help = (
+        "Bulk-create users (and their profiles) from a CSV or JSONL file with columns "
+        "email, password and optionally name, address, phone. Passwords are hashed in a "
+        "process pool and rows are inserted with bulk_create in chunked transactions. Rows "
+        "with an invalid email or a missing password are skipped, as are existing or duplicate emails."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("path")
+        parser.add_argument("--format", choices=["csv", "jsonl"],
+                            help="Input format (default: from the file extension)")
+        parser.add_argument("--chunk-size", type=int, default=1000)
+        parser.add_argument("--workers", type=int, default=os.cpu_count() or 1,
+                            help="Password hashing processes")
+
+    def handle(self, *args, **options):
+        path = options["path"]
+        fmt = options["format"] or ("jsonl" if path.endswith((".jsonl", ".ndjson")) else "csv")
+        if not os.path.exists(path):
+            raise CommandError(f"No such file: {path}")
+
+        self.workers = max(1, options["workers"])
+        created = invalid_total = existing_total = 0
+        started = time.perf_counter()
+        # django.setup() makes the workers usable under the spawn start method as well
+        with ProcessPoolExecutor(max_workers=self.workers, initializer=django.setup) as executor:
+            for chunk in _chunks(_read_rows(path, fmt), options["chunk_size"]):
+                rows, invalid = self._clean(chunk)
+                inserted = self._import_chunk(rows, executor) if rows else 0
+                created += inserted
+                invalid_total += invalid
+                existing_total += len(rows) - inserted
+                elapsed = time.perf_counter() - started
+                self.stdout.write(
+                    f"{created} created, {invalid_total + existing_total} skipped ({created / elapsed:.0f} users/s)"
+                )
+
+        elapsed = time.perf_counter() - started
+        self.stdout.write(self.style.SUCCESS(
+            f"Imported {created} user(s) in {elapsed:.1f}s, skipped {invalid_total + existing_total} "
+            f"({invalid_total} invalid, {existing_total} already registered)"
+        ))
+
+    def _clean(self, chunk):
+        rows, seen, invalid = [], set(), 0
+        for row in chunk:
+            email = CustomUser.objects.normalize_email((row.get("email") or "").strip())
+            try:
+                validate_email(email)
+            except ValidationError:
+                invalid += 1
+                continue
+            password = row.get("password")
+            if not isinstance(password, str) or not password.strip():
+                # Never turn a blank or malformed password into an account nobody can log in to
+                invalid += 1
+                continue
+            if email in seen:
+                invalid += 1
+                continue
+            seen.add(email)
+            rows.append({**row, "email": email, "password": password})
+        return rows, invalid
+
+    def _hash(self, passwords, executor):
+        # One task per worker keeps pickling overhead to a few round trips per chunk
+        size = -(-len(passwords) // self.workers)
+        batches = executor.map(_hash_passwords, [passwords[i:i + size] for i in range(0, len(passwords), size)])
+        return list(itertools.chain.from_iterable(batches))
+
+    def _import_chunk(self, rows, executor):
+        # Saves hashing passwords for accounts that already exist
+        existing = set(
+            CustomUser.objects.annotate(email_lower=Lower("email"))
+            .filter(email_lower__in=[row["email"] for row in rows])
+            .values_list("email_lower", flat=True)
+        )
+        rows = [row for row in rows if row["email"] not in existing]
+        if not rows:
+            return 0
+
+        hashes = self._hash([row["password"] for row in rows], executor)
+        users = [CustomUser(email=row["email"], password=encoded) for row, encoded in zip(rows, hashes)]
+
+        with transaction.atomic():
+            CustomUser.objects.assign_user_uuids(users)
+            # A signup racing the check above makes its row conflict; skip it rather than abort the chunk
+            CustomUser.objects.bulk_create(users, ignore_conflicts=True)
+            # ignore_conflicts returns no ids; the freshly allocated user_uuids identify our rows
+            ids = dict(
+                CustomUser.objects.filter(user_uuid__in=[user.user_uuid for user in users])
+                .values_list("user_uuid", "id")
+            )
+
+            # bulk_create skips post_save, so profiles are created here rather than by the signal
+            profiles = []
+            for row, user in zip(rows, users):
+                user.pk = ids.get(user.user_uuid)
+                if user.pk is None:
+                    continue
+                profile = UserProfile(
+                    user=user,
+                    name=row.get("name") or user.email.split("@")[0],
+                    address=row.get("address") or "",
+                    phone=row.get("phone") or "",
+                )
+                profile.profile_complete = profile.is_complete()
+                profiles.append(profile)
+            UserProfile.objects.bulk_create(profiles)
+        return len(profiles)
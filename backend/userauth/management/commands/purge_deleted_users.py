@@ -0,0 +1,41 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from userauth.purge import purge_deleted_users, purge_lag
+
+
+class Command(BaseCommand):
+    help = (
+        "Hard-delete soft-deleted accounts and their dependent rows in bounded batches, "
+        "and report purge lag (accounts waiting, age of the oldest)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=None)
+        parser.add_argument("--loop", action="store_true", help="Keep polling instead of exiting when nothing is pending")
+        parser.add_argument("--interval", type=float, default=5.0, help="Seconds to wait between polls with --loop")
+        parser.add_argument("--stats", action="store_true", help="Only print purge lag")
+
+    def _report_lag(self):
+        lag = purge_lag()
+        self.stdout.write(f"{lag['pending']} account(s) pending purge, oldest waiting {lag['oldest_seconds']:.0f}s")
+
+    def handle(self, *args, **options):
+        if options["stats"]:
+            self._report_lag()
+            return
+
+        total = 0
+        while True:
+            started = time.perf_counter()
+            purged = purge_deleted_users(batch_size=options["batch_size"])
+            total += purged
+            if purged:
+                self.stdout.write(f"Purged {purged} account(s) in {time.perf_counter() - started:.2f}s")
+                continue
+            if not options["loop"]:
+                break
+            time.sleep(options["interval"])
+        self._report_lag()
+        self.stdout.write(self.style.SUCCESS(f"Purged {total} account(s)"))
@@ -0,0 +1,27 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from userauth.email import deliver_queued_emails
+
+
+class Command(BaseCommand):
+    help = "Send queued outbound email (userauth.OutboundEmail) in batches over pooled SMTP connections."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=None)
+        parser.add_argument("--loop", action="store_true", help="Keep polling instead of exiting when the queue is empty")
+        parser.add_argument("--interval", type=float, default=2.0, help="Seconds to wait between polls with --loop")
+
+    def handle(self, *args, **options):
+        total = 0
+        while True:
+            sent = deliver_queued_emails(batch_size=options["batch_size"])
+            total += sent
+            if sent:
+                self.stdout.write(f"Sent {sent} message(s)")
+                continue
+            if not options["loop"]:
+                break
+            time.sleep(options["interval"])
+        self.stdout.write(self.style.SUCCESS(f"Sent {total} message(s)"))
@@ -0,0 +1,33 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from userauth.models import PasswordResetOTP
+
+
+class Command(BaseCommand):
+    help = "Delete expired password-reset OTPs in small batches (uses the expires_at index)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=1000)
+        parser.add_argument("--sleep", type=float, default=0.0, help="Pause between batches, in seconds")
+
+    def handle(self, *args, **options):
+        now = timezone.now()
+        total = 0
+        while True:
+            ids = list(
+                PasswordResetOTP.objects.filter(expires_at__lt=now)
+                .order_by("expires_at")
+                .values_list("id", flat=True)[:options["batch_size"]]
+            )
+            if not ids:
+                break
+            # Nothing references OTP rows, so this is a single DELETE per batch
+            PasswordResetOTP.objects.filter(id__in=ids).delete()
+            total += len(ids)
+            if options["sleep"]:
+                time.sleep(options["sleep"])
+
+        self.stdout.write(self.style.SUCCESS(f"Deleted {total} expired OTP(s)"))
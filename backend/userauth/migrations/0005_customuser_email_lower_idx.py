@@ -0,0 +1,19 @@
+# Generated by Django 5.2.5 on 2026-10-18 17:11
+
+import django.db.models.functions.text
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auth', '0012_alter_user_first_name_max_length'),
+        ('userauth', '0004_alter_passwordresetotp_code'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='customuser',
+            index=models.Index(django.db.models.functions.text.Lower('email'), name='userauth_email_lower_idx'),
+        ),
+    ]
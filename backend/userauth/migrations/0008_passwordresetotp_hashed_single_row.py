@@ -0,0 +1,52 @@
+import django.db.models.deletion
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+
+
+def drop_outstanding_otps(apps, schema_editor):
+    # Plain-text codes can't be converted to hashes, and several rows per user would
+    # violate the new one-to-one; OTPs only live a few minutes, so users just request a new one
+    apps.get_model('userauth', 'PasswordResetOTP').objects.all().delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('userauth', '0007_outboundemail'),
+    ]
+
+    operations = [
+        migrations.RunPython(drop_outstanding_otps, migrations.RunPython.noop),
+        migrations.RemoveField(
+            model_name='passwordresetotp',
+            name='code',
+        ),
+        migrations.AddField(
+            model_name='passwordresetotp',
+            name='code_hash',
+            field=models.CharField(default='', max_length=64),
+            preserve_default=False,
+        ),
+        migrations.AddField(
+            model_name='passwordresetotp',
+            name='attempts',
+            field=models.PositiveSmallIntegerField(default=0),
+        ),
+        migrations.AlterField(
+            model_name='passwordresetotp',
+            name='created_at',
+            field=models.DateTimeField(default=django.utils.timezone.now),
+        ),
+        migrations.AddField(
+            model_name='passwordresetotp',
+            name='expires_at',
+            field=models.DateTimeField(db_index=True, default=django.utils.timezone.now),
+            preserve_default=False,
+        ),
+        migrations.AlterField(
+            model_name='passwordresetotp',
+            name='user',
+            field=models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL),
+        ),
+    ]
@@ -0,0 +1,43 @@
+# Generated by Django 5.2.5 on 2026-10-18 17:32
+
+import userauth.uuids
+from django.db import migrations, models
+
+
+def create_counter(apps, schema_editor):
+    # Existing (random) user_uuids are kept: they are public ids and sit in issued JWTs.
+    # The allocator skips any that land inside a newly reserved block.
+    apps.get_model('userauth', 'UserUUIDCounter').objects.create(pk=1, next_value=0)
+    if schema_editor.connection.vendor == 'postgresql':
+        schema_editor.execute(
+            f'CREATE SEQUENCE IF NOT EXISTS {userauth.uuids.SEQUENCE_NAME} '
+            f'MINVALUE 0 START WITH 0 INCREMENT BY {userauth.uuids.BLOCK_SIZE}'
+        )
+
+
+def drop_counter(apps, schema_editor):
+    if schema_editor.connection.vendor == 'postgresql':
+        schema_editor.execute(f'DROP SEQUENCE IF EXISTS {userauth.uuids.SEQUENCE_NAME}')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('userauth', '0008_passwordresetotp_hashed_single_row'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='UserUUIDCounter',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('next_value', models.PositiveBigIntegerField(default=0)),
+            ],
+        ),
+        migrations.AlterField(
+            model_name='customuser',
+            name='user_uuid',
+            field=userauth.uuids.UserUUIDField(editable=False, max_length=8, unique=True),
+        ),
+        migrations.RunPython(create_counter, drop_counter),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.5 on 2026-10-18 17:38
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auth', '0012_alter_user_first_name_max_length'),
+        ('userauth', '0009_sequential_user_uuid'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='customuser',
+            name='deleted_at',
+            field=models.DateTimeField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='customuser',
+            index=models.Index(condition=models.Q(('deleted_at__isnull', False)), fields=['deleted_at'], name='userauth_pending_purge_idx'),
+        ),
+    ]
@@ -0,0 +1,44 @@
+# Generated by Django 5.2.5 on 2026-10-18 19:21
+
+import django.db.models.functions.text
+from django.db import migrations, models
+from django.db.models import Count
+from django.db.models.functions import Lower
+
+
+def check_case_duplicates(apps, schema_editor):
+    # Signup used to compare emails case-sensitively; such pairs need merging by hand first
+    CustomUser = apps.get_model('userauth', 'CustomUser')
+    duplicates = list(
+        CustomUser.objects.using(schema_editor.connection.alias)
+        .values(email_lower=Lower('email'))
+        .annotate(accounts=Count('id'))
+        .filter(accounts__gt=1)
+        .values_list('email_lower', flat=True)[:20]
+    )
+    if duplicates:
+        raise RuntimeError(
+            'Accounts whose emails differ only in case must be merged or renamed before '
+            'userauth_email_lower_uniq can be added: ' + ', '.join(duplicates)
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auth', '0012_alter_user_first_name_max_length'),
+        ('userauth', '0010_customuser_deleted_at'),
+    ]
+
+    operations = [
+        migrations.RunPython(check_case_duplicates, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='customuser',
+            constraint=models.UniqueConstraint(django.db.models.functions.text.Lower('email'), name='userauth_email_lower_uniq'),
+        ),
+        # The unique index serves the Lower(email) login lookup
+        migrations.RemoveIndex(
+            model_name='customuser',
+            name='userauth_email_lower_idx',
+        ),
+    ]
@@ -1,13 +1,41 @@
 from django.contrib.auth.models import AbstractBaseUser, PermissionsMixin, BaseUserManager
 from django.db import models
+from django.db.models.functions import Lower
 import uuid
 from django.utils import timezone
 from django.conf import settings
-from shortuuid.django_fields import ShortUUIDField
-from django.conf import settings
+from django.utils.crypto import constant_time_compare, salted_hmac
+
+from .uuids import UserUUIDField, user_uuid_allocator
+
+
+# Columns the login path needs; everything else stays deferred
+LOGIN_FIELDS = ('id', 'password', 'is_active', 'is_staff', 'user_uuid', 'token_version')
 
 
 class CustomUserManager(BaseUserManager):
+    @classmethod
+    def normalize_email(cls, email):
+        # Emails are unique case-insensitively (userauth_email_lower_uniq), so store them lower-cased
+        return super().normalize_email(email).strip().lower()
+
+    def login_queryset(self, email):
+        # Matches the Lower(email) unique index, so a login is one indexed lookup whatever the casing
+        return (
+            self.only(*LOGIN_FIELDS)
+            .alias(email_lower=Lower('email'))
+            .filter(email_lower=email.strip().lower())
+            .order_by('pk')[:1]
+        )
+
+    def get_for_login(self, email):
+        return next(iter(self.login_queryset(email)), None)
+
+    async def aget_for_login(self, email):
+        async for user in self.login_queryset(email):
+            return user
+        return None
+
     def create_user(self, email, password=None, **extra_fields):
         if not email:
             raise ValueError('Email is required')
@@ -17,30 +45,163 @@ class CustomUserManager(BaseUserManager):
         user.save()
         return user
 
+    def create_user_with_hash(self, email, password_hash, **extra_fields):
+        # Same as create_user, for callers that already hashed the password off-thread
+        if not email:
+            raise ValueError('Email is required')
+        email = self.normalize_email(email)
+        user = self.model(email=email, password=password_hash, **extra_fields)
+        user.save()
+        return user
+
+    def assign_user_uuids(self, users):
+        # One allocator round trip per block instead of one per row in pre_save
+        for user, value in zip(users, user_uuid_allocator.take(len(users))):
+            user.user_uuid = value
+        return users
+
+    def soft_delete(self, user_id):
+        """Mark an account deleted in one UPDATE; userauth.purge removes its rows later.
+
+        Deactivating and bumping token_version revokes every token straight away.
+        """
+        updated = self.filter(pk=user_id, deleted_at__isnull=True).update(
+            is_active=False,
+            deleted_at=timezone.now(),
+            token_version=models.F('token_version') + 1,
+        )
+        if updated:
+            # update() sends no post_save, so drop the cached auth state here
+            from .authentication import validated_users
+            validated_users.invalidate(user_id)
+        return bool(updated)
+
     def create_superuser(self, email, password=None, **extra_fields):
         extra_fields.setdefault('is_staff', True)
         extra_fields.setdefault('is_superuser', True)
         return self.create_user(email, password, **extra_fields)
 
 class CustomUser(AbstractBaseUser, PermissionsMixin):
-    user_uuid = ShortUUIDField(length=8, alphabet='0123456789x', unique=True, editable=False  )
+    # Sequential base-11 ids from user_uuid_allocator: unique by construction, appended at the end of the index
+    user_uuid = UserUUIDField()
     email = models.EmailField(unique=True)
     is_active = models.BooleanField(default=True)
     is_staff = models.BooleanField(default=False)
+    # Carried in JWTs as the `ver` claim; bumping it revokes every token issued before
+    token_version = models.PositiveIntegerField(default=0, editable=False)
+    # Set by soft_delete(); the purge worker deletes the row and everything under it
+    deleted_at = models.DateTimeField(null=True, blank=True, editable=False)
 
     objects = CustomUserManager()
 
     USERNAME_FIELD = 'email'
     REQUIRED_FIELDS = []
 
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=['deleted_at'],
+                condition=models.Q(deleted_at__isnull=False),
+                name='userauth_pending_purge_idx',
+            ),
+        ]
+        constraints = [
+            models.UniqueConstraint(Lower('email'), name='userauth_email_lower_uniq'),
+        ]
+
     def __str__(self):
         return self.email
 
+    def bump_token_version(self):
+        # Caller saves; the post_save signal drops the cached auth state for this user
+        self.token_version += 1
+
+
+class UserUUIDCounter(models.Model):
+    """Next user_uuid value, on databases without sequences (see userauth.uuids)."""
+
+    next_value = models.PositiveBigIntegerField(default=0)
+
 
 class PasswordResetOTP(models.Model):
-    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE)
-    code = models.CharField(max_length=6)
+    """The current reset code for a user: one row per user, replaced on every request.
+
+    Only a keyed hash of the code is stored, and every check spends one of
+    OTP_MAX_ATTEMPTS, so a 6-digit code can't be brute-forced.
+    """
+
+    user = models.OneToOneField(settings.AUTH_USER_MODEL, on_delete=models.CASCADE)
+    code_hash = models.CharField(max_length=64)
+    attempts = models.PositiveSmallIntegerField(default=0)
+    created_at = models.DateTimeField(default=timezone.now)
+    expires_at = models.DateTimeField(db_index=True)
+
+    @staticmethod
+    def hash_code(user_id, code):
+        return salted_hmac('userauth.PasswordResetOTP', f'{user_id}:{code}', algorithm='sha256').hexdigest()
+
+    @classmethod
+    def issue(cls, user, code):
+        now = timezone.now()
+        otp = cls(
+            user=user,
+            code_hash=cls.hash_code(user.pk, code),
+            attempts=0,
+            created_at=now,
+            expires_at=now + timezone.timedelta(minutes=settings.OTP_EXPIRATION_TIME_MINUTES),
+        )
+        # Single-statement upsert on the unique user column
+        cls.objects.bulk_create(
+            [otp],
+            update_conflicts=True,
+            unique_fields=['user'],
+            update_fields=['code_hash', 'attempts', 'created_at', 'expires_at'],
+        )
+        return otp
+
+    def is_expired(self):
+        return timezone.now() > self.expires_at
+
+    def consume_attempt(self):
+        # Conditional UPDATE so concurrent guesses can't go past the limit
+        return PasswordResetOTP.objects.filter(
+            pk=self.pk, attempts__lt=settings.OTP_MAX_ATTEMPTS
+        ).update(attempts=models.F('attempts') + 1) == 1
+
+    def matches(self, code):
+        return constant_time_compare(self.code_hash, self.hash_code(self.user_id, code))
+
+
+class OutboundEmail(models.Model):
+    """Mail waiting to be sent by the queue worker (see userauth.email)."""
+
+    PENDING = 'pending'
+    SENDING = 'sending'
+    SENT = 'sent'
+    FAILED = 'failed'
+    STATUS_CHOICES = [
+        (PENDING, 'Pending'),
+        (SENDING, 'Sending'),
+        (SENT, 'Sent'),
+        (FAILED, 'Failed'),
+    ]
+
+    to = models.EmailField()
+    subject = models.CharField(max_length=255)
+    body = models.TextField()
+    content_subtype = models.CharField(max_length=20, default='html')
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=PENDING)
+    attempts = models.PositiveSmallIntegerField(default=0)
+    # When the worker may (re)try this message; also the lease expiry while SENDING
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+    last_error = models.TextField(blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
+    sent_at = models.DateTimeField(null=True, blank=True)
 
-    def is_expired(self):   
-        return timezone.now() > self.created_at + timezone.timedelta(minutes=settings.OTP_EXPIRATION_TIME_MINUTES)
\ No newline at end of file
+    class Meta:
+        indexes = [
+            models.Index(fields=['status', 'next_attempt_at'], name='userauth_outbox_due_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.subject} -> {self.to} ({self.status})"
@@ -0,0 +1,189 @@
+import logging
+import threading
+import time
+
+from django.apps import apps
+from django.conf import settings
+from django.db import connections, models
+from django.dispatch import Signal
+from django.utils import timezone
+
+from .models import CustomUser
+
+logger = logging.getLogger(__name__)
+
+# Sent with `user_ids` before a batch of accounts is raw-deleted, for apps whose rows
+# need more than a DELETE (no delete signals fire during the purge)
+pre_purge = Signal()
+
+
+# Tables of the apps installed only with SOCIAL_AUTH_ENABLED that point at users, children
+# first: (table, column, parent table or None for the user table). Their rows outlive the
+# apps' removal from INSTALLED_APPS and would fail the FK check when a user is deleted.
+SOCIAL_AUTH_TABLES = [
+    ("account_emailconfirmation", "email_address_id", "account_emailaddress"),
+    ("account_emailaddress", "user_id", None),
+    ("socialaccount_socialtoken", "account_id", "socialaccount_socialaccount"),
+    ("socialaccount_socialaccount", "user_id", None),
+    ("social_auth_usersocialauth", "user_id", None),
+    ("authtoken_token", "user_id", None),
+]
+
+
+def delete_uninstalled_social_auth_rows(user_ids, using="default"):
+    """Delete the users' rows in SOCIAL_AUTH_TABLES whose app is not installed.
+
+    Installed apps' rows go through the ORM like any other dependent.
+    """
+    connection = connections[using]
+    registered = {model._meta.db_table for model in apps.get_models(include_auto_created=True)}
+    existing = set(connection.introspection.table_names()) - registered
+    tables = [entry for entry in SOCIAL_AUTH_TABLES if entry[0] in existing]
+    if not tables or not user_ids:
+        return
+    qn = connection.ops.quote_name
+    placeholders = ", ".join(["%s"] * len(user_ids))
+    with connection.cursor() as cursor:
+        for table, column, parent in tables:
+            if parent is None:
+                cursor.execute(f"DELETE FROM {qn(table)} WHERE {qn(column)} IN ({placeholders})", user_ids)
+            elif parent in existing:
+                cursor.execute(
+                    f"DELETE FROM {qn(table)} WHERE {qn(column)} IN "
+                    f"(SELECT {qn('id')} FROM {qn(parent)} WHERE {qn('user_id')} IN ({placeholders}))",
+                    user_ids,
+                )
+
+
+def _raw_delete(queryset):
+    # No collector: no rows are loaded into memory and no delete signals are sent
+    return queryset._raw_delete(queryset.db)
+
+
+def _delete_dependents(model, pks, batch_size):
+    """Remove or detach every row that points at `pks` of `model`, deepest tables first."""
+    for field in model._meta.many_to_many:
+        through = field.remote_field.through
+        _delete_in_batches(
+            through._base_manager.filter(**{f"{field.m2m_field_name()}__in": pks}), batch_size
+        )
+
+    for rel in model._meta.related_objects:
+        related = rel.related_model
+        if rel.many_to_many:
+            through = rel.through
+            _delete_in_batches(
+                through._base_manager.filter(**{f"{rel.field.m2m_reverse_field_name()}__in": pks}), batch_size
+            )
+            continue
+
+        queryset = related._base_manager.filter(**{f"{rel.field.name}__pk__in": pks})
+        on_delete = rel.on_delete
+        if on_delete is models.CASCADE:
+            _delete_in_batches(queryset, batch_size)
+        elif on_delete is models.SET_NULL:
+            _detach_in_batches(queryset, rel.field.name, batch_size)
+        elif on_delete is not models.DO_NOTHING:
+            # PROTECT/RESTRICT/SET_DEFAULT/SET(): let Django's collector apply them
+            model._base_manager.filter(pk__in=pks).delete()
+            return
+
+
+def _detach_in_batches(queryset, field_name, batch_size):
+    while pks := list(queryset.order_by().values_list("pk", flat=True)[:batch_size]):
+        queryset.model._base_manager.filter(pk__in=pks).update(**{field_name: None})
+
+
+def _delete_in_batches(queryset, batch_size):
+    model = queryset.model
+    total = 0
+    while True:
+        pks = list(queryset.order_by().values_list("pk", flat=True)[:batch_size])
+        if not pks:
+            return total
+        _delete_dependents(model, pks, batch_size)
+        total += _raw_delete(model._base_manager.filter(pk__in=pks))
+
+
+def purge_deleted_users(batch_size=None, grace=None):
+    """Hard-delete one batch of soft-deleted users and their rows. Returns how many were purged.
+
+    Every statement is a bounded DELETE in autocommit, so locks are held per batch
+    rather than for the whole account; an interrupted purge resumes on the next run.
+    """
+    batch_size = batch_size or getattr(settings, "ACCOUNT_PURGE_BATCH_SIZE", 500)
+    if grace is None:
+        grace = getattr(settings, "ACCOUNT_PURGE_GRACE_SECONDS", 0)
+    cutoff = timezone.now() - timezone.timedelta(seconds=grace)
+    user_ids = list(
+        CustomUser._base_manager.filter(deleted_at__lte=cutoff)
+        .order_by("deleted_at")
+        .values_list("pk", flat=True)[:batch_size]
+    )
+    if not user_ids:
+        return 0
+    pre_purge.send(sender=CustomUser, user_ids=user_ids)
+    _delete_dependents(CustomUser, user_ids, batch_size)
+    return _raw_delete(CustomUser._base_manager.filter(pk__in=user_ids))
+
+
+def purge_lag():
+    """How many accounts are waiting to be purged and how long the oldest has waited."""
+    stats = CustomUser._base_manager.filter(deleted_at__isnull=False).aggregate(
+        pending=models.Count("pk"), oldest=models.Min("deleted_at")
+    )
+    oldest = stats["oldest"]
+    return {
+        "pending": stats["pending"],
+        "oldest_seconds": (timezone.now() - oldest).total_seconds() if oldest else 0.0,
+    }
+
+
+def run_purge(batch_size=None):
+    started = time.perf_counter()
+    purged = 0
+    while count := purge_deleted_users(batch_size):
+        purged += count
+    lag = purge_lag()
+    logger.info(
+        "Purged %s account(s) in %.2fs; %s pending, oldest waiting %.0fs",
+        purged, time.perf_counter() - started, lag["pending"], lag["oldest_seconds"],
+    )
+    return purged
+
+
+_worker_lock = threading.Lock()
+_worker_running = False
+_wakeup = threading.Event()
+
+
+def _drain():
+    global _worker_running
+    try:
+        while True:
+            _wakeup.clear()
+            run_purge()
+            with _worker_lock:
+                # Accounts deleted while we were purging get picked up before we exit
+                if not _wakeup.is_set():
+                    _worker_running = False
+                    return
+    except Exception:
+        logger.exception("Account purge worker crashed; accounts stay soft-deleted for the next run")
+        with _worker_lock:
+            _worker_running = False
+    finally:
+        connections.close_all()
+
+
+def kick_purge_worker():
+    # In-process worker so accounts go away even without `manage.py purge_deleted_users`
+    global _worker_running
+    if getattr(settings, "ACCOUNT_PURGE_WORKER", "thread") != "thread":
+        return
+    with _worker_lock:
+        _wakeup.set()
+        if _worker_running:
+            return
+        _worker_running = True
+    threading.Thread(target=_drain, name="account-purge", daemon=True).start()
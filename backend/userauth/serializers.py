@@ -1,5 +1,7 @@
 from rest_framework import serializers
+from rest_framework_simplejwt.serializers import TokenRefreshSerializer as BaseTokenRefreshSerializer
 from .models import CustomUser
+from .tokens import RefreshToken
 from userprofile.models import UserProfile
 
 class UserSignupSerializer(serializers.ModelSerializer):
@@ -9,9 +11,20 @@ class UserSignupSerializer(serializers.ModelSerializer):
         model = CustomUser
         fields = ['email', 'password']
 
+    def validate_email(self, value):
+        value = CustomUser.objects.normalize_email(value)
+        if CustomUser.objects.login_queryset(value).exists():
+            raise serializers.ValidationError('A user with this email already exists.')
+        return value
+
     def create(self, validated_data):
         user = CustomUser.objects.create_user(
             email=validated_data['email'],
             password=validated_data['password']
         )
-        return user
\ No newline at end of file
+        return user
+
+
+class TokenRefreshSerializer(BaseTokenRefreshSerializer):
+    # Our RefreshToken checks the blacklist through the bloom filter
+    token_class = RefreshToken
@@ -0,0 +1,22 @@
+from django.db.models.signals import post_delete, post_save, pre_delete
+from django.dispatch import receiver
+from django.conf import settings
+
+from .authentication import validated_users
+from .purge import delete_uninstalled_social_auth_rows, pre_purge
+
+
+@receiver(post_save, sender=settings.AUTH_USER_MODEL)
+@receiver(post_delete, sender=settings.AUTH_USER_MODEL)
+def invalidate_validated_user(sender, instance, **kwargs):
+    validated_users.invalidate(instance.pk)
+
+
+@receiver(pre_delete, sender=settings.AUTH_USER_MODEL)
+def delete_user_social_auth_rows(sender, instance, using, **kwargs):
+    delete_uninstalled_social_auth_rows([instance.pk], using=using)
+
+
+@receiver(pre_purge)
+def delete_purged_social_auth_rows(sender, user_ids, **kwargs):
+    delete_uninstalled_social_auth_rows(user_ids)
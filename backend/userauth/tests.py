@@ -1,3 +1,655 @@
-from django.test import TestCase
+import datetime
+import io
+import os
+import smtplib
+import tempfile
+import threading
+import time
+from unittest import mock, skipIf
 
-# Create your tests here.
+from cryptography import x509
+from cryptography.hazmat.primitives import hashes, serialization
+from cryptography.hazmat.primitives.asymmetric import rsa
+from cryptography.x509.oid import NameOID
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core import mail
+from django.core.mail.backends.locmem import EmailBackend as LocmemEmailBackend
+from django.core.management import call_command
+from django.db import IntegrityError, connection, transaction
+from django.contrib.auth.hashers import PBKDF2PasswordHasher
+from django.test import SimpleTestCase, TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from google.auth import crypt, jwt
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken, OutstandingToken
+
+from userprofile.models import UserProfile
+
+from .google_auth import GoogleCertCache, GoogleTokenVerifier, VerifiedTokenCache
+from .hashers import SECURITY_FLOORS, CalibratedPBKDF2PasswordHasher
+from .hashing import HashingPool, HashingPoolFull, hashing_pool
+from .authentication import validated_users
+from .blacklist import BloomFilter, blacklist_filter
+from .last_login import last_login_recorder
+from .email import deliver_queued_emails
+from . import uuids
+from .models import CustomUser, OutboundEmail, PasswordResetOTP, UserUUIDCounter
+from .purge import purge_deleted_users
+from .management.commands import import_users
+from .tokens import RefreshToken
+from .throttles import throttle_cache
+
+
+def make_local_key_set(key_id="test-key"):
+    key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+    name = x509.Name([x509.NameAttribute(NameOID.COMMON_NAME, "local-google-stand-in")])
+    now = datetime.datetime.now(datetime.timezone.utc)
+    cert = (
+        x509.CertificateBuilder()
+        .subject_name(name)
+        .issuer_name(name)
+        .public_key(key.public_key())
+        .serial_number(x509.random_serial_number())
+        .not_valid_before(now - datetime.timedelta(days=1))
+        .not_valid_after(now + datetime.timedelta(days=1))
+        .sign(key, hashes.SHA256())
+    )
+    private_pem = key.private_bytes(
+        serialization.Encoding.PEM,
+        serialization.PrivateFormat.PKCS8,
+        serialization.NoEncryption(),
+    )
+    signer = crypt.RSASigner.from_string(private_pem, key_id=key_id)
+    certs = {key_id: cert.public_bytes(serialization.Encoding.PEM).decode()}
+    return signer, certs
+
+
+class GoogleTokenVerifierTests(TestCase):
+    audience = "test-client-id"
+
+    def setUp(self):
+        self.signer, certs = make_local_key_set()
+        self.fetches = 0
+
+        def fetch():
+            self.fetches += 1
+            return certs, 3600
+
+        self.verifier = GoogleTokenVerifier(
+            cert_cache=GoogleCertCache(fetch=fetch),
+            token_cache=VerifiedTokenCache(ttl=60),
+        )
+
+    def make_token(self, **claims):
+        now = int(time.time())
+        payload = {
+            "iss": "https://accounts.google.com",
+            "aud": self.audience,
+            "email": "user@example.com",
+            "iat": now,
+            "exp": now + 300,
+        }
+        payload.update(claims)
+        return jwt.encode(self.signer, payload).decode()
+
+    def test_certs_fetched_once_for_many_tokens(self):
+        for i in range(3):
+            idinfo = self.verifier.verify(self.make_token(sub=str(i)), self.audience)
+            self.assertEqual(idinfo["email"], "user@example.com")
+        self.assertEqual(self.fetches, 1)
+
+    def test_retry_of_same_token_skips_signature_check(self):
+        token = self.make_token()
+        self.verifier.verify(token, self.audience)
+        self.verifier._decode = None  # any further crypto would blow up
+        self.assertEqual(self.verifier.verify(token, self.audience)["email"], "user@example.com")
+
+    def test_wrong_audience_and_issuer_rejected(self):
+        with self.assertRaises(ValueError):
+            self.verifier.verify(self.make_token(), "someone-else")
+        with self.assertRaises(ValueError):
+            self.verifier.verify(self.make_token(iss="evil.example.com"), self.audience)
+
+
+class AsyncAuthViewTests(TestCase):
+    def setUp(self):
+        self.addCleanup(last_login_recorder.flush)
+
+    def test_async_signup_then_login(self):
+        credentials = {"email": "async@example.com", "password": "S3cure-pass!"}
+        response = self.client.post("/api/async/signup/", credentials, content_type="application/json")
+        self.assertEqual(response.status_code, 201)
+        self.assertTrue(CustomUser.objects.get(email="async@example.com").check_password("S3cure-pass!"))
+
+        response = self.client.post("/api/async/login/", credentials, content_type="application/json")
+        self.assertEqual(response.status_code, 200)
+        self.assertIn("access", response.json())
+
+        credentials["password"] = "wrong"
+        response = self.client.post("/api/async/login/", credentials, content_type="application/json")
+        self.assertEqual(response.status_code, 401)
+
+    def test_full_hashing_pool_answers_503(self):
+        CustomUser.objects.create_user(email="busy@example.com", password="S3cure-pass!")
+        with mock.patch.object(hashing_pool, "submit", side_effect=HashingPoolFull):
+            response = self.client.post(
+                "/api/async/login/",
+                {"email": "busy@example.com", "password": "S3cure-pass!"},
+                content_type="application/json",
+            )
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(response["Retry-After"], "1")
+
+    def test_pool_rejects_beyond_queue_depth(self):
+        pool = HashingPool(workers=1, max_queue=1)
+        release = threading.Event()
+        pool.submit(release.wait)
+        with self.assertRaises(HashingPoolFull):
+            pool.submit(release.wait)
+        release.set()
+        pool.shutdown()
+
+
+def calibrated(iterations):
+    # PASSWORD_HASHERS is re-set too so Django drops its cached hasher instances
+    return override_settings(
+        PASSWORD_HASHER_CALIBRATION={"algorithm": "pbkdf2_sha256", "params": {"iterations": iterations}},
+        PASSWORD_HASHERS=list(settings.PASSWORD_HASHERS),
+    )
+
+
+class CalibratedHasherFloorTests(SimpleTestCase):
+    def test_calibration_cannot_go_below_stock_cost(self):
+        with calibrated(1000):
+            self.assertEqual(CalibratedPBKDF2PasswordHasher().iterations, PBKDF2PasswordHasher.iterations)
+        with calibrated(PBKDF2PasswordHasher.iterations * 2):
+            self.assertEqual(CalibratedPBKDF2PasswordHasher().iterations, PBKDF2PasswordHasher.iterations * 2)
+
+
+class PasswordRehashOnLoginTests(TestCase):
+    credentials = {"email": "rehash@example.com", "password": "S3cure-pass!"}
+
+    def setUp(self):
+        # Cheap hashes keep the test fast; the floor itself is covered above
+        patcher = mock.patch.dict(SECURITY_FLOORS["pbkdf2_sha256"], iterations=1)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.addCleanup(last_login_recorder.flush)
+        with calibrated(1000):
+            CustomUser.objects.create_user(**self.credentials)
+
+    def stored_iterations(self):
+        return int(CustomUser.objects.get(email="rehash@example.com").password.split("$")[1])
+
+    def test_login_upgrades_hash_to_calibrated_cost(self):
+        self.assertEqual(self.stored_iterations(), 1000)
+        with calibrated(2000):
+            response = self.client.post("/api/login/", self.credentials, content_type="application/json")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.stored_iterations(), 2000)
+
+    def test_async_login_upgrades_hash_to_calibrated_cost(self):
+        with calibrated(3000):
+            response = self.client.post("/api/async/login/", self.credentials, content_type="application/json")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.stored_iterations(), 3000)
+
+
+class LoginQueryCountTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        throttle_cache.clear()  # login throttle counters
+        self.addCleanup(last_login_recorder.flush)
+        self.user = CustomUser.objects.create_user(email="Slim@Example.com", password="S3cure-pass!")
+
+    def login(self, email, password="S3cure-pass!"):
+        return self.client.post("/api/login/", {"email": email, "password": password}, content_type="application/json")
+
+    def test_successful_login_takes_two_queries(self):
+        # SELECT of the slim user row + INSERT of the OutstandingToken
+        with self.assertNumQueries(2):
+            response = self.login("slim@example.com")
+        self.assertEqual(response.status_code, 200)
+
+    def test_failed_login_takes_one_query(self):
+        with self.assertNumQueries(1):
+            self.assertEqual(self.login("slim@example.com", "wrong").status_code, 401)
+        with self.assertNumQueries(1):
+            self.assertEqual(self.login("nobody@example.com").status_code, 404)
+
+    def test_last_login_is_coalesced_and_flushed(self):
+        self.login("SLIM@example.com")
+        self.login("slim@example.com")
+        self.user.refresh_from_db()
+        self.assertIsNone(self.user.last_login)
+        self.assertIsNotNone(last_login_recorder.pending(self.user.pk))
+
+        with self.assertNumQueries(1):
+            self.assertEqual(last_login_recorder.flush(), 1)
+        self.user.refresh_from_db()
+        self.assertIsNotNone(self.user.last_login)
+
+    def test_emails_are_unique_whatever_the_casing(self):
+        self.assertEqual(self.user.email, "slim@example.com")
+        response = self.client.post(
+            "/api/signup/", {"email": "SLIM@example.com", "password": "An0ther-pass!"}, content_type="application/json"
+        )
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("email", response.json())
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            CustomUser.objects.bulk_create([CustomUser(email="SLIM@EXAMPLE.COM", user_uuid="zzzzzzzz")])
+
+    def test_inactive_user_cannot_log_in(self):
+        CustomUser.objects.filter(pk=self.user.pk).update(is_active=False)
+        self.assertEqual(self.login("slim@example.com").status_code, 403)
+
+
+class StatelessJWTAuthenticationTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        throttle_cache.clear()
+        validated_users.clear()
+        self.addCleanup(last_login_recorder.flush)
+        self.user = CustomUser.objects.create_user(email="lazy@example.com", password="S3cure-pass!")
+        response = self.client.post(
+            "/api/login/", {"email": "lazy@example.com", "password": "S3cure-pass!"}, content_type="application/json"
+        )
+        self.auth = {"HTTP_AUTHORIZATION": "Bearer " + response.json()["access"]}
+
+    def test_profile_read_skips_user_select(self):
+        # Cold: slim (is_active, token_version) check + profile row
+        with self.assertNumQueries(2):
+            response = self.client.get("/api/me/", **self.auth)
+        self.assertEqual(response.json()["user_uuid"], self.user.user_uuid)
+        # Warm: the LRU answers the revocation check and the profile payload is cached
+        with self.assertNumQueries(0):
+            self.client.get("/api/me/", **self.auth)
+
+    def test_deactivation_revokes_access(self):
+        self.client.get("/api/me/", **self.auth)
+        self.user.is_active = False
+        self.user.save()
+        self.assertEqual(self.client.get("/api/me/", **self.auth).status_code, 401)
+
+    def test_token_version_bump_revokes_access(self):
+        self.client.get("/api/me/", **self.auth)
+        self.user.bump_token_version()
+        self.user.save()
+        self.assertEqual(self.client.get("/api/me/", **self.auth).status_code, 401)
+
+
+class RefreshTokenBlacklistTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        throttle_cache.clear()
+        blacklist_filter.reset()
+        self.addCleanup(last_login_recorder.flush)
+        CustomUser.objects.create_user(email="rotate@example.com", password="S3cure-pass!")
+        response = self.client.post(
+            "/api/login/", {"email": "rotate@example.com", "password": "S3cure-pass!"}, content_type="application/json"
+        )
+        self.refresh = response.json()["refresh"]
+
+    def refresh_token(self, token):
+        return self.client.post("/api/token/refresh/", {"refresh": token}, content_type="application/json")
+
+    def test_rotated_token_cannot_be_reused(self):
+        response = self.refresh_token(self.refresh)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.refresh_token(self.refresh).status_code, 401)
+        self.assertEqual(self.refresh_token(response.json()["refresh"]).status_code, 200)
+
+    def test_filter_miss_skips_blacklist_lookup(self):
+        blacklist_filter.rebuild()
+        with CaptureQueriesContext(connection) as queries:
+            self.refresh_token(self.refresh)
+        blacklist_reads = [
+            q["sql"] for q in queries.captured_queries
+            if q["sql"].startswith("SELECT") and "token_blacklist_blacklistedtoken" in q["sql"]
+        ]
+        # Only the rotation's own get_or_create of the blacklist row remains
+        self.assertEqual(len(blacklist_reads), 1, blacklist_reads)
+
+    def test_blacklisting_from_another_process_is_picked_up(self):
+        blacklist_filter.rebuild()
+        # Simulate another worker blacklisting the token directly in the DB
+        jti = OutstandingToken.objects.get().jti
+        BlacklistedToken.objects.create(token=OutstandingToken.objects.get(jti=jti))
+        blacklist_filter._synced_at = 0
+        self.assertEqual(self.refresh_token(self.refresh).status_code, 401)
+
+    def test_blacklisting_after_the_user_is_purged(self):
+        CustomUser.objects.filter(email="rotate@example.com").delete()
+        OutstandingToken.objects.all().delete()  # e.g. issued before the blacklist app was installed
+        RefreshToken(self.refresh).blacklist()
+        self.assertIsNone(OutstandingToken.objects.get().user_id)
+        self.assertTrue(BlacklistedToken.objects.exists())
+        connection.check_constraints()
+
+    def test_prune_deletes_only_expired_tokens(self):
+        self.refresh_token(self.refresh)
+        OutstandingToken.objects.filter(jti=OutstandingToken.objects.order_by("id").first().jti).update(
+            expires_at=timezone.now() - datetime.timedelta(days=1)
+        )
+        call_command("prune_token_blacklist", batch_size=1, sleep=0, stdout=io.StringIO())
+        self.assertEqual(OutstandingToken.objects.count(), 1)
+        self.assertEqual(BlacklistedToken.objects.count(), 0)
+
+
+class BloomFilterTests(TestCase):
+    def test_no_false_negatives_and_low_false_positive_rate(self):
+        bloom = BloomFilter(capacity=1000, error_rate=0.01)
+        for i in range(1000):
+            bloom.add(f"jti-{i}")
+        self.assertTrue(all(f"jti-{i}" in bloom for i in range(1000)))
+        false_positives = sum(f"other-{i}" in bloom for i in range(10000))
+        self.assertLess(false_positives, 300)
+
+
+class FlakyEmailBackend(LocmemEmailBackend):
+    def __init__(self, failures=1, error=smtplib.SMTPRecipientsRefused({}), opens=None, **kwargs):
+        super().__init__(**kwargs)
+        self.failures = failures
+        self.error = error
+        self.opens = opens  # how many open() calls succeed; None for all
+        self.opened = 0
+
+    def open(self):
+        self.opened += 1
+        if self.opens is not None and self.opened > self.opens:
+            raise smtplib.SMTPConnectError(421, "try later")
+
+    def send_messages(self, messages):
+        if self.failures:
+            self.failures -= 1
+            raise self.error
+        return super().send_messages(messages)
+
+
+class OutboundEmailQueueTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        throttle_cache.clear()
+        CustomUser.objects.create_user(email="otp@example.com", password="S3cure-pass!")
+
+    def test_forgot_password_queues_instead_of_sending(self):
+        response = self.client.post("/api/forgot-password/", {"email": "otp@example.com"}, content_type="application/json")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(mail.outbox), 0)
+        self.assertEqual(OutboundEmail.objects.get().status, OutboundEmail.PENDING)
+
+        self.assertEqual(deliver_queued_emails(), 1)
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertEqual(mail.outbox[0].to, ["otp@example.com"])
+        message = OutboundEmail.objects.get()
+        self.assertEqual(message.status, OutboundEmail.SENT)
+        self.assertEqual(message.body, "")
+
+    def test_batch_shares_one_connection_and_failures_back_off(self):
+        for i in range(3):
+            OutboundEmail.objects.create(to=f"user{i}@example.com", subject="Hi", body="<p>Hi</p>")
+        backend = FlakyEmailBackend(failures=1)
+        self.assertEqual(deliver_queued_emails(connection=backend), 2)
+        self.assertEqual(backend.opened, 1)
+
+        failed = OutboundEmail.objects.get(status=OutboundEmail.PENDING)
+        self.assertEqual(failed.attempts, 1)
+        self.assertGreater(failed.next_attempt_at, timezone.now())
+        # Not due yet, so nothing is retried immediately
+        self.assertEqual(deliver_queued_emails(), 0)
+
+    @override_settings(EMAIL_QUEUE_MAX_ATTEMPTS=1)
+    def test_gives_up_after_max_attempts(self):
+        OutboundEmail.objects.create(to="user@example.com", subject="Hi", body="<p>Hi</p>")
+        deliver_queued_emails(connection=FlakyEmailBackend(failures=1))
+        message = OutboundEmail.objects.get()
+        self.assertEqual(message.status, OutboundEmail.FAILED)
+        self.assertEqual(message.body, "")
+
+    def test_failed_reconnect_backs_off_the_rest_of_the_batch(self):
+        for i in range(3):
+            OutboundEmail.objects.create(to=f"user{i}@example.com", subject="Hi", body="<p>Hi</p>")
+        backend = FlakyEmailBackend(failures=1, error=smtplib.SMTPServerDisconnected("gone"), opens=1)
+        self.assertEqual(deliver_queued_emails(connection=backend), 0)
+
+        messages = OutboundEmail.objects.order_by("pk")
+        self.assertEqual([m.status for m in messages], [OutboundEmail.PENDING] * 3)
+        self.assertEqual([m.attempts for m in messages], [1, 1, 1])
+        self.assertIn("gone", messages[0].last_error)
+        self.assertIn("try later", messages[1].last_error)
+        # Backed off, not left SENDING until the lease runs out
+        self.assertTrue(all(m.next_attempt_at < timezone.now() + datetime.timedelta(minutes=5) for m in messages))
+
+
+@override_settings(OTP_MAX_ATTEMPTS=3)
+class PasswordResetOTPTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        throttle_cache.clear()
+        self.user = CustomUser.objects.create_user(email="reset@example.com", password="Old-pass-123!")
+
+    def reset(self, otp, password="New-pass-456!"):
+        return self.client.post(
+            "/api/reset-password/",
+            {"email": "reset@example.com", "otp": otp, "new_password": password},
+            content_type="application/json",
+        )
+
+    def test_reissue_replaces_the_single_row_and_stores_only_a_hash(self):
+        PasswordResetOTP.issue(self.user, "111111")
+        PasswordResetOTP.issue(self.user, "222222")
+        otp = PasswordResetOTP.objects.get()
+        self.assertNotIn("222222", otp.code_hash)
+        self.assertEqual(self.reset("111111").status_code, 400)
+        self.assertEqual(self.reset("222222").status_code, 200)
+        self.assertFalse(PasswordResetOTP.objects.exists())
+        self.user.refresh_from_db()
+        self.assertTrue(self.user.check_password("New-pass-456!"))
+
+    def test_attempts_are_limited(self):
+        PasswordResetOTP.issue(self.user, "123456")
+        for _ in range(3):
+            self.assertEqual(self.reset("000000").status_code, 400)
+        self.assertEqual(self.reset("123456").status_code, 429)
+
+    @override_settings(OTP_EXPIRATION_TIME_MINUTES=5)
+    def test_expiry_follows_setting_and_sweeper_removes_expired(self):
+        otp = PasswordResetOTP.issue(self.user, "123456")
+        self.assertEqual(otp.expires_at - otp.created_at, datetime.timedelta(minutes=5))
+        PasswordResetOTP.objects.update(expires_at=timezone.now() - datetime.timedelta(seconds=1))
+        self.assertEqual(self.reset("123456").status_code, 400)
+
+        PasswordResetOTP.issue(self.user, "123456")
+        PasswordResetOTP.objects.update(expires_at=timezone.now() - datetime.timedelta(seconds=1))
+        call_command("sweep_expired_otps", batch_size=1, stdout=io.StringIO())
+        self.assertFalse(PasswordResetOTP.objects.exists())
+
+
+class ThrottleTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        throttle_cache.clear()
+
+    def test_only_auth_endpoints_are_throttled(self):
+        for _ in range(3):
+            response = self.client.post("/api/signup/", {"email": "bad"}, content_type="application/json")
+            self.assertEqual(response.status_code, 400)
+
+    def test_otp_requests_limited_per_email(self):
+        CustomUser.objects.create_user(email="limit@example.com", password="S3cure-pass!")
+        post = lambda email: self.client.post("/api/forgot-password/", {"email": email}, content_type="application/json")
+        self.assertEqual(post("limit@example.com").status_code, 200)
+        self.assertEqual(post("LIMIT@example.com").status_code, 429)
+        self.assertEqual(post("other@example.com").status_code, 404)
+
+    @override_settings(REST_FRAMEWORK={**settings.REST_FRAMEWORK, "DEFAULT_THROTTLE_RATES": {
+        **settings.REST_FRAMEWORK["DEFAULT_THROTTLE_RATES"], "login_ip": "3/minute",
+    }})
+    def test_login_limited_per_ip(self):
+        post = lambda ip: self.client.post(
+            "/api/login/", {"email": "x@example.com", "password": "x"}, content_type="application/json", REMOTE_ADDR=ip
+        )
+        self.assertEqual([post("10.0.0.1").status_code for _ in range(4)], [404, 404, 404, 429])
+        self.assertEqual(post("10.0.0.2").status_code, 404)
+
+
+class ImportUsersTests(TestCase):
+    def test_bulk_import_creates_users_and_profiles(self):
+        CustomUser.objects.create_user(email="Existing@example.com", password="x")
+        with tempfile.NamedTemporaryFile("w", suffix=".csv", delete=False) as f:
+            f.write("email,password,name,address,phone\n")
+            f.write("a@example.com,S3cure-pass!,Ann,1 Main St,555-0100\n")
+            f.write("b@example.com,,,,\n")
+            f.write("c@example.com,An0ther-pass!,,,\n")
+            f.write("existing@example.com,x,,,\n")
+            f.write("A@example.com,dup,,,\n")
+            f.write("not-an-email,x,,,\n")
+        self.addCleanup(os.unlink, f.name)
+
+        out = io.StringIO()
+        with CaptureQueriesContext(connection) as ctx:
+            call_command("import_users", f.name, workers=1, chunk_size=100, stdout=out)
+        # One INSERT for the users and one for their profiles
+        self.assertEqual(sum(q["sql"].startswith("INSERT") for q in ctx.captured_queries), 2)
+        self.assertIn("Imported 2 user(s)", out.getvalue())
+        self.assertIn("skipped 4 (3 invalid, 1 already registered)", out.getvalue())
+
+        ann = CustomUser.objects.get(email="a@example.com")
+        self.assertTrue(ann.check_password("S3cure-pass!"))
+        self.assertTrue(ann.userprofile.profile_complete)
+        self.assertEqual(ann.userprofile.name, "Ann")
+        # A blank password is rejected, not turned into an unusable one
+        self.assertFalse(CustomUser.objects.filter(email="b@example.com").exists())
+        self.assertEqual(CustomUser.objects.get(email="c@example.com").userprofile.name, "c")
+        self.assertEqual(len({u.user_uuid for u in CustomUser.objects.all()}), 3)
+
+    def test_signup_racing_the_import_is_skipped(self):
+        with tempfile.NamedTemporaryFile("w", suffix=".jsonl", delete=False) as f:
+            f.write('{"email": "race@example.com", "password": "S3cure-pass!"}\n')
+            f.write('{"email": "new@example.com", "password": "S3cure-pass!"}\n')
+            f.write('{"email": "numeric@example.com", "password": 12345678}\n')
+        self.addCleanup(os.unlink, f.name)
+
+        def hash_during_signup(command, passwords, executor):
+            # The account appears after the existence check, before the INSERT
+            CustomUser.objects.create_user(email="Race@example.com", password="mine")
+            return ["!"] * len(passwords)
+
+        out = io.StringIO()
+        with mock.patch.object(import_users.Command, "_hash", hash_during_signup):
+            call_command("import_users", f.name, workers=1, stdout=out)
+        self.assertIn("Imported 1 user(s)", out.getvalue())
+        self.assertIn("(1 invalid, 1 already registered)", out.getvalue())
+        self.assertTrue(CustomUser.objects.get(email="race@example.com").check_password("mine"))
+        self.assertTrue(UserProfile.objects.filter(user__email="new@example.com").exists())
+
+
+
+class UserUUIDAllocatorTests(TestCase):
+    def test_encoding_is_fixed_width_and_ordered(self):
+        values = [0, 10, 11, 12345, uuids.CAPACITY - 1]
+        encoded = [uuids.encode(v) for v in values]
+        self.assertEqual(encoded[:3], ["00000000", "0000000x", "00000010"])
+        self.assertEqual(sorted(encoded), encoded)
+        self.assertEqual([uuids.decode(e) for e in encoded], values)
+        with self.assertRaises(uuids.UserUUIDSpaceExhausted):
+            uuids.encode(uuids.CAPACITY)
+
+    def test_inside_a_transaction_only_the_values_taken_are_reserved(self):
+        allocator = uuids.UserUUIDAllocator()
+        legacy = CustomUser.objects.create_user(email="legacy@example.com", password="x")
+        start = UserUUIDCounter.objects.get(pk=1).next_value
+        CustomUser.objects.filter(pk=legacy.pk).update(user_uuid=uuids.encode(start + 1))
+
+        # A rollback of the caller's transaction undoes the counter UPDATE, so none are kept
+        values = allocator.take(3)
+        self.assertEqual(values, [uuids.encode(start), uuids.encode(start + 2), uuids.encode(start + 3)])
+        self.assertEqual(UserUUIDCounter.objects.get(pk=1).next_value, start + 4)
+        self.assertEqual(allocator._values, [])
+
+    def test_users_get_sequential_ids(self):
+        a = CustomUser.objects.create_user(email="seq-a@example.com", password="x")
+        b = CustomUser.objects.create_user(email="seq-b@example.com", password="x")
+        self.assertLess(a.user_uuid, b.user_uuid)
+
+
+class UserUUIDCounterTests(TransactionTestCase):
+    def test_blocks_are_reserved_outside_transactions(self):
+        allocator = uuids.UserUUIDAllocator()
+        UserUUIDCounter.objects.get_or_create(pk=1, defaults={"next_value": 0})
+        start = UserUUIDCounter.objects.get(pk=1).next_value
+        CustomUser.objects.create_user_with_hash(email="legacy@example.com", password_hash="!",
+                                                 user_uuid=uuids.encode(start + 1))
+
+        values = allocator.take(3)
+        self.assertEqual(values, [uuids.encode(start), uuids.encode(start + 2), uuids.encode(start + 3)])
+        with self.assertNumQueries(0):
+            allocator.take(uuids.BLOCK_SIZE - 4)
+
+    def test_rolled_back_reservation_is_not_reused(self):
+        allocator = uuids.UserUUIDAllocator()
+        UserUUIDCounter.objects.get_or_create(pk=1, defaults={"next_value": 0})
+        start = UserUUIDCounter.objects.get(pk=1).next_value
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            allocator.take(1)
+            raise IntegrityError("signup failed")
+        self.assertEqual(UserUUIDCounter.objects.get(pk=1).next_value, start)
+        # Another process now reserves the same range; this one must not hand it out too
+        self.assertEqual(allocator._values, [])
+
+    def test_signup_after_flush_recreates_the_counter(self):
+        call_command("flush", interactive=False, verbosity=0)
+        self.assertFalse(UserUUIDCounter.objects.exists())
+
+        with mock.patch.object(uuids, "user_uuid_allocator", uuids.UserUUIDAllocator()):
+            response = self.client.post(
+                "/api/signup/", {"email": "flushed@example.com", "password": "An0ther-pass!"},
+                content_type="application/json",
+            )
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(CustomUser.objects.get().user_uuid, uuids.encode(0))
+        self.assertEqual(UserUUIDCounter.objects.get(pk=1).next_value, uuids.BLOCK_SIZE)
+
+
+@skipIf(settings.SOCIAL_AUTH_ENABLED, "the social auth apps own these tables when enabled")
+class UninstalledSocialAuthTablesTests(TestCase):
+    """Tables left behind by the social auth apps when SOCIAL_AUTH_ENABLED is off."""
+
+    def setUp(self):
+        with connection.cursor() as cursor:
+            for table, parent in [("authtoken_token", None), ("account_emailaddress", None),
+                                  ("account_emailconfirmation", "account_emailaddress")]:
+                column, target = ("email_address_id", parent) if parent else ("user_id", "userauth_customuser")
+                cursor.execute(
+                    f"CREATE TABLE {table} (id integer PRIMARY KEY, "
+                    f"{column} bigint NOT NULL REFERENCES {target} (id) DEFERRABLE INITIALLY DEFERRED)"
+                )
+
+    def add_rows(self, user, n):
+        with connection.cursor() as cursor:
+            cursor.execute("INSERT INTO authtoken_token VALUES (%s, %s)", [n, user.pk])
+            cursor.execute("INSERT INTO account_emailaddress VALUES (%s, %s)", [n, user.pk])
+            cursor.execute("INSERT INTO account_emailconfirmation VALUES (%s, %s)", [n, n])
+
+    def count_rows(self):
+        with connection.cursor() as cursor:
+            counts = []
+            for table in ["authtoken_token", "account_emailaddress", "account_emailconfirmation"]:
+                cursor.execute(f"SELECT COUNT(*) FROM {table}")
+                counts.append(cursor.fetchone()[0])
+        return counts
+
+    def test_deleting_and_purging_users_removes_their_rows(self):
+        deleted = CustomUser.objects.create_user(email="deleted@example.com", password="x")
+        purged = CustomUser.objects.create_user(email="purged@example.com", password="x")
+        kept = CustomUser.objects.create_user(email="kept@example.com", password="x")
+        for n, user in enumerate([deleted, purged, kept], 1):
+            self.add_rows(user, n)
+
+        deleted.delete()
+        CustomUser.objects.soft_delete(purged.pk)
+        self.assertEqual(purge_deleted_users(), 1)
+        self.assertEqual(self.count_rows(), [1, 1, 1])
+        connection.check_constraints()
@@ -1,13 +1,92 @@
-from rest_framework.throttling import SimpleRateThrottle
+import time
+
+from django.core.cache import caches
+from django.utils.connection import ConnectionProxy
+from rest_framework.settings import api_settings
+from rest_framework.throttling import BaseThrottle
+
+PERIODS = {'s': 1, 'm': 60, 'h': 3600, 'd': 86400}
+
+# Always a backend with an atomic incr, see CACHES['throttle'] in settings
+throttle_cache = ConnectionProxy(caches, 'throttle')
+
+
+class SlidingWindowThrottle(BaseThrottle):
+    """Sliding-window counter: two fixed-window counters, the previous one weighted by
+    how much of it still overlaps the window.
+
+    Each request is one `add` + `incr` + `get` on small integer keys, instead of
+    SimpleRateThrottle rewriting a list of timestamps. The counters live in the
+    `throttle` cache, which is Redis or locmem so that `incr` is atomic.
+    """
+
+    scope = None
+
+    def __init__(self):
+        rate = api_settings.DEFAULT_THROTTLE_RATES[self.scope]
+        num, period = rate.split('/')
+        self.num_requests = int(num)
+        self.duration = PERIODS[period[0]]
+        self._wait = None
+
+    def get_ident_key(self, request):
+        raise NotImplementedError('.get_ident_key() must be overridden')
+
+    def _key(self, ident, window):
+        return f'throttle:{self.scope}:{ident}:{window}'
+
+    def allow_request(self, request, view):
+        ident = self.get_ident_key(request)
+        if ident is None:
+            return True
+
+        now = time.time()
+        window, offset = divmod(now, self.duration)
+        window = int(window)
+        key = self._key(ident, window)
+
+        throttle_cache.add(key, 0, timeout=self.duration * 2)
+        try:
+            current = throttle_cache.incr(key)
+        except ValueError:
+            # Evicted between add and incr
+            throttle_cache.set(key, 1, timeout=self.duration * 2)
+            current = 1
+        previous = throttle_cache.get(self._key(ident, window - 1), 0)
+
+        overlap = 1 - offset / self.duration
+        if previous * overlap + current <= self.num_requests:
+            return True
+
+        self._wait = self.duration - offset
+        return False
+
+    def wait(self):
+        return self._wait
+
+
+class OTPThrottle(SlidingWindowThrottle):
+    """Per-email limit on requesting reset codes."""
 
-class OTPThrottle(SimpleRateThrottle):
     scope = 'otp'
 
-    def get_cache_key(self, request, view):
+    def get_ident_key(self, request):
         email = request.data.get('email')
-        if not email:
+        if not email or not isinstance(email, str):
             return None
-        return self.cache_format % {
-            'scope': self.scope,
-            'ident': email.lower()
-        }
+        return email.strip().lower()
+
+
+class OTPVerifyThrottle(OTPThrottle):
+    """Per-email limit on guessing reset codes (on top of OTP_MAX_ATTEMPTS per code)."""
+
+    scope = 'otp_verify'
+
+
+class LoginIPThrottle(SlidingWindowThrottle):
+    """Per-client-IP limit on password logins."""
+
+    scope = 'login_ip'
+
+    def get_ident_key(self, request):
+        return self.get_ident(request)
@@ -0,0 +1,54 @@
+from django.contrib.auth import get_user_model
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken, OutstandingToken
+from rest_framework_simplejwt.tokens import RefreshToken as BaseRefreshToken
+from rest_framework_simplejwt.utils import datetime_from_epoch
+
+from .blacklist import blacklist_filter
+
+
+class RefreshToken(BaseRefreshToken):
+    """Refresh token that also carries the claims StatelessJWTAuthentication reads,
+    so authenticated requests don't have to SELECT the user row.
+    The access token derived from it copies these claims."""
+
+    @classmethod
+    def for_user(cls, user):
+        token = super().for_user(user)
+        token["user_uuid"] = user.user_uuid
+        token["is_staff"] = user.is_staff
+        token["ver"] = user.token_version
+        return token
+
+    def check_blacklist(self):
+        # The bloom filter rules out almost every token without touching the DB
+        if blacklist_filter.might_contain(self.payload[api_settings.JTI_CLAIM]):
+            super().check_blacklist()
+
+    def _existing_user_id(self):
+        # An indexed EXISTS instead of loading the user; one purged since issue leaves user=None
+        user_id = self.payload.get(api_settings.USER_ID_CLAIM)
+        if user_id is None or not get_user_model().objects.filter(pk=user_id).exists():
+            return None
+        return user_id
+
+    def _outstanding_defaults(self):
+        # get_or_create only calls _existing_user_id when it has to insert the row
+        return {
+            "user_id": self._existing_user_id,
+            "created_at": self.current_time,
+            "token": str(self),
+            "expires_at": datetime_from_epoch(self.payload["exp"]),
+        }
+
+    def blacklist(self):
+        jti = self.payload[api_settings.JTI_CLAIM]
+        token, _ = OutstandingToken.objects.get_or_create(jti=jti, defaults=self._outstanding_defaults())
+        result = BlacklistedToken.objects.get_or_create(token=token)
+        blacklist_filter.add(jti)
+        return result
+
+    def outstand(self):
+        return OutstandingToken.objects.get_or_create(
+            jti=self.payload[api_settings.JTI_CLAIM], defaults=self._outstanding_defaults()
+        )
@@ -5,6 +5,7 @@ from rest_framework_simplejwt.views import (
 )
 
 from .views import RegisterView, LogoutView, ForgotPasswordView, VerifyOTPAndResetPasswordView, CustomLoginView, GoogleLoginJWTView
+from .async_views import AsyncCustomLoginView, AsyncRegisterView
 
 urlpatterns = [
     path('signup/', RegisterView.as_view(), name='signup'),
@@ -13,6 +14,10 @@ urlpatterns = [
     path('login/', CustomLoginView.as_view(), name='custom_login'),  # 👈 use this
     path('token/refresh/', TokenRefreshView.as_view(), name='token_refresh'),
 
+    # Async variants (serve through backend.asgi), hashing runs on a bounded pool
+    path('async/signup/', AsyncRegisterView.as_view(), name='async_signup'),
+    path('async/login/', AsyncCustomLoginView.as_view(), name='async_login'),
+
     path('forgot-password/', ForgotPasswordView.as_view(), name='forgot_password'),
     path('reset-password/', VerifyOTPAndResetPasswordView.as_view(), name='reset_password'),
 
@@ -1,5 +1,6 @@
-import random
+import secrets
 
 def generate_otp(length=6):
-    otp = ''.join([str(random.randint(0, 9)) for _ in range(length)])
+    # secrets, not random: reset codes must not be predictable
+    otp = ''.join([str(secrets.randbelow(10)) for _ in range(length)])
     return otp
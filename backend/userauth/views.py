@@ -1,24 +1,26 @@
-from rest_framework_simplejwt.tokens import RefreshToken
 from .serializers import UserSignupSerializer
+from .tokens import RefreshToken
 from userprofile.serializers import UserProfileSerializer
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import status
 from rest_framework import permissions
 from .utils import generate_otp
-from .email import send_otp_email
+from .throttles import OTPThrottle, OTPVerifyThrottle, LoginIPThrottle
+from .email import queue_otp_email
 from .models import PasswordResetOTP, CustomUser
 from rest_framework.permissions import AllowAny
 from django.utils import timezone
 from rest_framework.permissions import IsAuthenticated
-from google.oauth2 import id_token
-from google.auth.transport import requests
+from .google_auth import verify_google_id_token
+from .last_login import last_login_recorder
 from django.contrib.auth import get_user_model
 from django.conf import settings
 import os
 GOOGLE_CLIENT_ID = os.getenv("CLIENT_ID")
 
 from userprofile.models import UserProfile
+from userprofile.activity import activity_tracker
 
 User = get_user_model()
 
@@ -46,8 +48,8 @@ class LogoutView(APIView):
 
     def post(self, request):
         try:
-            # Clear session tracking for active time
-            request.session.pop('last_seen', None)
+            # End active-time tracking so the next login starts a fresh visit
+            activity_tracker.end_session(request.user.pk, request)
 
             refresh_token = request.data["refresh"]
             token = RefreshToken(refresh_token)
@@ -59,6 +61,7 @@ class LogoutView(APIView):
 
 class ForgotPasswordView(APIView):
     permission_classes = [AllowAny]  
+    throttle_classes = [OTPThrottle]
     def post(self, request):
         email = request.data.get("email")
         if not email:
@@ -71,8 +74,9 @@ class ForgotPasswordView(APIView):
 
         try:
             code = generate_otp()
-            PasswordResetOTP.objects.create(user=user, code=code)
-            send_otp_email(user.email, code)
+            PasswordResetOTP.issue(user, code)
+            # Queued, not sent inline: a slow SMTP server no longer holds up the request
+            queue_otp_email(user.email, code)
             return Response({"message": "OTP sent to your email"}, status=status.HTTP_200_OK)
         except Exception as e:
             import traceback
@@ -83,6 +87,7 @@ class ForgotPasswordView(APIView):
 
 class VerifyOTPAndResetPasswordView(APIView):
     permission_classes = [AllowAny]
+    throttle_classes = [OTPVerifyThrottle]
 
     def post(self, request):
         email = request.data.get("email")
@@ -97,27 +102,36 @@ class VerifyOTPAndResetPasswordView(APIView):
         except CustomUser.DoesNotExist:
             return Response({"error": "User not found"}, status=status.HTTP_404_NOT_FOUND)
 
-        try:
-            otp_obj = PasswordResetOTP.objects.filter(user=user, code=otp).latest('created_at')
-        except PasswordResetOTP.DoesNotExist:
+        # At most one row per user, so this is a unique-index lookup whatever the table size
+        otp_obj = PasswordResetOTP.objects.filter(user=user).first()
+        if otp_obj is None:
             return Response({"error": "Invalid OTP"}, status=status.HTTP_400_BAD_REQUEST)
 
         # Check expiration
-        if timezone.now() > otp_obj.created_at + timezone.timedelta(minutes=3):
+        if otp_obj.is_expired():
+            otp_obj.delete()
             return Response({"error": "OTP expired"}, status=status.HTTP_400_BAD_REQUEST)
 
-        # Reset password
+        if not otp_obj.consume_attempt():
+            return Response({"error": "Too many attempts. Please request a new OTP."}, status=status.HTTP_429_TOO_MANY_REQUESTS)
+
+        if not otp_obj.matches(otp):
+            return Response({"error": "Invalid OTP"}, status=status.HTTP_400_BAD_REQUEST)
+
+        # Reset password and revoke tokens issued with the old one
         user.set_password(new_password)
+        user.bump_token_version()
         user.save()
 
-        # Clean up used OTPs
-        PasswordResetOTP.objects.filter(user=user).delete()
+        # Clean up the used OTP
+        otp_obj.delete()
 
         return Response({"message": "Password reset successful"}, status=status.HTTP_200_OK)
     
 class CustomLoginView(APIView):
     permission_classes = [AllowAny]
     authentication_classes = []  # disable auth for login
+    throttle_classes = [LoginIPThrottle]
 
     def post(self, request):
         email = request.data.get("email")
@@ -126,16 +140,22 @@ class CustomLoginView(APIView):
         if not email or not password:
             return Response({"error": "Email and password are required."}, status=status.HTTP_400_BAD_REQUEST)
 
-        try:
-            user = CustomUser.objects.get(email=email)
-        except CustomUser.DoesNotExist:
+        # One slim, indexed SELECT; the only other round trip is the OutstandingToken INSERT
+        user = CustomUser.objects.get_for_login(email)
+        if user is None:
             return Response({"error": "User does not exist. Please create an account."}, status=status.HTTP_404_NOT_FOUND)
 
+        # check_password also rehashes with the preferred (calibrated) hasher when the
+        # stored hash is outdated, so existing users migrate lazily on login
         if not user.check_password(password):
             return Response({"error": "Incorrect password."}, status=status.HTTP_401_UNAUTHORIZED)
 
+        if not user.is_active:
+            return Response({"error": "This account is inactive."}, status=status.HTTP_403_FORBIDDEN)
+
         # User is authenticated
         refresh = RefreshToken.for_user(user)
+        last_login_recorder.record(user.pk)
         return Response({
             "message": "Login successful",
             "access": str(refresh.access_token),
@@ -153,19 +173,18 @@ class GoogleLoginJWTView(APIView):
             return Response({"error": "Token missing"}, status=400)
 
         try:
-            # 🔐 Verify token using Google's public keys
-            idinfo = id_token.verify_oauth2_token(
-                token,
-                requests.Request(),
-                GOOGLE_CLIENT_ID
-            )
+            # 🔐 Verify token using Google's public keys (cached, see google_auth.py)
+            idinfo = verify_google_id_token(token, GOOGLE_CLIENT_ID)
 
             email = idinfo["email"]
             given_name = idinfo.get("given_name", "")
             family_name = idinfo.get("family_name", "")
 
-            # 👤 Get or create the user
-            user, _ = CustomUser.objects.get_or_create(email=email)
+            # 👤 Get or create the user (emails match case-insensitively)
+            user = CustomUser.objects.get_for_login(email) or CustomUser.objects.create_user(email)
+            if not user.is_active:
+                # Includes accounts that were deleted and are waiting to be purged
+                return Response({"error": "This account is inactive."}, status=status.HTTP_403_FORBIDDEN)
 
             # 🧾 Create profile only if it doesn't exist
             UserProfile.objects.get_or_create(
@@ -175,6 +194,7 @@ class GoogleLoginJWTView(APIView):
 
             # 🔁 Create JWT tokens
             refresh = RefreshToken.for_user(user)
+            last_login_recorder.record(user.pk)
             return Response({
                 "access": str(refresh.access_token),
                 "refresh": str(refresh),
@@ -0,0 +1,131 @@
+import atexit
+import logging
+import threading
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import DatabaseError, connections
+from django.db.models import Case, DurationField, F, Value, When
+from django.utils import timezone
+from django.utils.connection import ConnectionProxy
+
+logger = logging.getLogger(__name__)
+
+# Gaps longer than this between two requests count as a new visit, not active time
+MAX_ACTIVITY_GAP = timedelta(hours=1)
+# incr keeps the TTL set by add, so a visit's key outlives the gap by a wide margin
+LAST_SEEN_TIMEOUT = timedelta(days=1)
+
+# Always a backend with an atomic incr, see CACHES['activity'] in settings
+activity_cache = ConnectionProxy(caches, 'activity')
+
+
+def _microseconds(moment):
+    return int(moment.timestamp() * 1_000_000)
+
+
+class ActivityTracker:
+    """Accumulates active time per user in memory and flushes it in bulk.
+
+    The last request time lives in the `activity` cache, one integer key per user, so
+    it is shared by every worker (with Redis) and works for JWT clients without a session. Each worker buffers the deltas it measured and
+    adds them with `active_time = active_time + delta` UPDATEs every
+    ACTIVITY_FLUSH_SECONDS, instead of saving the profile row on every request.
+    """
+
+    batch_size = 500
+    cache_prefix = "activity:last_seen_us:"
+
+    def __init__(self, interval=None):
+        self._interval = interval
+        self._pending = {}
+        self._lock = threading.Lock()
+        self._timer = None
+
+    @property
+    def interval(self):
+        if self._interval is not None:
+            return self._interval
+        return getattr(settings, "ACTIVITY_FLUSH_SECONDS", 30)
+
+    def touch(self, user_id, now=None):
+        now = now or timezone.now()
+        key = self.cache_prefix + str(user_id)
+        seen = _microseconds(now)
+        last_seen = activity_cache.get(key)
+        if last_seen is None:
+            activity_cache.add(key, seen, timeout=int(LAST_SEEN_TIMEOUT.total_seconds()))
+            return
+        step = seen - last_seen
+        if step <= 0:
+            return
+
+        # Concurrent requests can read the same last_seen. Moving it with an atomic incr
+        # lands exactly on our own time only if nobody else moved it in between; a request
+        # that lost the race takes its step back and leaves the interval to the next one.
+        try:
+            if activity_cache.incr(key, step) != seen:
+                activity_cache.decr(key, step)
+                return
+        except ValueError:
+            # Expired between the get and the incr/decr
+            return
+        elapsed = timedelta(microseconds=step)
+        if elapsed < MAX_ACTIVITY_GAP:
+            with self._lock:
+                self._pending[user_id] = self._pending.get(user_id, timedelta(0)) + elapsed
+                if self._timer is None:
+                    self._timer = threading.Timer(self.interval, self._flush_in_background)
+                    self._timer.daemon = True
+                    self._timer.start()
+
+    def end_session(self, user_id, request=None):
+        activity_cache.delete(self.cache_prefix + str(user_id))
+        if request is not None:
+            # ActivityTrackingMiddleware runs after the view; stop it writing last_seen straight back
+            getattr(request, '_request', request).activity_session_ended = True
+
+    def pending(self, user_id):
+        return self._pending.get(user_id, timedelta(0))
+
+    def _flush_in_background(self):
+        try:
+            self.flush()
+        except DatabaseError:
+            logger.exception("Failed to flush active time")
+        finally:
+            connections.close_all()
+
+    def flush(self):
+        with self._lock:
+            pending, self._pending = self._pending, {}
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+        if not pending:
+            return 0
+
+        from .models import UserProfile
+
+        items = list(pending.items())
+        for start in range(0, len(items), self.batch_size):
+            batch = items[start:start + self.batch_size]
+            UserProfile.objects.filter(user_id__in=[user_id for user_id, _ in batch]).update(
+                active_time=F("active_time") + Case(
+                    *[When(user_id=user_id, then=Value(delta)) for user_id, delta in batch],
+                    output_field=DurationField(),
+                )
+            )
+        return len(items)
+
+
+activity_tracker = ActivityTracker()
+
+
+@atexit.register
+def _flush_at_exit():
+    try:
+        activity_tracker.flush()
+    except DatabaseError:
+        logger.warning("Dropped pending active time at shutdown", exc_info=True)
@@ -3,9 +3,10 @@ from .models import UserProfile
 
 @admin.register(UserProfile)
 class UserProfileAdmin(admin.ModelAdmin):
-    list_display = ('user', 'name', 'phone', 'active_time')
+    list_display = ('user', 'name', 'phone', 'active_time', 'profile_complete')
+    list_filter = ('profile_complete',)
     search_fields = ('user__email', 'name', 'phone')
-    readonly_fields = ('active_time',)  # optional if you don't want admin to edit active_time
+    readonly_fields = ('active_time', 'profile_complete')  # optional if you don't want admin to edit active_time
 
     # Optional: display email instead of user object directly
     def user_email(self, obj):
@@ -0,0 +1,44 @@
+from django.conf import settings
+from django.core.cache import cache
+
+from backend.routers import primary_reads
+
+from .serializers import UserProfileSerializer
+
+
+def profile_cache_key(user_id):
+    return f'profile:v1:{user_id}'
+
+
+def build_profile_entry(profile):
+    return {
+        'etag': f'"{profile.user_id}-{profile.version}"',
+        'last_modified': profile.updated_at.timestamp(),
+        'profile': UserProfileSerializer(profile).data,
+        'status': {'profile_complete': profile.profile_complete},
+    }
+
+
+def cache_profile_entry(profile):
+    entry = build_profile_entry(profile)
+    cache.set(profile_cache_key(profile.user_id), entry, timeout=getattr(settings, 'PROFILE_CACHE_SECONDS', 300))
+    return entry
+
+
+def get_cached_profile_entry(user_id):
+    return cache.get(profile_cache_key(user_id))
+
+
+def get_profile_entry(user):
+    """Serialized profile + status for a user, served from the cache after the first read."""
+    entry = get_cached_profile_entry(user.pk)
+    if entry is None:
+        # Shared until PROFILE_CACHE_SECONDS pass, so build it from the primary rather than a
+        # possibly lagging replica
+        with primary_reads():
+            entry = cache_profile_entry(user.userprofile)
+    return entry
+
+
+def invalidate_profile(user_id):
+    cache.delete(profile_cache_key(user_id))
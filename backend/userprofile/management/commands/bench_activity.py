@@ -0,0 +1,76 @@
+from datetime import timedelta
+
+from django.contrib.sessions.backends.db import SessionStore
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from userauth.models import CustomUser
+from userprofile.activity import ActivityTracker
+from userprofile.models import UserProfile
+
+
+class _Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare DB writes for active-time tracking: the old per-request profile.save() + "
+        "session write versus the buffered ActivityTracker. Runs inside a rolled-back transaction."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--users", type=int, default=200)
+        parser.add_argument("--requests-per-user", type=int, default=50)
+        parser.add_argument("--flushes", type=int, default=5, help="Buffered flushes during the run")
+
+    def _count(self, fn):
+        with CaptureQueriesContext(connection) as ctx:
+            fn()
+        writes = [q for q in ctx.captured_queries if q["sql"].split(" ", 1)[0] in ("UPDATE", "INSERT")]
+        return len(ctx.captured_queries), len(writes)
+
+    def _per_request_save(self, user_ids, hits, start):
+        sessions = {user_id: SessionStore() for user_id in user_ids}
+        for hit in range(1, hits):
+            now = start + timedelta(seconds=hit * 10)
+            for user_id in user_ids:
+                profile = UserProfile.objects.get(user_id=user_id)
+                profile.active_time += timedelta(seconds=10)
+                profile.save()
+                sessions[user_id]["last_seen"] = now.isoformat()
+                sessions[user_id].save()
+
+    def _buffered(self, user_ids, hits, start, flushes):
+        tracker = ActivityTracker(interval=3600)
+        flush_every = max(1, hits // max(1, flushes))
+        for hit in range(hits):
+            now = start + timedelta(seconds=hit * 10)
+            for user_id in user_ids:
+                tracker.touch(user_id, now=now)
+            if hit and hit % flush_every == 0:
+                tracker.flush()
+        tracker.flush()
+
+    def handle(self, *args, **options):
+        users, hits = options["users"], options["requests_per_user"]
+        start = timezone.now()
+        try:
+            with transaction.atomic():
+                user_ids = [
+                    CustomUser.objects.create_user_with_hash(email=f"bench-activity-{i}@example.com", password_hash="!").pk
+                    for i in range(users)
+                ]
+                old = self._count(lambda: self._per_request_save(user_ids, hits, start))
+                new = self._count(lambda: self._buffered(user_ids, hits, start, options["flushes"]))
+                raise _Rollback()
+        except _Rollback:
+            pass
+
+        total_hits = users * hits
+        self.stdout.write(f"{total_hits} authenticated requests from {users} users")
+        self.stdout.write(f"{'strategy':<24}{'queries':>10}{'writes':>10}{'writes/request':>16}")
+        for name, (queries, writes) in (("per-request save()", old), ("buffered tracker", new)):
+            self.stdout.write(f"{name:<24}{queries:>10}{writes:>10}{writes / total_hits:>16.4f}")
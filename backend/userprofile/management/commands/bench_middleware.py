@@ -0,0 +1,86 @@
+import statistics
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.test import Client, override_settings
+
+from userauth.models import CustomUser
+from userprofile.activity import activity_tracker
+
+# MIDDLEWARE before /api/ skipped the browser stack
+FULL_STACK = [
+    'corsheaders.middleware.CorsMiddleware',
+    'django.middleware.security.SecurityMiddleware',
+    'backend.routers.ReplicaRoutingMiddleware',
+    'django.contrib.sessions.middleware.SessionMiddleware',
+    'django.middleware.common.CommonMiddleware',
+    'django.middleware.csrf.CsrfViewMiddleware',
+    'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'django.contrib.messages.middleware.MessageMiddleware',
+    'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'django.middleware.common.CommonMiddleware',
+    'userprofile.middleware.ActivityTrackingMiddleware',
+]
+
+
+class _Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = (
+        "Time GET /api/me/ in-process with no middleware, the old full middleware stack and "
+        "the current one, and report the per-request middleware overhead of each. Runs inside "
+        "a rolled-back transaction."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--requests", type=int, default=2000)
+        parser.add_argument("--rounds", type=int, default=5, help="Best round per stack is reported")
+
+    def _time(self, middleware, auth, requests):
+        with override_settings(MIDDLEWARE=middleware):
+            client = Client()
+            if client.get("/api/me/", **auth).status_code != 200:
+                raise CommandError("GET /api/me/ failed")
+            started = time.perf_counter()
+            for _ in range(requests):
+                client.get("/api/me/", **auth)
+            return (time.perf_counter() - started) / requests * 1e6
+
+    def handle(self, *args, **options):
+        full_stack = list(FULL_STACK)
+        if settings.SOCIAL_AUTH_ENABLED:
+            full_stack.insert(full_stack.index('django.contrib.auth.middleware.AuthenticationMiddleware') + 1,
+                              'allauth.account.middleware.AccountMiddleware')
+        stacks = [("none", []), ("full (before)", full_stack), ("current", list(settings.MIDDLEWARE))]
+        timings = {name: [] for name, _ in stacks}
+        try:
+            with transaction.atomic():
+                CustomUser.objects.create_user(email="bench-middleware@example.com", password="bench-Passw0rd!")
+                response = Client().post(
+                    "/api/login/",
+                    {"email": "bench-middleware@example.com", "password": "bench-Passw0rd!"},
+                    content_type="application/json",
+                )
+                auth = {"HTTP_AUTHORIZATION": "Bearer " + response.json()["access"]}
+                # Interleave the stacks so drift on the machine hits them all alike
+                for _ in range(options["rounds"]):
+                    for name, middleware in stacks:
+                        timings[name].append(self._time(middleware, auth, options["requests"]))
+                activity_tracker.flush()
+                raise _Rollback()
+        except _Rollback:
+            pass
+
+        baseline = min(timings["none"])
+        self.stdout.write(f"{'middleware':<16}{'us/request':>12}{'median':>10}{'overhead':>10}")
+        for name, _ in stacks:
+            best = min(timings[name])
+            self.stdout.write(
+                f"{name:<16}{best:>12.1f}{statistics.median(timings[name]):>10.1f}{best - baseline:>10.1f}"
+            )
+        saved = min(timings["full (before)"]) - min(timings["current"])
+        self.stdout.write(self.style.SUCCESS(f"Current stack saves {saved:.1f} us per /api/ request"))
@@ -1,30 +1,27 @@
-import datetime
-from django.utils.timezone import now
-from django.core.exceptions import ObjectDoesNotExist
+from django.utils.deprecation import MiddlewareMixin
+from django.utils.functional import SimpleLazyObject, empty
 
-class SessionActivityMiddleware:
-    def __init__(self, get_response):
-        self.get_response = get_response
+from .activity import activity_tracker
 
-    def __call__(self, request):
-        user = getattr(request, 'user', None)
 
-        if user and user.is_authenticated:
-            current_time = now()
-            last_seen = request.session.get('last_seen')
+class ActivityTrackingMiddleware(MiddlewareMixin):
+    """Feeds authenticated requests into the buffered activity tracker.
 
-            if last_seen:
-                last_seen_time = datetime.datetime.fromisoformat(last_seen)
-                elapsed = current_time - last_seen_time
+    Runs after the view so it sees the user DRF authenticated from the JWT; no session,
+    no profile read and no DB write happen on the request path.
+    """
 
-                if elapsed.total_seconds() < 3600:
-                    try:
-                        profile = user.userprofile
-                        profile.active_time += elapsed
-                        profile.save()
-                    except ObjectDoesNotExist:
-                        pass  # 🛑 Prevents errors during signup or broken profile state
+    def process_response(self, request, response):
+        if getattr(request, 'activity_session_ended', False):
+            # Logout or account deletion; the next request starts a new visit
+            return response
 
-            request.session['last_seen'] = current_time.isoformat()
+        user = request.__dict__.get('user')
+        if isinstance(user, SimpleLazyObject) and user._wrapped is empty:
+            # Nothing authenticated this request, don't load the session user just for this
+            return response
 
-        return self.get_response(request)
+        if user is not None and user.is_authenticated:
+            activity_tracker.touch(user.pk)
+
+        return response
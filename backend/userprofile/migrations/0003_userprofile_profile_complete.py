@@ -0,0 +1,40 @@
+# Generated by Django 5.2.5 on 2026-10-18 17:27
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+def backfill_profile_complete(apps, schema_editor):
+    # In Python rather than SQL TRIM, which strips only spaces: this must match
+    # UserProfile.is_complete(), whose str.strip() also strips tabs and newlines
+    UserProfile = apps.get_model('userprofile', 'UserProfile')
+    complete = []
+    for profile in UserProfile.objects.only('name', 'address', 'phone').iterator(chunk_size=2000):
+        if profile.name.strip() and profile.address.strip() and profile.phone.strip():
+            complete.append(profile.pk)
+        if len(complete) == 2000:
+            UserProfile.objects.filter(pk__in=complete).update(profile_complete=True)
+            complete = []
+    if complete:
+        UserProfile.objects.filter(pk__in=complete).update(profile_complete=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('userprofile', '0002_userprofile_version'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='userprofile',
+            name='profile_complete',
+            field=models.BooleanField(default=False),
+        ),
+        migrations.RunPython(backfill_profile_complete, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='userprofile',
+            index=models.Index(condition=models.Q(('profile_complete', False)), fields=['profile_complete'], name='userprofile_incomplete_idx'),
+        ),
+    ]
@@ -9,7 +9,36 @@ class UserProfile(models.Model):
     address = models.TextField()
     phone = models.CharField(max_length=20)
     active_time = models.DurationField(default=timedelta)
+    # Bumped on every save; with updated_at it backs the ETag/Last-Modified of /api/me/
+    version = models.PositiveIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+    # Kept in sync by save() so status checks and reports don't read address/phone
+    profile_complete = models.BooleanField(default=False)
 
+    class Meta:
+        indexes = [
+            # Only incomplete profiles are ever looked up by the flag
+            models.Index(
+                fields=['profile_complete'],
+                condition=models.Q(profile_complete=False),
+                name='userprofile_incomplete_idx',
+            ),
+        ]
+
+    def is_complete(self):
+        return all([self.name.strip(), self.address.strip(), self.phone.strip()])
+
+    def save(self, *args, **kwargs):
+        adding = self._state.adding
+        # Bumped in SQL, so concurrent saves can't store the same version (and ETag)
+        self.version = 1 if adding else models.F('version') + 1
+        self.profile_complete = self.is_complete()
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None:
+            kwargs['update_fields'] = {*update_fields, 'version', 'updated_at', 'profile_complete'}
+        super().save(*args, **kwargs)
+        if not adding:
+            self.refresh_from_db(fields=['version'])
 
     def __str__(self):
         return self.user.email
@@ -1,7 +1,8 @@
-from django.db.models.signals import post_save
+from django.db.models.signals import post_delete, post_save
 from django.dispatch import receiver
 from django.conf import settings
 from .models import UserProfile
+from .cache import invalidate_profile
 
 @receiver(post_save, sender=settings.AUTH_USER_MODEL)
 def create_user_profile(sender, instance, created, **kwargs):
@@ -12,4 +13,10 @@ def create_user_profile(sender, instance, created, **kwargs):
             name=default_name,
             address='',
             phone=''
-        )
\ No newline at end of file
+        )
+
+
+@receiver(post_save, sender=UserProfile)
+@receiver(post_delete, sender=UserProfile)
+def invalidate_cached_profile(sender, instance, **kwargs):
+    invalidate_profile(instance.user_id)
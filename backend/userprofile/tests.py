@@ -1,3 +1,215 @@
-from django.test import TestCase
+import importlib
+from datetime import timedelta
+from unittest import mock
 
-# Create your tests here.
+from django.apps import apps
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken, OutstandingToken
+
+from userauth.authentication import validated_users
+from userauth.last_login import last_login_recorder
+from userauth.models import CustomUser, PasswordResetOTP
+from userauth.purge import purge_deleted_users, purge_lag
+from userauth.throttles import throttle_cache
+from .activity import activity_cache, activity_tracker
+from .cache import profile_cache_key
+from .models import UserProfile
+
+
+class APITestCase(TestCase):
+    email = "profile@example.com"
+    password = "S3cure-pass!"
+
+    def setUp(self):
+        cache.clear()
+        throttle_cache.clear()
+        activity_cache.clear()
+        validated_users.clear()
+        self.addCleanup(last_login_recorder.flush)
+        self.addCleanup(activity_tracker.flush)
+        self.user = CustomUser.objects.create_user(email=self.email, password=self.password)
+        response = self.client.post(
+            "/api/login/", {"email": self.email, "password": self.password}, content_type="application/json"
+        )
+        self.auth = {"HTTP_AUTHORIZATION": "Bearer " + response.json()["access"]}
+
+
+class ActivityTrackingTests(APITestCase):
+    def test_jwt_requests_accumulate_without_writes(self):
+        start = timezone.now()
+        activity_tracker.touch(self.user.pk, now=start)
+        with self.assertNumQueries(0):
+            activity_tracker.touch(self.user.pk, now=start + timedelta(minutes=5))
+            activity_tracker.touch(self.user.pk, now=start + timedelta(minutes=7))
+        self.assertEqual(activity_tracker.pending(self.user.pk), timedelta(minutes=7))
+
+        with self.assertNumQueries(1):
+            activity_tracker.flush()
+        self.user.userprofile.refresh_from_db()
+        self.assertEqual(self.user.userprofile.active_time, timedelta(minutes=7))
+
+    def test_concurrent_requests_count_an_interval_once(self):
+        start = timezone.now()
+        activity_tracker.touch(self.user.pk, now=start)
+        key = activity_tracker.cache_prefix + str(self.user.pk)
+        stale = activity_cache.get(key)
+        activity_tracker.touch(self.user.pk, now=start + timedelta(minutes=3))
+        # A second request that read last_seen before the first one moved it
+        with mock.patch.object(activity_cache, "get", return_value=stale):
+            activity_tracker.touch(self.user.pk, now=start + timedelta(minutes=4))
+        self.assertEqual(activity_tracker.pending(self.user.pk), timedelta(minutes=3))
+        # It backed out, so the next request still counts from minute 3
+        activity_tracker.touch(self.user.pk, now=start + timedelta(minutes=5))
+        self.assertEqual(activity_tracker.pending(self.user.pk), timedelta(minutes=5))
+        self.assertEqual(len([k for k in activity_cache._cache if "last_seen" in k]), 1)
+
+    def test_long_gap_starts_a_new_visit(self):
+        start = timezone.now()
+        activity_tracker.touch(self.user.pk, now=start)
+        activity_tracker.touch(self.user.pk, now=start + timedelta(hours=2))
+        self.assertEqual(activity_tracker.pending(self.user.pk), timedelta(0))
+
+    def test_active_time_view_includes_pending_time(self):
+        start = timezone.now() - timedelta(minutes=90)
+        activity_tracker.touch(self.user.pk, now=start)
+        activity_tracker.touch(self.user.pk, now=start + timedelta(minutes=50))
+        response = self.client.get("/api/active-time/", **self.auth)
+        self.assertEqual(response.json()["active_time"], {"hours": 0, "minutes": 50})
+
+    def test_middleware_tracks_jwt_requests(self):
+        self.client.get("/api/me/", **self.auth)
+        self.assertIsNotNone(activity_cache.get(activity_tracker.cache_prefix + str(self.user.pk)))
+
+    def test_logged_out_gap_is_not_counted(self):
+        refresh = OutstandingToken.objects.get(user=self.user).token
+        self.client.get("/api/me/", **self.auth)
+        response = self.client.post("/api/logout/", {"refresh": refresh}, content_type="application/json", **self.auth)
+        self.assertEqual(response.status_code, 205)
+        self.assertIsNone(activity_cache.get(activity_tracker.cache_prefix + str(self.user.pk)))
+        before_logout = activity_tracker.pending(self.user.pk)
+
+        response = self.client.post(
+            "/api/login/", {"email": self.email, "password": self.password}, content_type="application/json"
+        )
+        self.client.get("/api/me/", HTTP_AUTHORIZATION="Bearer " + response.json()["access"])
+        self.assertEqual(activity_tracker.pending(self.user.pk), before_logout)
+
+
+class ProfileConditionalGetTests(APITestCase):
+    def test_revalidation_is_served_without_queries(self):
+        response = self.client.get("/api/me/", **self.auth)
+        self.assertEqual(response.status_code, 200)
+        etag = response["ETag"]
+
+        with self.assertNumQueries(0):
+            response = self.client.get("/api/me/", HTTP_IF_NONE_MATCH=etag, **self.auth)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response["ETag"], etag)
+
+    def test_status_shares_the_cached_entry(self):
+        self.client.get("/api/me/", **self.auth)
+        with self.assertNumQueries(0):
+            response = self.client.get("/api/status/", **self.auth)
+        self.assertEqual(response.json(), {"profile_complete": False})
+
+    def test_update_changes_etag_and_invalidates(self):
+        etag = self.client.get("/api/me/", **self.auth)["ETag"]
+        self.client.put(
+            "/api/update/", {"name": "New Name"}, content_type="application/json", **self.auth
+        )
+        self.assertIsNone(cache.get(profile_cache_key(self.user.pk)))
+
+        response = self.client.get("/api/me/", HTTP_IF_NONE_MATCH=etag, **self.auth)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response["ETag"], etag)
+        self.assertEqual(response.json()["name"], "New Name")
+
+
+    def test_concurrent_saves_get_distinct_versions(self):
+        first = UserProfile.objects.get(user=self.user)
+        second = UserProfile.objects.get(user=self.user)
+        first.name = "First"
+        first.save()
+        second.phone = "555-0100"
+        second.save()
+        self.assertEqual(second.version, first.version + 1)
+        self.assertEqual(UserProfile.objects.get(user=self.user).version, second.version)
+
+class ProfileSummaryTests(APITestCase):
+    def test_flag_follows_profile_fields(self):
+        profile = self.user.userprofile
+        self.assertFalse(profile.profile_complete)
+        profile.address, profile.phone = "1 Main St", "555-0100"
+        profile.save()
+        self.assertTrue(UserProfile.objects.get(pk=profile.pk).profile_complete)
+
+        profile.phone = "   "
+        profile.save(update_fields=["phone"])
+        self.assertFalse(UserProfile.objects.get(pk=profile.pk).profile_complete)
+
+    def test_summary_is_one_query(self):
+        self.client.get("/api/me/", **self.auth)
+        with self.assertNumQueries(1):
+            response = self.client.get("/api/me/summary/", **self.auth)
+        data = response.json()
+        self.assertEqual(data["profile"]["name"], "profile")
+        self.assertFalse(data["profile_complete"])
+        self.assertEqual(data["active_time"], {"hours": 0, "minutes": 0})
+
+    def test_summary_cold_cache_is_one_query(self):
+        self.client.get("/api/active-time/", **self.auth)  # warms the JWT user check only
+        with self.assertNumQueries(1):
+            response = self.client.get("/api/me/summary/", **self.auth)
+        self.assertEqual(response.json()["profile"]["user_uuid"], self.user.user_uuid)
+
+
+@override_settings(ACCOUNT_PURGE_WORKER="external")
+class AccountDeletionTests(APITestCase):
+    def test_delete_is_one_update_and_revokes_tokens(self):
+        self.client.get("/api/me/", **self.auth)
+        with self.assertNumQueries(1):
+            response = self.client.delete("/api/delete/", **self.auth)
+        self.assertEqual(response.status_code, 204)
+        self.assertEqual(self.client.get("/api/me/", **self.auth).status_code, 401)
+        self.assertEqual(purge_lag()["pending"], 1)
+
+        response = self.client.post(
+            "/api/login/", {"email": self.email, "password": self.password}, content_type="application/json"
+        )
+        self.assertEqual(response.status_code, 403)
+
+    def test_purge_removes_dependent_rows_in_batches(self):
+        PasswordResetOTP.issue(self.user, "123456")
+        outstanding = OutstandingToken.objects.filter(user=self.user)
+        BlacklistedToken.objects.create(token=outstanding.first())
+        self.client.delete("/api/delete/", **self.auth)
+
+        self.assertEqual(purge_deleted_users(batch_size=1), 1)
+        self.assertFalse(CustomUser.objects.filter(pk=self.user.pk).exists())
+        self.assertFalse(UserProfile.objects.filter(user_id=self.user.pk).exists())
+        self.assertFalse(PasswordResetOTP.objects.filter(user_id=self.user.pk).exists())
+        # Token rows are kept with user=NULL (SET_NULL) for the blacklist pruner
+        self.assertTrue(OutstandingToken.objects.filter(user__isnull=True).exists())
+        self.assertEqual(purge_lag(), {"pending": 0, "oldest_seconds": 0.0})
+
+        response = self.client.post(
+            "/api/signup/", {"email": self.email, "password": self.password}, content_type="application/json"
+        )
+        self.assertEqual(response.status_code, 201)
+
+
+class ProfileCompleteBackfillTests(TestCase):
+    def test_backfill_matches_is_complete(self):
+        migration = importlib.import_module("userprofile.migrations.0003_userprofile_profile_complete")
+        values = [("Ann", "1 Road", "555"), ("\t", "1 Road", "555"), ("Ann", "\n ", "555"), ("Ann", "1 Road", "")]
+        for i, (name, address, phone) in enumerate(values):
+            user = CustomUser.objects.create_user_with_hash(email=f"backfill{i}@example.com", password_hash="!")
+            UserProfile.objects.filter(user=user).update(name=name, address=address, phone=phone)
+        UserProfile.objects.update(profile_complete=False)
+
+        migration.backfill_profile_complete(apps, None)
+        for profile in UserProfile.objects.all():
+            self.assertEqual(profile.profile_complete, profile.is_complete(), profile.name)
+        self.assertEqual(UserProfile.objects.filter(profile_complete=True).count(), 1)
@@ -3,6 +3,7 @@ from .views import *
 
 urlpatterns = [
     path('me/', GetProfileView.as_view(), name='get_profile'),
+    path('me/summary/', ProfileSummaryView.as_view(), name='profile_summary'),
     path('status/', ProfileStatusView.as_view(), name='profile_status'),
     path('update/', UpdateProfileView.as_view(), name='update_profile'),
     path('delete/', DeleteProfileView.as_view(), name='delete_profile'),
@@ -2,28 +2,39 @@ from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
 from rest_framework import status
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date
+from django.db import transaction
+from userauth.models import CustomUser
+from userauth.purge import kick_purge_worker
 from .serializers import UserProfileSerializer
 from .models import UserProfile
+from .activity import activity_tracker
+from .cache import cache_profile_entry, get_cached_profile_entry, get_profile_entry, invalidate_profile
+
+def conditional_response(request, entry, data):
+    """200 with ETag/Last-Modified, or a bare 304 if the client's copy is current."""
+    not_modified = get_conditional_response(request, etag=entry['etag'], last_modified=int(entry['last_modified']))
+    response = Response(status=status.HTTP_304_NOT_MODIFIED) if not_modified else Response(data)
+    response['ETag'] = entry['etag']
+    response['Last-Modified'] = http_date(entry['last_modified'])
+    response['Cache-Control'] = 'private, no-cache'
+    return response
+
 
 class GetProfileView(APIView):
     permission_classes = [IsAuthenticated]
 
     def get(self, request):
-        profile = request.user.userprofile
-        serializer = UserProfileSerializer(profile)
-        return Response(serializer.data)
+        entry = get_profile_entry(request.user)
+        return conditional_response(request, entry, entry['profile'])
 
 class ProfileStatusView(APIView):
     permission_classes = [IsAuthenticated]
 
     def get(self, request):
-        profile = request.user.userprofile
-        is_complete = all([
-            profile.name.strip(),
-            profile.address.strip(),
-            profile.phone.strip()
-        ])
-        return Response({"profile_complete": is_complete})
+        entry = get_profile_entry(request.user)
+        return conditional_response(request, entry, entry['status'])
 
 class UpdateProfileView(APIView):
     permission_classes = [IsAuthenticated]
@@ -40,21 +51,50 @@ class DeleteProfileView(APIView):
     permission_classes = [IsAuthenticated]
 
     def delete(self, request):
-        user = request.user
-        user.delete()
+        # One UPDATE here; the rows are removed in batches by userauth.purge
+        CustomUser.objects.soft_delete(request.user.pk)
+        invalidate_profile(request.user.pk)
+        activity_tracker.end_session(request.user.pk, request)
+        transaction.on_commit(kick_purge_worker)
         return Response({"message": "Profile deleted and user removed"}, status=status.HTTP_204_NO_CONTENT)
 
+def format_active_time(active_time):
+    total_seconds = int(active_time.total_seconds())
+    return {
+        "hours": total_seconds // 3600,
+        "minutes": (total_seconds % 3600) // 60
+    }
+
+
 class ActiveTimeView(APIView):
     permission_classes = [IsAuthenticated]
 
     def get(self, request):
         profile = request.user.userprofile
-        total_seconds = int(profile.active_time.total_seconds())
-        hours = total_seconds // 3600
-        minutes = (total_seconds % 3600) // 60
+        # Flushed time plus what this worker is still buffering
+        active_time = profile.active_time + activity_tracker.pending(request.user.pk)
+        return Response({
+            "active_time": format_active_time(active_time)
+        })
+
+class ProfileSummaryView(APIView):
+    """Profile, completeness and active time in one round trip (and one query)."""
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request):
+        entry = get_cached_profile_entry(request.user.pk)
+        if entry is None:
+            profile = request.user.userprofile
+            entry = cache_profile_entry(profile)
+            active_time = profile.active_time
+        else:
+            # Active time is flushed in bulk without touching version, so it is never cached
+            active_time = UserProfile.objects.filter(user_id=request.user.pk).values_list('active_time', flat=True).first()
+            if active_time is None:
+                return Response({"detail": "Profile not found."}, status=status.HTTP_404_NOT_FOUND)
+        active_time += activity_tracker.pending(request.user.pk)
         return Response({
-            "active_time": {
-                "hours": hours,
-                "minutes": minutes
-            }
+            "profile": entry['profile'],
+            "profile_complete": entry['status']['profile_complete'],
+            "active_time": format_active_time(active_time),
         })